@@ -0,0 +1,202 @@
+"""
+In-memory registry of airport codes, names and coordinates.
+
+Loaded from Airport.latitude/longitude with one column query per version of
+the airport table, so maps, the route graph and the A* heuristic share one
+copy instead of hard-coding coordinates or querying Airport per code:
+
+    registry = get_registry()
+    registry.coords('DEL')             # (28.5562, 77.1) or None
+    registry.distance('DEL', 'BOM')    # km, from the precomputed matrix
+
+Coordinates live in parallel arrays indexed like registry.codes. Airports
+without coordinates (NULL or the column default 0/0) are kept for names but
+have no coords and a distance of 0 to everything. Up to MAX_MATRIX_AIRPORTS
+airports get a full great-circle distance matrix (vectorized with numpy when
+it is installed); larger registries compute distances on demand.
+"""
+
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, current_app
+
+from data_version import get_versions
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+    print("⚠️  numpy not installed, airport distance matrix limited to small networks")
+
+EARTH_RADIUS_KM = 6371.0
+
+# A float64 matrix for 2000 airports takes 32 MB; the pure-Python one is slower to build
+MAX_MATRIX_AIRPORTS = 2000 if np is not None else 300
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km between two coordinates"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def _located(latitude, longitude) -> bool:
+    return latitude is not None and longitude is not None and (latitude, longitude) != (0.0, 0.0)
+
+
+class AirportRegistry:
+    """Airports of one version of the airport table (or of in-memory records)"""
+
+    def __init__(self, airports: Iterable[Dict], version: Optional[Tuple[int, ...]] = None):
+        """
+        airports: dicts with code, name, city, latitude and longitude (and id
+        when flights refer to airports by primary key)
+        """
+        self.version = version
+        self.codes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.cities: List[str] = []
+        # NaN where an airport has no coordinates
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self._codes_by_id: Dict[int, str] = {}
+
+        for airport in airports:
+            code = airport['code']
+            self.index[code] = len(self.codes)
+            self.codes.append(code)
+            self.names.append(airport['name'])
+            self.cities.append(airport['city'])
+            latitude, longitude = airport.get('latitude'), airport.get('longitude')
+            if not _located(latitude, longitude):
+                latitude = longitude = math.nan
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+            if airport.get('id') is not None:
+                self._codes_by_id[airport['id']] = code
+
+        self._matrix = self._distance_matrix() if len(self.codes) <= MAX_MATRIX_AIRPORTS else None
+
+    @classmethod
+    def from_db(cls, version: Optional[Tuple[int, ...]] = None) -> 'AirportRegistry':
+        """Registry of every airport in the database, read with one query"""
+        from models import db, Airport
+
+        rows = db.session.execute(db.select(
+            Airport.id, Airport.code, Airport.name, Airport.city, Airport.latitude, Airport.longitude
+        ).order_by(Airport.id))
+        return cls((row._asdict() for row in rows), version)
+
+    def _distance_matrix(self):
+        """Distances between every pair of airports; 0 where either has no coordinates"""
+        if np is not None:
+            lat = np.radians(np.frombuffer(self.latitudes, dtype=np.float64))
+            lon = np.radians(np.frombuffer(self.longitudes, dtype=np.float64))
+            a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+                 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+            matrix = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+            return np.nan_to_num(matrix, copy=False, nan=0.0)
+        return [self._distance_row(i) for i in range(len(self.codes))]
+
+    def _distance_row(self, i: int) -> array:
+        lat1, lon1 = self.latitudes[i], self.longitudes[i]
+        if math.isnan(lat1):
+            return array('d', bytes(8 * len(self.codes)))
+        return array('d', (0.0 if math.isnan(lat2) else haversine(lat1, lon1, lat2, lon2)
+                           for lat2, lon2 in zip(self.latitudes, self.longitudes)))
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def code_of(self, airport_id: int) -> Optional[str]:
+        """Code of the airport with primary key airport_id"""
+        return self._codes_by_id.get(airport_id)
+
+    def coords(self, code: str) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of code, or None if it is unknown or has no coordinates"""
+        i = self.index.get(code)
+        if i is None or math.isnan(self.latitudes[i]):
+            return None
+        return (self.latitudes[i], self.longitudes[i])
+
+    def info(self, code: str) -> Optional[Dict]:
+        """name, city, lat and lon (None without coordinates) of code"""
+        i = self.index.get(code)
+        if i is None:
+            return None
+        coords = self.coords(code)
+        return {
+            'name': self.names[i],
+            'city': self.cities[i],
+            'lat': coords[0] if coords else None,
+            'lon': coords[1] if coords else None,
+        }
+
+    def located_codes(self) -> List[str]:
+        """Codes of the airports that have coordinates, in registry order"""
+        return [code for code, latitude in zip(self.codes, self.latitudes) if not math.isnan(latitude)]
+
+    def distance(self, source: str, destination: str) -> float:
+        """Great-circle km between two airports, 0 if either has no coordinates"""
+        i, j = self.index.get(source), self.index.get(destination)
+        if i is None or j is None:
+            return 0.0
+        if self._matrix is not None:
+            return float(self._matrix[i][j])
+        lat1, lat2 = self.latitudes[i], self.latitudes[j]
+        if math.isnan(lat1) or math.isnan(lat2):
+            return 0.0
+        return haversine(lat1, self.longitudes[i], lat2, self.longitudes[j])
+
+    def distances_to(self, code: str) -> Optional[Sequence[float]]:
+        """km from every airport (indexed like codes) to code, or None if it is unknown"""
+        i = self.index.get(code)
+        if i is None:
+            return None
+        if self._matrix is None:
+            return self._distance_row(i)
+        row = self._matrix[i]
+        return row.tolist() if np is not None else row
+
+    def centroid(self, codes: Iterable[str]) -> Optional[Tuple[float, float]]:
+        """Mean (lat, lon) of the codes that have coordinates"""
+        located = [coords for coords in map(self.coords, codes) if coords]
+        if not located:
+            return None
+        return (sum(lat for lat, _ in located) / len(located), sum(lon for _, lon in located) / len(located))
+
+
+class _RegistryLoader:
+    """Keeps the registry of the current airport table version"""
+
+    def __init__(self):
+        self.registry: Optional[AirportRegistry] = None
+        self._lock = threading.Lock()
+
+    def current(self, version: Tuple[int, ...]) -> AirportRegistry:
+        registry = self.registry
+        if registry is not None and registry.version == version:
+            return registry
+        with self._lock:
+            if self.registry is None or self.registry.version != version:
+                self.registry = AirportRegistry.from_db(version)
+            return self.registry
+
+
+def init_app(app: Flask) -> None:
+    app.extensions['airport_registry'] = _RegistryLoader()
+
+
+def get_registry() -> AirportRegistry:
+    """Airport registry of the current app, reloaded when the airport table changes"""
+    return current_app.extensions['airport_registry'].current(get_versions().get(['airport']))
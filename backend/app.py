@@ -1,35 +1,100 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 
 from routers.flights import flights_blueprint
 from routers.bookings import bookings_blueprint
 from routers.routes import routes_blueprint
+from routers.metrics import metrics_blueprint
+from models import db
+from db import upgrade_schema, apply_sqlite_pragmas
+from config import PROFILES
+import metrics
+import route_writer
+import network_stats
+import data_version
+import serialization
+import compression
+import map_cache
+import airport_registry
+import map_prerender
 
-app = Flask(__name__)
-CORS(app)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-from models import db
-db.init_app(app)
+def create_app(database_uri: str = None, profile: str = None) -> Flask:
+    """
+    Create the Flask application.
+    
+    database_uri overrides the configured database; profile picks a config
+    from config.PROFILES (default: FLIGHTRES_PROFILE or 'development').
+    """
+    app = Flask(__name__)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
+
+    profile = profile or os.environ.get('FLIGHTRES_PROFILE', 'development')
+    app.config.from_object(PROFILES[profile])
+    if database_uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    serialization.init_app(app)
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    pool_options = app.config.get('SQLALCHEMY_POOL_OPTIONS')
+    if pool_options and uri not in ('sqlite://', 'sqlite:///:memory:'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**app.config['SQLALCHEMY_ENGINE_OPTIONS'], **pool_options}
+
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        data_version.init_app(app, db.engine)
+        # Opt-in: upgrading scans the route table, and importing this module creates an app
+        if app.config['UPGRADE_SCHEMA_ON_START']:
+            upgrade_schema()
+    metrics.init_app(app)
+    route_writer.init_app(app)
+    network_stats.init_app(app)
+    airport_registry.init_app(app)
+    map_cache.init_app(app)
+    map_prerender.init_app(app)
+    compression.init_app(app)
 
-# Register routes
-app.register_blueprint(flights_blueprint)
-app.register_blueprint(bookings_blueprint)
-app.register_blueprint(routes_blueprint)
+    # Register routes
+    app.register_blueprint(flights_blueprint)
+    app.register_blueprint(bookings_blueprint)
+    app.register_blueprint(routes_blueprint)
+    app.register_blueprint(metrics_blueprint)
 
-@app.route('/')
-def home():
-    return {"message": "FlightRes API running with Graph-based Route Optimization"}
+    @app.route('/')
+    def home():
+        return {"message": "FlightRes API running with Graph-based Route Optimization"}
 
-@app.route('/health')
-def health():
-    return {"status": "healthy"}
+    @app.route('/health')
+    def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def close_app(app: Flask):
+    """
+    Stop an app's background workers and dispose of its engine, for apps
+    created per test, benchmark profile or load test. Writers flush on
+    close, so they are closed while the database is still there.
+    """
+    app.extensions['map_prerender'].close()
+    app.extensions['network_stats'].close()
+    app.extensions['route_writer'].close()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+app = create_app()
 
 if __name__ == '__main__':
+    # Databases created by older versions get the tables, columns and indexes they lack
     with app.app_context():
-        db.create_all()
-    
+        upgrade_schema()
+
     # Force run on port 5001
     port = 5001
     print(f"Starting server on port {port}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write database throughput, per configuration profile.
+
+Reader threads run the saved-routes and flight-search queries while writer
+threads insert Route rows and commit, the way /routes/find does. Each profile
+gets its own throwaway SQLite file seeded with the same synthetic network, so
+the numbers compare SQLite defaults against the tuned production profile:
+
+    python benchmark_db.py --readers 6 --writers 2 --duration 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark_routing import latency_summary
+from synthetic_network import SyntheticNetworkGenerator
+
+
+def run_profile(profile: str, readers: int, writers: int, duration: float, seed: int) -> dict:
+    from app import close_app, create_app
+    from models import db, Airport, Flight, Route as RouteModel
+
+    fd, path = tempfile.mkstemp(suffix='.db', prefix=f'flightres-{profile}-')
+    os.close(fd)
+    app = create_app(f'sqlite:///{path}', profile=profile)
+    with app.app_context():
+        generator = SyntheticNetworkGenerator(100, 3000, 'hub_spoke', seed=seed)
+        generator.write_to_db()
+        db.session.remove()
+    codes = [a['code'] for a in generator.airports()]
+
+    latencies = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def read_once(i):
+        RouteModel.query.order_by(RouteModel.created_at.desc()).limit(50).all()
+        Flight.query.join(Flight.source).filter(Airport.code == codes[i % len(codes)]).all()
+
+    def write_once(i):
+        db.session.add(RouteModel(
+            source_airport_code=codes[i % len(codes)],
+            destination_airport_code=codes[(i + 1) % len(codes)],
+            route_type='cost',
+            total_cost=1000.0 + i,
+            total_duration=2.5,
+            total_delay_prob=0.1,
+            airports_sequence=json.dumps([codes[i % len(codes)], codes[(i + 1) % len(codes)]]),
+            flights_sequence=json.dumps([])
+        ))
+        db.session.commit()
+
+    def worker(kind, operation, offset):
+        i = offset
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    operation(i)
+                    ok = True
+                except Exception:
+                    db.session.rollback()
+                    ok = False
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    if ok:
+                        latencies[kind].append(elapsed)
+                    else:
+                        errors[kind] += 1
+                i += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=('read', read_once, n * 1000)) for n in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', write_once, n * 1000)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    close_app(app)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    result = {}
+    for kind in ('read', 'write'):
+        summary = latency_summary(latencies[kind])
+        summary.update({
+            'operations': len(latencies[kind]),
+            'errors': errors[kind],
+            'throughput_ops': round(len(latencies[kind]) / duration, 1),
+        })
+        result[kind] = summary
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare DB profiles under a mixed read/write load")
+    parser.add_argument('--profiles', nargs='+', default=['development', 'production'])
+    parser.add_argument('--readers', type=int, default=6)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per profile")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(f"🗄️  {args.readers} readers + {args.writers} writers for {args.duration:.0f}s per profile")
+    print(f"   {'profile':<13}{'kind':<7}{'ops/s':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for profile in args.profiles:
+        result = run_profile(profile, args.readers, args.writers, args.duration, args.seed)
+        for kind, s in result.items():
+            print(f"   {profile:<13}{kind:<7}{s['throughput_ops']:>9.1f}{s['errors']:>8}"
+                  f"{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
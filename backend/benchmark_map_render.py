@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Map rendering benchmark: iframe/srcdoc round trip vs direct rendering.
+
+The visualize endpoints used to call map_viz._repr_html_(), search the
+escaped iframe srcdoc with a regex and unescape it. render_map_html()
+renders the root figure directly. Both paths render the same route,
+network and comparison maps (rebuilt before every untimed render, since a
+folium figure can only be rendered once) and must produce the same
+document up to folium's random element ids:
+
+    python benchmark_map_render.py --repeat 50
+"""
+
+import argparse
+import html
+import re
+import sys
+import time
+
+from benchmark_routing import latency_summary
+
+AIRPORTS = [
+    ('DEL', 'Indira Gandhi International Airport', 'Delhi', 28.5562, 77.1000),
+    ('BOM', 'Chhatrapati Shivaji Maharaj International Airport', 'Mumbai', 19.0896, 72.8656),
+    ('BLR', 'Kempegowda International Airport', 'Bangalore', 12.9716, 77.5946),
+    ('MAA', 'Chennai International Airport', 'Chennai', 12.9941, 80.1709),
+    ('CCU', 'Netaji Subhas Chandra Bose International Airport', 'Kolkata', 22.6549, 88.4462),
+    ('HYD', 'Rajiv Gandhi International Airport', 'Hyderabad', 17.2403, 78.4294),
+]
+
+
+def legacy_render(map_viz) -> str:
+    """What the visualize endpoints did before render_map_html"""
+    map_html = map_viz._repr_html_()
+    srcdoc_match = re.search(r'srcdoc="([^"]*)"', map_html)
+    return html.unescape(srcdoc_match.group(1)) if srcdoc_match else map_html
+
+
+def normalized(document: str) -> str:
+    """document with folium's random element ids replaced"""
+    return re.sub(r'_[0-9a-f]{32}\b', '_id', document)
+
+
+def seed(db, Airport, Flight):
+    db.create_all()
+    airports = [Airport(code=code, name=name, city=city, latitude=lat, longitude=lon)
+                for code, name, city, lat, lon in AIRPORTS]
+    db.session.add_all(airports)
+    db.session.flush()
+    number = 100
+    for source in airports:
+        for destination in airports:
+            if source is not destination:
+                number += 1
+                db.session.add(Flight(
+                    flight_number=f'AI{number}', source_id=source.id, destination_id=destination.id,
+                    duration=2.0, price=4500.0, delay_prob=0.1,
+                    departure_time='08:00', arrival_time='10:00', aircraft_type='A320'
+                ))
+    db.session.commit()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare srcdoc round-trip and direct map rendering")
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from models import db, Airport, Flight
+    from map_visualization import (
+        create_route_map, create_network_overview_map, create_multiple_routes_comparison, render_map_html
+    )
+
+    app = create_app('sqlite://')
+    with app.app_context():
+        seed(db, Airport, Flight)
+        routes = [
+            {'airports': ['DEL', 'BOM', 'BLR'], 'flights': ['AI101', 'AI112'], 'route_type': 'cost',
+             'total_cost': 9000, 'total_duration': 4.0},
+            {'airports': ['DEL', 'HYD', 'BLR'], 'flights': ['AI105', 'AI128'], 'route_type': 'time',
+             'total_cost': 9500, 'total_duration': 3.5},
+        ]
+        builders = {
+            'route': lambda: create_route_map(['DEL', 'BOM', 'BLR', 'MAA'], ['AI101', 'AI112', 'AI113'], 'cost'),
+            'network': create_network_overview_map,
+            'comparison': lambda: create_multiple_routes_comparison(routes),
+        }
+
+        print(f"🗺️  {args.repeat} renders per map")
+        print(f"   {'map':<12}{'path':<9}{'p50 ms':>10}{'p95 ms':>10}{'KB':>8}{'speedup':>9}")
+        for name, build in builders.items():
+            paths = {'srcdoc': legacy_render, 'direct': render_map_html}
+            latencies = {path: [] for path in paths}
+            documents = {}
+            # Alternate the paths so warm-up and GC pauses hit both alike
+            for _ in range(args.repeat):
+                for path, render in paths.items():
+                    map_viz = build()
+                    start = time.perf_counter()
+                    documents[path] = render(map_viz)
+                    latencies[path].append((time.perf_counter() - start) * 1000)
+            results = {path: (latency_summary(latencies[path]), documents[path]) for path in paths}
+            (legacy, legacy_html), (direct, direct_html) = results['srcdoc'], results['direct']
+            if normalized(legacy_html) != normalized(direct_html):
+                print(f"❌ {name}: rendered documents differ")
+                return 1
+            print(f"   {name:<12}{'srcdoc':<9}{legacy['p50_ms']:>10.2f}{legacy['p95_ms']:>10.2f}"
+                  f"{len(legacy_html) / 1024:>8.0f}")
+            print(f"   {name:<12}{'direct':<9}{direct['p50_ms']:>10.2f}{direct['p95_ms']:>10.2f}"
+                  f"{len(direct_html) / 1024:>8.0f}{legacy['p50_ms'] / direct['p50_ms']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
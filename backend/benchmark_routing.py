@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Routing engine benchmark suite.
+
+Runs every registered engine over randomized origin/destination workloads on
+small, medium and large synthetic networks and reports p50/p95/p99 latency,
+settled nodes and peak memory. Results are written as JSON; when a baseline
+result file is given, the run fails if any metric regresses past its threshold.
+
+    python benchmark_routing.py --sizes small medium --output bench.json
+    python benchmark_routing.py --baseline bench.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+from flight_network import FlightNetwork, SearchStats
+from synthetic_network import SyntheticNetworkGenerator
+
+# name -> (airports, flights)
+GRAPH_SIZES = {
+    'small': (100, 1000),
+    'medium': (1000, 20000),
+    'large': (5000, 150000),
+}
+
+# Engines take (network, source, destination, stats) and return anything truthy on success
+ENGINES: Dict[str, Callable[[FlightNetwork, str, str, SearchStats], object]] = {
+    'dijkstra': lambda net, s, d, stats: net.dijkstra_shortest_path(s, d, 'cost', stats),
+    'a_star': lambda net, s, d, stats: net.a_star_shortest_path(s, d, 'time', stats),
+    'multiple': lambda net, s, d, stats: net.find_multiple_routes(s, d, 3, stats),
+}
+
+# Allowed relative increase over the baseline before a metric counts as a regression
+DEFAULT_THRESHOLDS = {
+    'p50_ms': 0.25,
+    'p95_ms': 0.25,
+    'p99_ms': 0.50,
+    'mean_settled_nodes': 0.10,
+    'peak_memory_kb': 0.25,
+}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linearly interpolated percentile of values (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of a list of latencies in milliseconds"""
+    return {
+        'p50_ms': round(percentile(latencies_ms, 50), 4),
+        'p95_ms': round(percentile(latencies_ms, 95), 4),
+        'p99_ms': round(percentile(latencies_ms, 99), 4),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 4) if latencies_ms else 0.0,
+        'max_ms': round(max(latencies_ms), 4) if latencies_ms else 0.0,
+    }
+
+
+def make_workload(airport_codes: List[str], queries: int, seed: int) -> List[tuple]:
+    """Random origin/destination pairs"""
+    rng = random.Random(seed)
+    return [tuple(rng.sample(airport_codes, 2)) for _ in range(queries)]
+
+
+def run_engine(network: FlightNetwork, engine: Callable, workload: List[tuple],
+               memory_samples: int) -> Dict:
+    """Time an engine over a workload, then measure peak memory on a sample of it"""
+    # Warm up caches and the allocator so the first queries don't skew the tail
+    for source, destination in workload[:10]:
+        engine(network, source, destination, SearchStats())
+
+    latencies = []
+    settled = []
+    found = 0
+    for source, destination in workload:
+        stats = SearchStats()
+        start = time.perf_counter()
+        result = engine(network, source, destination, stats)
+        latencies.append((time.perf_counter() - start) * 1000)
+        settled.append(stats.settled_nodes)
+        found += bool(result)
+
+    # tracemalloc slows allocation down, so memory is measured in a separate pass
+    peak = 0
+    tracemalloc.start()
+    try:
+        for source, destination in workload[:memory_samples]:
+            tracemalloc.reset_peak()
+            engine(network, source, destination, SearchStats())
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    summary = latency_summary(latencies)
+    summary.update({
+        'queries': len(workload),
+        'routes_found': found,
+        'mean_settled_nodes': round(sum(settled) / len(settled), 2) if settled else 0.0,
+        'max_settled_nodes': max(settled) if settled else 0,
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+    return summary
+
+
+def run_benchmarks(sizes: List[str], engines: List[str], queries: int, topology: str,
+                   seed: int, memory_samples: int) -> Dict:
+    """Run every engine on every graph size and collect the results"""
+    results = {}
+    for size in sizes:
+        num_airports, num_flights = GRAPH_SIZES[size]
+        generator = SyntheticNetworkGenerator(num_airports, num_flights, topology, seed=seed)
+
+        build_start = time.perf_counter()
+        network = generator.load_into_network()
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        codes = [a['code'] for a in generator.airports()]
+        workload = make_workload(codes, queries, seed)
+
+        print(f"\n📊 {size}: {num_airports} airports, {num_flights} flights "
+              f"(built in {build_ms:.0f} ms)")
+        results[size] = {'airports': num_airports, 'flights': num_flights, 'engines': {}}
+        for name in engines:
+            summary = run_engine(network, ENGINES[name], workload, memory_samples)
+            results[size]['engines'][name] = summary
+            print(f"   {name:<10} p50 {summary['p50_ms']:>9.3f} ms   p95 {summary['p95_ms']:>9.3f} ms   "
+                  f"p99 {summary['p99_ms']:>9.3f} ms   settled {summary['mean_settled_nodes']:>9.1f}   "
+                  f"peak {summary['peak_memory_kb']:>9.1f} KB")
+    return results
+
+
+def find_regressions(results: Dict, baseline: Dict, thresholds: Dict[str, float]) -> List[str]:
+    """Metrics that grew past their threshold relative to the baseline run"""
+    regressions = []
+    for size, graph in results.items():
+        base_graph = baseline.get(size)
+        if not base_graph:
+            continue
+        for engine, summary in graph['engines'].items():
+            base_summary = base_graph['engines'].get(engine)
+            if not base_summary:
+                continue
+            for metric, allowed in thresholds.items():
+                old, new = base_summary.get(metric), summary.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if change > allowed:
+                    regressions.append(
+                        f"{size}/{engine}/{metric}: {old} -> {new} "
+                        f"(+{change:.0%}, allowed +{allowed:.0%})"
+                    )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the routing engines")
+    parser.add_argument('--sizes', nargs='+', choices=list(GRAPH_SIZES), default=['small', 'medium'])
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--queries', type=int, default=200, help="OD pairs per graph")
+    parser.add_argument('--topology', choices=('hub_spoke', 'geometric'), default='hub_spoke')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--memory-samples', type=int, default=20,
+                        help="Queries re-run under tracemalloc for peak memory")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Previous result file to check for regressions")
+    parser.add_argument('--thresholds',
+                        help="JSON file of metric -> allowed relative increase, e.g. {\"p95_ms\": 0.2}")
+    args = parser.parse_args(argv)
+
+    # Read the baseline before anything is written: --output may name the same file
+    baseline = None
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if args.thresholds:
+            with open(args.thresholds) as f:
+                thresholds.update(json.load(f))
+
+    results = run_benchmarks(args.sizes, args.engines, args.queries, args.topology,
+                             args.seed, args.memory_samples)
+
+    report = {
+        'generated_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'config': {
+            'queries': args.queries,
+            'topology': args.topology,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if baseline is None:
+        return 0
+
+    regressions = find_regressions(results, baseline, thresholds)
+    if regressions:
+        print("\n❌ Performance regressions detected:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
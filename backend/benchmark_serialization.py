@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Response serialization micro-benchmark.
+
+Serializes the /flights/ listing and a page of saved routes from a synthetic
+network two ways: dicts assembled field by field and encoded by Flask's
+stdlib JSON provider (the original routers), and the compiled serializers
+encoded by the orjson provider. Rows are loaded once, so only the
+row-to-dict and encoding costs are timed:
+
+    python benchmark_serialization.py --flights 5000 --repeat 30
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmark_routing import latency_summary
+from synthetic_network import SyntheticNetworkGenerator
+
+
+def flight_dict_by_hand(f):
+    return {
+        "id": f.id,
+        "flight_number": f.flight_number,
+        "source": {"code": f.source.code, "name": f.source.name, "city": f.source.city},
+        "destination": {"code": f.destination.code, "name": f.destination.name, "city": f.destination.city},
+        "duration": f.duration,
+        "price": f.price,
+        "delay_prob": f.delay_prob,
+        "departure_time": f.departure_time,
+        "arrival_time": f.arrival_time,
+        "aircraft_type": f.aircraft_type,
+        "max_capacity": f.max_capacity,
+        "current_bookings": f.seats_booked,
+    }
+
+
+def route_dict_by_hand(route):
+    return {
+        "id": route.id,
+        "source": route.source_airport_code,
+        "destination": route.destination_airport_code,
+        "route_type": route.route_type,
+        "total_cost": route.total_cost,
+        "total_duration": route.total_duration,
+        "delay_probability": route.total_delay_prob,
+        "airports": json.loads(route.airports_sequence),
+        "flights": json.loads(route.flights_sequence),
+        "created_at": route.created_at.isoformat(),
+    }
+
+
+def time_payload(app, provider, build, repeat):
+    latencies = []
+    with app.test_request_context():
+        body = provider.response(build()).get_data()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            provider.response(build()).get_data()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, body
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare stdlib and orjson response serialization")
+    parser.add_argument('--airports', type=int, default=100)
+    parser.add_argument('--flights', type=int, default=5000)
+    parser.add_argument('--routes', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from models import db, Flight, Route as RouteModel
+    from route_writer import get_writer, route_record
+    from flight_network import FlightNetwork
+    from serialization import OrjsonProvider, orjson, serialize_flight, serialize_route
+
+    if orjson is None:
+        print("⚠️ orjson is not installed; nothing to compare against")
+        return 1
+
+    app = create_app('sqlite://')
+    generator = SyntheticNetworkGenerator(args.airports, args.flights, 'hub_spoke', seed=args.seed)
+    with app.app_context():
+        generator.write_to_db()
+        network = generator.load_into_network(FlightNetwork())
+        codes = [a['code'] for a in generator.airports()]
+        writer = get_writer()
+        for i in range(args.routes):
+            route = network.dijkstra_shortest_path(codes[i % len(codes)], codes[(i * 7 + 1) % len(codes)], 'cost')
+            if route:
+                writer.submit([route_record(route.airports[0], route.airports[-1], route)])
+        writer.close()
+        flights = Flight.query.options(db.joinedload(Flight.source), db.joinedload(Flight.destination)).all()
+        routes = RouteModel.query.all()
+
+        stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+        payloads = {
+            'flights': (lambda: [flight_dict_by_hand(f) for f in flights],
+                        lambda: [serialize_flight(f) for f in flights]),
+            'saved-routes': (lambda: {"routes": [route_dict_by_hand(r) for r in routes]},
+                             lambda: {"routes": [serialize_route(r) for r in routes]}),
+        }
+
+        print(f"🧪 {len(flights)} flights, {len(routes)} saved routes, {args.repeat} runs each")
+        print(f"   {'payload':<14}{'encoder':<10}{'p50 ms':>10}{'p95 ms':>10}{'KB':>9}{'speedup':>9}")
+        for name, (by_hand, compiled) in payloads.items():
+            baseline, baseline_body = time_payload(app, stdlib, by_hand, args.repeat)
+            optimized, optimized_body = time_payload(app, fast, compiled, args.repeat)
+            if json.loads(baseline_body) != json.loads(optimized_body):
+                print(f"❌ {name}: encoders disagree")
+                return 1
+            base, opt = latency_summary(baseline), latency_summary(optimized)
+            print(f"   {name:<14}{'stdlib':<10}{base['p50_ms']:>10.2f}{base['p95_ms']:>10.2f}"
+                  f"{len(baseline_body) / 1024:>9.0f}")
+            print(f"   {name:<14}{'orjson':<10}{opt['p50_ms']:>10.2f}{opt['p95_ms']:>10.2f}"
+                  f"{len(optimized_body) / 1024:>9.0f}{base['p50_ms'] / opt['p50_ms']:>8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
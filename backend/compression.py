@@ -0,0 +1,132 @@
+"""
+Gzip response compression negotiated through Accept-Encoding.
+
+Responses are compressed after the view runs when the client accepts gzip,
+the body is at least COMPRESS_MIN_SIZE bytes and the mimetype is textual
+(JSON, HTML, ...). Streamed responses are left alone. COMPRESS_LEVEL trades
+CPU for size (1 fastest .. 9 smallest).
+
+Cacheable bodies (responses carrying an ETag, and the HTML maps) are
+compressed once: the gzip bytes are kept in an LRU keyed by a digest of
+the uncompressed body, bounded to COMPRESS_CACHE_BYTES.
+
+A strong ETag promises byte-identical bodies, so a compressed response gets
+its own: the identity ETag plus GZIP_ETAG_SUFFIX. Weak ETags (data_version's)
+only promise equivalent content and are shared by both encodings.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import Flask, Response, current_app, request
+
+from metrics import phase_timer, registry
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/geo+json',
+    'application/javascript',
+    'image/svg+xml',
+}
+
+# Appended to the strong ETag of a gzip-encoded body
+GZIP_ETAG_SUFFIX = '-gzip'
+
+CACHE_METRIC = 'flightres_compression_cache_total'
+registry.describe(CACHE_METRIC, 'Compressed response cache lookups by result')
+
+
+class CompressedBodyCache:
+    """LRU of gzip bodies keyed by a digest of the uncompressed body, bounded by total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: bytes, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _compressible(response: Response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_MIMETYPES)
+    )
+
+
+def _cacheable(response: Response) -> bool:
+    return 'ETag' in response.headers or response.mimetype == 'text/html'
+
+
+def compress_response(response: Response) -> Response:
+    """Gzip response in place if the client and the payload allow it"""
+    if request.method == 'HEAD' or not _compressible(response):
+        return response
+    config = current_app.config
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    body = response.get_data()
+    if len(body) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    cache: CompressedBodyCache = current_app.extensions['compression']
+    key = None
+    compressed = None
+    if _cacheable(response):
+        key = hashlib.blake2b(body, digest_size=16).digest()
+        compressed = cache.get(key)
+        registry.increment(CACHE_METRIC, {'result': 'hit' if compressed is not None else 'miss'})
+    if compressed is None:
+        with phase_timer('compress'):
+            # mtime=0 keeps the output identical for identical bodies
+            compressed = gzip.compress(body, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+        if key is not None:
+            cache.put(key, compressed)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + GZIP_ETAG_SUFFIX)
+    return response
+
+
+def init_app(app: Flask) -> CompressedBodyCache:
+    """
+    Compress every response on its way out.
+
+    after_request hooks run in reverse order of registration, so calling this
+    after metrics.init_app makes the recorded request time include compression.
+    """
+    cache = CompressedBodyCache(app.config['COMPRESS_CACHE_BYTES'])
+    app.extensions['compression'] = cache
+    app.after_request(compress_response)
+    return cache
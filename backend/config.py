@@ -0,0 +1,95 @@
+"""
+Application configuration profiles.
+
+Select one with the FLIGHTRES_PROFILE environment variable or
+create_app(profile=...). 'development' keeps SQLite's defaults; 'production'
+tunes SQLite for concurrent readers and writers.
+"""
+
+import os
+
+DEFAULT_DATABASE_URI = 'sqlite:///database.db'
+
+
+class Config:
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    # PRAGMA name -> value, applied to every new SQLite connection
+    SQLITE_PRAGMAS = {}
+
+    # Run db.upgrade_schema() in create_app(); off so importing app never migrates a database
+    UPGRADE_SCHEMA_ON_START = os.environ.get('FLIGHTRES_UPGRADE_SCHEMA', '') == '1'
+
+    # Keyset pagination: default and maximum ?limit= for collection endpoints
+    API_PAGE_SIZE = 100
+    API_MAX_PAGE_SIZE = 1000
+
+    # Write-behind route persistence: flush after this many routes or seconds;
+    # a batch that fails to write is retried on this many later flushes
+    ROUTE_WRITER_BATCH_SIZE = 100
+    ROUTE_WRITER_FLUSH_INTERVAL = 2.0
+    ROUTE_WRITER_MAX_RETRIES = 5
+
+    # Requests reuse the flight graph until flights or airports are written, or
+    # for at most this many seconds (writes by other processes aren't seen)
+    NETWORK_MAX_AGE = 60.0
+
+    # Seconds between recounts of the cached /routes/network-stats counters
+    NETWORK_STATS_RECONCILE_INTERVAL = 60.0
+
+    # JSON encoder for responses: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+    JSON_BACKEND = os.environ.get('FLIGHTRES_JSON_BACKEND', 'auto')
+
+    # Gzip responses of at least COMPRESS_MIN_SIZE bytes at COMPRESS_LEVEL (1-9);
+    # compressed bodies of cacheable responses are kept up to COMPRESS_CACHE_BYTES
+    COMPRESS_LEVEL = 6
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_CACHE_BYTES = 32 * 1024 * 1024
+
+    # Rendered route maps kept in the map render cache
+    MAP_CACHE_SIZE = 128
+
+    # Background threads pre-rendering the maps of the MAP_PRERENDER_TOP_PAIRS most
+    # requested OD pairs (0 disables it); pairs are ranked by a sketch of
+    # MAP_PRERENDER_SKETCH_SIZE counters, and at most MAP_PRERENDER_MAX_PENDING renders queue
+    MAP_PRERENDER_WORKERS = 1
+    MAP_PRERENDER_TOP_PAIRS = 20
+    MAP_PRERENDER_SKETCH_SIZE = 256
+    MAP_PRERENDER_MAX_PENDING = 64
+
+
+class DevelopmentConfig(Config):
+    pass
+
+
+class ProductionConfig(Config):
+    SQLITE_PRAGMAS = {
+        # Wait up to 30s for locks instead of failing with "database is locked"
+        'busy_timeout': 30000,
+        # Readers no longer block on the writer saving routes
+        'journal_mode': 'WAL',
+        # Durable at checkpoints; safe with WAL and much cheaper per commit
+        'synchronous': 'NORMAL',
+        # 64 MB page cache per connection (negative means KiB)
+        'cache_size': -64000,
+        # Serve read-heavy endpoints straight from the page cache mapping
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+    # Only applied to file databases; in-memory SQLite uses a single static connection
+    SQLALCHEMY_POOL_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'connect_args': {'check_same_thread': False},
+    }
+
+
+PROFILES = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
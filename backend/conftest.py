@@ -0,0 +1,65 @@
+"""
+Shared pytest fixtures: apps on a fresh in-memory database, optionally filled
+with a synthetic hub-and-spoke network.
+"""
+
+import pytest
+
+from app import close_app, create_app
+from flight_network import flight_network
+from models import db, Airport
+from synthetic_network import SyntheticNetworkGenerator
+
+
+@pytest.fixture
+def make_app():
+    """
+    Factory for test apps: make_app(num_airports, num_flights, seed=...) fills
+    the database with SyntheticNetworkGenerator; num_airports=0 leaves it empty
+    (schema only). build_network=True also builds the global flight_network.
+    When the test ends the apps' background workers are closed and their
+    engines disposed.
+    """
+    apps = []
+
+    def _make_app(num_airports=20, num_flights=200, seed=11, database_uri='sqlite://', profile=None,
+                  build_network=False):
+        app = create_app(database_uri, profile)
+        apps.append(app)
+        with app.app_context():
+            db.create_all()
+            if num_airports:
+                SyntheticNetworkGenerator(num_airports, num_flights, 'hub_spoke', seed=seed).write_to_db()
+            if build_network:
+                flight_network.build_network()
+        return app
+
+    yield _make_app
+    for app in apps:
+        close_app(app)
+
+
+@pytest.fixture
+def temp_database_uri(tmp_path):
+    """URI of a SQLite file database for tests that need more than one connection"""
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def airport_codes():
+    """airport_codes(app): airport codes in id order (the generator's order for synthetic networks)"""
+    def _airport_codes(app):
+        with app.app_context():
+            return [code for (code,) in Airport.query.order_by(Airport.id).with_entities(Airport.code)]
+
+    return _airport_codes
+
+
+@pytest.fixture(autouse=True)
+def reset_flight_network():
+    """The global flight_network outlives every app; don't carry disruptions between tests"""
+    flight_network.delayed_flights.clear()
+    flight_network.cancelled_flights.clear()
+    yield
+    flight_network.delayed_flights.clear()
+    flight_network.cancelled_flights.clear()
@@ -0,0 +1,195 @@
+"""
+Per-table data versions, ETags and a per-version response cache.
+
+Every INSERT, UPDATE or DELETE that reaches the engine marks its table as
+dirty on the connection. When the transaction commits, its dirty tables are
+handed to the committing thread, and their versions are bumped by the
+session's after_commit hook, i.e. only once the commit has landed, so no
+request can pair a new version with old data. Rollbacks are discarded. An
+endpoint that depends on a few tables derives its ETag from their versions,
+so
+
+    return cached_json('airports', ['airport'], build_airports_response)
+
+answers If-None-Match with 304 and serves unchanged data from the cached
+body, both without touching the database. Versions are per process; the
+ETag includes a per-process token so two workers never hand out matching
+ETags for different data. Only writes made through this process's engine
+are seen: rows changed by another process or a seed script keep being
+served from the cached bodies until this process writes the table itself.
+"""
+
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Sequence, Tuple
+
+from flask import Flask, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import TextClause
+
+PENDING_KEY = 'data_version_dirty_tables'
+
+# DataVersions -> tables committed on this thread, bumped once the commit has landed
+_committed = threading.local()
+
+# Distinct (endpoint, query string) payloads kept
+RESPONSE_CACHE_SIZE = 256
+
+_WRITE_SQL = re.compile(r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE)
+
+
+def _written_table(statement):
+    """Name of the table an INSERT/UPDATE/DELETE writes to, or None"""
+    table = getattr(statement, 'table', None)
+    if getattr(statement, 'is_dml', False) and table is not None:
+        return table.name
+    if isinstance(statement, TextClause):
+        match = _WRITE_SQL.match(statement.text)
+        return match.group(1) if match else None
+    return None
+
+
+class DataVersions:
+    """Monotonic version per table, bumped when a write to it commits"""
+
+    def __init__(self):
+        self.token = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._responses: 'OrderedDict[Tuple, Tuple[Tuple[int, ...], bytes, Dict]]' = OrderedDict()
+
+    def get(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def etag(self, name: str, versions: Tuple[int, ...]) -> str:
+        return f"{name}-{self.token}-{'.'.join(map(str, versions))}"
+
+    def cached_response(self, key: Tuple, versions: Tuple[int, ...]):
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None or entry[0] != versions:
+                return None
+            self._responses.move_to_end(key)
+            return entry
+
+    def store_response(self, key: Tuple, versions: Tuple[int, ...], body: bytes, headers: Dict):
+        with self._lock:
+            self._responses[key] = (versions, body, headers)
+            self._responses.move_to_end(key)
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+
+    def watch(self, engine):
+        """Track committed writes on engine"""
+
+        @event.listens_for(engine, 'after_execute')
+        def _mark_dirty(conn, clauseelement, multiparams, params, execution_options, result):
+            table = _written_table(clauseelement)
+            if table:
+                conn.info.setdefault(PENDING_KEY, set()).add(table)
+
+        # The engine's commit event fires before the DBAPI commit, so only
+        # hand the tables over; _bump_after_commit bumps them afterwards
+        @event.listens_for(engine, 'commit')
+        def _stage_committed(conn):
+            tables = conn.info.pop(PENDING_KEY, None)
+            if tables:
+                _staged().setdefault(self, set()).update(tables)
+
+        @event.listens_for(engine, 'rollback')
+        def _discard(conn):
+            conn.info.pop(PENDING_KEY, None)
+
+
+def _staged() -> Dict[DataVersions, set]:
+    if not hasattr(_committed, 'tables'):
+        _committed.tables = {}
+    return _committed.tables
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_commit(session):
+    staged = _staged()
+    while staged:
+        versions, tables = staged.popitem()
+        versions.bump(tables)
+
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag, weak=True)
+    # Let browsers keep the body but revalidate it on every use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def cached_json(name: str, tables: Sequence[str], build: Callable[[], Response],
+                extra: Tuple[int, ...] = ()) -> Response:
+    """
+    Conditional GET for a response that only depends on tables.
+
+    build() runs only when the versions of tables (plus any extra version
+    numbers, e.g. FlightNetwork.version) changed since the cached body for
+    this URL was made; non-200 and streamed responses are not cached.
+    """
+    versions_store = get_versions()
+    # Read versions before building: a write racing the build leaves a stale
+    # body under the old version, which the next request simply replaces
+    versions = versions_store.get(tables) + tuple(extra)
+    etag = versions_store.etag(name, versions)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    key = (name, request.query_string)
+    cached = versions_store.cached_response(key, versions)
+    if cached is not None:
+        _, body, headers = cached
+        return _with_etag(Response(body, headers=headers), etag)
+
+    response = build()
+    if isinstance(response, tuple):
+        response = current_app.make_response(response)
+    if response.status_code == 200 and not response.is_streamed:
+        headers = {header: value for header, value in response.headers.items() if header != 'Content-Length'}
+        versions_store.store_response(key, versions, response.get_data(), headers)
+        return _with_etag(response, etag)
+    return response
+
+
+def content_etag(name: str, payload: Dict) -> Response:
+    """
+    Conditional GET for a payload that is cheap to compute but has no table
+    version (e.g. in-memory counters): the ETag is a hash of the JSON itself.
+    """
+    response = current_app.json.response(payload)
+    etag = f"{name}-{hashlib.sha1(response.get_data()).hexdigest()[:16]}"
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+    return _with_etag(response, etag)
+
+
+def init_app(app: Flask, engine) -> DataVersions:
+    versions = DataVersions()
+    versions.watch(engine)
+    app.extensions['data_version'] = versions
+    return versions
+
+
+def get_versions() -> DataVersions:
+    """The data versions of the current app"""
+    return current_app.extensions['data_version']
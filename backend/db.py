@@ -0,0 +1,123 @@
+"""
+Database maintenance: schema upgrades and SQLite connection tuning.
+
+db.create_all() only creates missing tables, so databases created before a
+column or index was added to models.py never get it. upgrade_schema() brings
+an existing database (e.g. instance/database.db) up to date, backfills derived
+columns and route segments, and is safe to run repeatedly. 'python app.py'
+runs it before serving, create_app() runs it when UPGRADE_SCHEMA_ON_START is
+set, and it can be run by hand:
+
+    python db.py
+"""
+
+import json
+
+from sqlalchemy import event, inspect, text
+
+from models import db, Route, RouteSegment
+
+
+def _add_missing_columns(inspector):
+    """
+    ALTER TABLE ... ADD COLUMN for model columns the database lacks.
+    Columns must be nullable or have a server_default for existing rows.
+    """
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}'
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += ' NOT NULL'
+            with db.engine.begin() as connection:
+                connection.execute(text(ddl))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def _backfill_seats_booked():
+    """Initialise flight.seats_booked from the bookings made before the counter existed"""
+    db.session.execute(text(
+        "UPDATE flight SET seats_booked = (SELECT count(*) FROM booking"
+        " WHERE booking.flight_id = flight.id AND booking.status != 'cancelled')"
+    ))
+    db.session.commit()
+
+
+def _backfill_route_hashes():
+    """Compute content_hash for routes saved before it existed"""
+    from route_writer import route_content_hash
+
+    routes = Route.query.filter(Route.content_hash.is_(None)).all()
+    for route in routes:
+        route.content_hash = route_content_hash(json.loads(route.airports_sequence or '[]'),
+                                                json.loads(route.flights_sequence or '[]'))
+    db.session.commit()
+    return len(routes)
+
+
+def _backfill_route_segments():
+    """Write route_segment rows for saved routes that have none"""
+    from route_writer import flight_ids_for, segment_records
+
+    routes = Route.query.filter(~Route.segments.any()).all()
+    legs = [json.loads(route.flights_sequence or '[]') for route in routes]
+    flight_ids = flight_ids_for(number for flights in legs for number in flights)
+    segments = []
+    for route, flights in zip(routes, legs):
+        segments.extend(segment_records(route.id, json.loads(route.airports_sequence or '[]'),
+                                        flights, flight_ids))
+    if segments:
+        db.session.execute(RouteSegment.__table__.insert(), segments)
+    db.session.commit()
+    return len(routes)
+
+
+def upgrade_schema():
+    """
+    Create any tables, columns and indexes declared in models.py that the
+    database lacks. Returns what was created: index names and table.column.
+    """
+    db.create_all()
+    inspector = inspect(db.engine)
+    created = _add_missing_columns(inspector)
+    if 'flight.seats_booked' in created:
+        _backfill_seats_booked()
+    _backfill_route_hashes()
+    _backfill_route_segments()
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the given PRAGMAs on every new connection of a SQLite engine"""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        created = upgrade_schema()
+    if created:
+        print(f"✅ Created: {', '.join(created)}")
+    else:
+        print("✅ Schema already up to date")
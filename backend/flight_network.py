@@ -1,10 +1,15 @@
 import heapq
-import math
 import random
-from typing import Dict, List, Tuple, Optional, Set
-from dataclasses import dataclass
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, Set
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
-from models import Flight, Airport, db
+from models import Flight, db
+from metrics import phase_timer
+from airport_registry import AirportRegistry, get_registry
+from data_version import get_versions
 
 
 @dataclass
@@ -16,6 +21,37 @@ class Route:
     total_duration: float
     total_delay_prob: float
     route_type: str  # 'cost', 'time', 'reliability'
+    
+    def to_dict(self) -> Dict:
+        """The route as /routes/find returns it"""
+        return {
+            "route_type": self.route_type,
+            "airports": self.airports,
+            "flights": self.flights,
+            "total_cost": round(self.total_cost, 2),
+            "total_duration": round(self.total_duration, 2),
+            "average_delay_probability": round(self.total_delay_prob, 3),
+            "stops": len(self.airports) - 2  # Excluding source and destination
+        }
+
+
+@dataclass
+class SearchStats:
+    """Work done by a route search, filled in when passed to a search method"""
+    heap_pushes: int = 0
+    heap_pops: int = 0
+    settled_nodes: int = 0
+    relaxations: int = 0
+    wall_time_ms: float = 0.0
+    
+    def to_dict(self) -> Dict:
+        return {
+            'heap_pushes': self.heap_pushes,
+            'heap_pops': self.heap_pops,
+            'settled_nodes': self.settled_nodes,
+            'relaxations': self.relaxations,
+            'wall_time_ms': round(self.wall_time_ms, 4)
+        }
 
 
 @dataclass
@@ -27,42 +63,151 @@ class FlightEdge:
     duration: float
     delay_prob: float
     distance: float  # for A* heuristic
+    index: int = -1  # slot in FlightNetwork.remaining_seats
+
+
+# Seats assumed for in-memory flights that don't say (Flight.max_capacity default)
+DEFAULT_CAPACITY = 180
+
+# Tables the graph is built from
+NETWORK_TABLES = ('flight', 'airport')
+
+
+def _network_tables_version() -> Tuple:
+    """Versions of the tables the graph is built from, tagged with the app's version token"""
+    versions = get_versions()
+    return (versions.token, versions.get(NETWORK_TABLES))
 
 
 class FlightNetwork:
     """Graph-based flight network for route optimization"""
     
     def __init__(self):
-        self.graph: Dict[str, List[FlightEdge]] = {}
+        # (adjacency lists, remaining seats per edge index), replaced as one unit on rebuild
+        self._snapshot: Tuple[Dict[str, List[FlightEdge]], array] = ({}, array('i'))
         self.airports: Dict[str, Dict] = {}
+        # Coordinates and distances of the airports in the graph
+        self.registry = AirportRegistry([])
+        self.edge_index: Dict[str, int] = {}  # flight_number -> edge index
         self.delayed_flights: Set[str] = set()
         self.cancelled_flights: Set[str] = set()
+        # Running edge aggregates for get_network_statistics: (edge count, sum of delay_prob)
+        self._edge_totals: Tuple[int, float] = (0, 0.0)
+        # Guards in-place updates (seats, single-edge changes) against a concurrent swap
+        self._lock = threading.Lock()
+        # Bumped whenever edges or airports change (seat counts don't count), so
+        # derived data such as GeoJSON can be cached per graph version
+        self.version = 0
+        # Bumped on every install of a new seat array, rebuilt from the database
+        # or not, so seat deltas can tell which array they were computed against
+        self.seats_version = 0
+        # Table versions and time.monotonic() of the last build from the database
+        self.built_from: Optional[Tuple] = None
+        self.built_at = 0.0
+    
+    @property
+    def graph(self) -> Dict[str, List[FlightEdge]]:
+        return self._snapshot[0]
+    
+    @property
+    def remaining_seats(self) -> array:
+        """Unbooked seats per edge, indexed by FlightEdge.index"""
+        return self._snapshot[1]
+    
+    def _install(self, graph: Dict[str, List[FlightEdge]], registry: AirportRegistry,
+                 seats: array, edge_index: Dict[str, int], built_from: Optional[Tuple] = None,
+                 built_at: float = 0.0):
+        # Swap in a freshly built network so concurrent requests never search a half-built graph
+        airports = {code: registry.info(code) for code in registry.codes}
+        edge_count = sum(len(edges) for edges in graph.values())
+        delay_prob_sum = sum(edge.delay_prob for edges in graph.values() for edge in edges)
+        # Rebuilding from unchanged data (e.g. every /routes/find) keeps the version
+        changed = graph != self.graph or airports != self.airports
+        with self._lock:
+            if changed:
+                self.version += 1
+            self._snapshot = (graph, seats)
+            self.seats_version += 1
+            self.airports = airports
+            self.registry = registry
+            self.edge_index = edge_index
+            self._edge_totals = (edge_count, delay_prob_sum)
+            self.built_from, self.built_at = built_from, built_at
+    
+    def adjust_remaining_seats(self, flight_number: str, delta: int, seats_version: Optional[int] = None):
+        """
+        Apply a booking (negative delta) or cancellation (positive delta) to
+        the live seat array without rebuilding the network.
+
+        seats_version is the seats_version read before the change was written
+        to the database. If the seat array has been replaced since, the
+        rebuild may already have read the change from the database, so the
+        delta is dropped rather than counted twice; a rebuild that read just
+        before the commit misses it until the next rebuild. Without
+        seats_version (in-memory networks) the delta is always applied.
+        """
+        with self._lock:
+            if seats_version is not None and seats_version != self.seats_version:
+                return
+            index = self.edge_index.get(flight_number)
+            if index is None:
+                return
+            seats = self.remaining_seats
+            seats[index] = max(seats[index] + delta, 0)
+    
+    def seats_written(self, built_from: Optional[Tuple]):
+        """
+        Keep the graph current across a transaction that only moved
+        seats_booked, with its deltas already applied by adjust_remaining_seats.
+
+        built_from is the built_from read before the transaction. If the graph
+        was current then and the transaction is the only flight write since,
+        the seat array already reflects it and the next request needn't
+        rebuild; any other write leaves the graph stale as usual.
+        """
+        if built_from is None:
+            return
+        token, (flights, airports) = built_from
+        after = (token, (flights + 1, airports))
+        with self._lock:
+            if self.built_from == built_from and _network_tables_version() == after:
+                self.built_from = after
         
     def build_network(self):
         """Build the flight network graph from database"""
-        self.graph.clear()
-        self.airports.clear()
+        with phase_timer('build_network'):
+            self._build_network_from_db()
+    
+    def build_network_if_stale(self, max_age: float):
+        """
+        Rebuild from the database if this process wrote flights or airports
+        since the last build, or that build is older than max_age seconds
+        (writes from other processes aren't versioned)
+        """
+        if self.built_from != _network_tables_version() or time.monotonic() - self.built_at > max_age:
+            self.build_network()
+    
+    def _build_network_from_db(self):
+        # Read before the flights, so a write committed during the build triggers another one
+        built_from, built_at = _network_tables_version(), time.monotonic()
+        graph: Dict[str, List[FlightEdge]] = {}
+        seats = array('i')
+        edge_index: Dict[str, int] = {}
         
-        # Load airports
-        airports = Airport.query.all()
-        for airport in airports:
-            self.airports[airport.code] = {
-                'name': airport.name,
-                'city': airport.city,
-                'lat': self._get_mock_coordinates(airport.code)[0],
-                'lon': self._get_mock_coordinates(airport.code)[1]
-            }
-            self.graph[airport.code] = []
+        # Airports come from the registry, which is only reloaded when the table changes
+        registry = get_registry()
+        for code in registry.codes:
+            graph[code] = []
         
         # Load flights as edges
         flights = Flight.query.all()
         for flight in flights:
             if flight.flight_number not in self.cancelled_flights:
-                source_code = flight.source.code
-                dest_code = flight.destination.code
+                source_code = registry.code_of(flight.source_id)
+                dest_code = registry.code_of(flight.destination_id)
                 
                 # Calculate distance for A* heuristic
-                distance = self._calculate_distance(source_code, dest_code)
+                distance = registry.distance(source_code, dest_code)
                 
                 # Adjust delay probability if flight is known to be delayed
                 delay_prob = flight.delay_prob
@@ -75,53 +220,82 @@ class FlightNetwork:
                     cost=flight.price,
                     duration=flight.duration,
                     delay_prob=delay_prob,
-                    distance=distance
+                    distance=distance,
+                    index=len(seats)
                 )
                 
-                self.graph[source_code].append(edge)
+                graph[source_code].append(edge)
+                edge_index[flight.flight_number] = edge.index
+                seats.append(max((flight.max_capacity or 0) - (flight.seats_booked or 0), 0))
+        
+        self._install(graph, registry, seats, edge_index, built_from, built_at)
     
-    def _get_mock_coordinates(self, airport_code: str) -> Tuple[float, float]:
-        """Mock coordinates for airports (in a real system, these would be in the database)"""
-        coords = {
-            'DEL': (28.5562, 77.1000),  # Delhi
-            'BOM': (19.0896, 72.8656),  # Mumbai
-            'BLR': (12.9716, 77.5946),  # Bangalore
-            'MAA': (12.9941, 80.1709),  # Chennai
-            'CCU': (22.6549, 88.4462),  # Kolkata
-            'HYD': (17.2403, 78.4294),  # Hyderabad
-        }
-        return coords.get(airport_code, (0.0, 0.0))
+    def load_network(self, airports: Iterable[Dict], flights: Iterable[Dict]):
+        """
+        Build the flight network graph from in-memory records instead of the database.
+
+        airports: dicts with code, name, city, latitude and longitude
+        flights: dicts with flight_number, source, destination (airport codes),
+                 price, duration and delay_prob; optionally max_capacity and seats_booked
+        """
+        graph: Dict[str, List[FlightEdge]] = {}
+        seats = array('i')
+        edge_index: Dict[str, int] = {}
+        
+        registry = AirportRegistry(airports)
+        for code in registry.codes:
+            graph[code] = []
+        
+        for flight in flights:
+            if flight['flight_number'] in self.cancelled_flights:
+                continue
+            
+            delay_prob = flight['delay_prob']
+            if flight['flight_number'] in self.delayed_flights:
+                delay_prob = min(1.0, delay_prob * 2)
+            
+            edge = FlightEdge(
+                flight_number=flight['flight_number'],
+                destination=flight['destination'],
+                cost=flight['price'],
+                duration=flight['duration'],
+                delay_prob=delay_prob,
+                distance=registry.distance(flight['source'], flight['destination']),
+                index=len(seats)
+            )
+            
+            graph[flight['source']].append(edge)
+            edge_index[flight['flight_number']] = edge.index
+            seats.append(max(flight.get('max_capacity', DEFAULT_CAPACITY) - flight.get('seats_booked', 0), 0))
+        
+        self._install(graph, registry, seats, edge_index)
     
     def _calculate_distance(self, source: str, destination: str) -> float:
         """Calculate great circle distance between two airports"""
-        lat1, lon1 = self._get_mock_coordinates(source)
-        lat2, lon2 = self._get_mock_coordinates(destination)
-        
-        # Haversine formula
-        R = 6371  # Earth's radius in km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlon/2) * math.sin(dlon/2))
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
+        return self.registry.distance(source, destination)
     
     def dijkstra_shortest_path(self, source: str, destination: str, 
-                              optimization: str = 'cost') -> Optional[Route]:
+                              optimization: str = 'cost',
+                              stats: Optional[SearchStats] = None,
+                              min_seats: int = 0) -> Optional[Route]:
         """
         Find shortest path using Dijkstra's algorithm
         optimization: 'cost', 'time', or 'reliability'
+        min_seats: only use flights with at least this many unbooked seats
         """
-        if source not in self.graph or destination not in self.graph:
+        started = time.perf_counter()
+        graph, seats = self._snapshot  # keep one snapshot even if the network is rebuilt meanwhile
+        if source not in graph or destination not in graph:
             return None
         
         # Priority queue: (cost, current_airport, path, flights, total_duration, total_delay_prob)
         pq = [(0, source, [source], [], 0, 0)]
         visited = set()
+        pushes, pops, relaxations = 1, 0, 0
         
         while pq:
             current_cost, current_airport, path, flights, total_duration, total_delay_prob = heapq.heappop(pq)
+            pops += 1
             
             if current_airport in visited:
                 continue
@@ -129,6 +303,7 @@ class FlightNetwork:
             visited.add(current_airport)
             
             if current_airport == destination:
+                self._record_search_stats(stats, started, pushes, pops, len(visited), relaxations)
                 return Route(
                     airports=path,
                     flights=flights,
@@ -138,8 +313,9 @@ class FlightNetwork:
                     route_type=optimization
                 )
             
-            for edge in self.graph[current_airport]:
-                if edge.destination not in visited:
+            for edge in graph[current_airport]:
+                if edge.destination not in visited and seats[edge.index] >= min_seats:
+                    relaxations += 1
                     # Calculate cost based on optimization criteria
                     if optimization == 'cost':
                         edge_cost = edge.cost
@@ -159,26 +335,38 @@ class FlightNetwork:
                     
                     heapq.heappush(pq, (new_cost, edge.destination, new_path, 
                                       new_flights, new_duration, new_delay_prob))
+                    pushes += 1
         
+        self._record_search_stats(stats, started, pushes, pops, len(visited), relaxations)
         return None
     
     def a_star_shortest_path(self, source: str, destination: str, 
-                           optimization: str = 'cost') -> Optional[Route]:
+                           optimization: str = 'cost',
+                           stats: Optional[SearchStats] = None,
+                           min_seats: int = 0) -> Optional[Route]:
         """
         Find shortest path using A* algorithm with heuristic
+        min_seats: only use flights with at least this many unbooked seats
         """
-        if source not in self.graph or destination not in self.graph:
+        started = time.perf_counter()
+        graph, seats = self._snapshot  # keep one snapshot even if the network is rebuilt meanwhile
+        if source not in graph or destination not in graph:
             return None
         
+        # One row of the distance matrix serves every heuristic call of this search
+        registry = self.registry
+        distances = registry.distances_to(destination)
+        airport_index = registry.index
+        
         def heuristic(airport: str) -> float:
             """Heuristic function for A*"""
+            i = airport_index.get(airport)
+            distance = distances[i] if distances is not None and i is not None else 0.0
             if optimization == 'cost':
                 # Estimate minimum cost based on distance
-                distance = self._calculate_distance(airport, destination)
                 return distance * 0.5  # Rough cost per km
             elif optimization == 'time':
                 # Estimate minimum time based on distance
-                distance = self._calculate_distance(airport, destination)
                 return distance / 500  # Rough speed of 500 km/h
             else:
                 return 0  # For reliability, no good heuristic
@@ -187,9 +375,11 @@ class FlightNetwork:
         pq = [(heuristic(source), source, [source], [], 0, 0, 0)]
         visited = set()
         g_scores = {source: 0}
+        pushes, pops, relaxations = 1, 0, 0
         
         while pq:
             f_score, current_airport, path, flights, g_score, total_duration, total_delay_prob = heapq.heappop(pq)
+            pops += 1
             
             if current_airport in visited:
                 continue
@@ -197,6 +387,7 @@ class FlightNetwork:
             visited.add(current_airport)
             
             if current_airport == destination:
+                self._record_search_stats(stats, started, pushes, pops, len(visited), relaxations)
                 return Route(
                     airports=path,
                     flights=flights,
@@ -206,8 +397,9 @@ class FlightNetwork:
                     route_type=f"a_star_{optimization}"
                 )
             
-            for edge in self.graph[current_airport]:
-                if edge.destination not in visited:
+            for edge in graph[current_airport]:
+                if edge.destination not in visited and seats[edge.index] >= min_seats:
+                    relaxations += 1
                     # Calculate cost based on optimization criteria
                     if optimization == 'cost':
                         edge_cost = edge.cost
@@ -231,45 +423,103 @@ class FlightNetwork:
                         
                         heapq.heappush(pq, (f_score, edge.destination, new_path, 
                                           new_flights, tentative_g_score, new_duration, new_delay_prob))
+                        pushes += 1
         
+        self._record_search_stats(stats, started, pushes, pops, len(visited), relaxations)
         return None
     
+    @staticmethod
+    def _record_search_stats(stats: Optional[SearchStats], started: float, pushes: int,
+                             pops: int, settled: int, relaxations: int):
+        """Add one search's counters to stats (accumulates across calls)"""
+        if stats is None:
+            return
+        stats.heap_pushes += pushes
+        stats.heap_pops += pops
+        stats.settled_nodes += settled
+        stats.relaxations += relaxations
+        stats.wall_time_ms += (time.perf_counter() - started) * 1000
+    
     def find_multiple_routes(self, source: str, destination: str, 
-                           num_routes: int = 3) -> List[Route]:
+                           num_routes: int = 3,
+                           stats: Optional[SearchStats] = None,
+                           min_seats: int = 0) -> List[Route]:
         """Find multiple optimal routes with different optimization criteria"""
         routes = []
         
         # Find route optimized for cost
-        cost_route = self.dijkstra_shortest_path(source, destination, 'cost')
+        cost_route = self.dijkstra_shortest_path(source, destination, 'cost', stats, min_seats)
         if cost_route:
             routes.append(cost_route)
         
         # Find route optimized for time
-        time_route = self.a_star_shortest_path(source, destination, 'time')
+        time_route = self.a_star_shortest_path(source, destination, 'time', stats, min_seats)
         if time_route and time_route.flights != (cost_route.flights if cost_route else []):
             routes.append(time_route)
         
         # Find route optimized for reliability
-        reliability_route = self.dijkstra_shortest_path(source, destination, 'reliability')
+        reliability_route = self.dijkstra_shortest_path(source, destination, 'reliability', stats, min_seats)
         if (reliability_route and 
             reliability_route.flights not in [r.flights for r in routes]):
             routes.append(reliability_route)
         
         return routes[:num_routes]
     
+    def search(self, source: str, destination: str, algorithm: str = 'dijkstra',
+               optimization: str = 'cost', num_routes: int = 3, min_seats: int = 0) -> List[Route]:
+        """
+        Routes for one /routes/find request.
+        algorithm: 'multiple' (num_routes routes), 'a_star' or anything else for Dijkstra
+        """
+        if algorithm == 'multiple':
+            return self.find_multiple_routes(source, destination, num_routes, min_seats=min_seats)
+        if algorithm == 'a_star':
+            route = self.a_star_shortest_path(source, destination, optimization, min_seats=min_seats)
+        else:
+            route = self.dijkstra_shortest_path(source, destination, optimization, min_seats=min_seats)
+        return [route] if route else []
+    
     def handle_flight_delay(self, flight_number: str, delay_minutes: int):
         """Handle flight delay by updating the network"""
+        first_delay = flight_number not in self.delayed_flights
         self.delayed_flights.add(flight_number)
         print(f"Flight {flight_number} delayed by {delay_minutes} minutes")
-        # Rebuild network to update delay probabilities
-        self.build_network()
+        if first_delay:
+            # Double the edge's delay probability, as build_network does for delayed flights
+            self._replace_edge(flight_number, lambda edge: replace(edge, delay_prob=min(1.0, edge.delay_prob * 2)))
     
     def handle_flight_cancellation(self, flight_number: str):
         """Handle flight cancellation by removing from network"""
         self.cancelled_flights.add(flight_number)
         print(f"Flight {flight_number} cancelled")
-        # Rebuild network to remove cancelled flight
-        self.build_network()
+        self._replace_edge(flight_number, lambda edge: None)
+    
+    def _replace_edge(self, flight_number: str, change) -> bool:
+        """
+        Replace one flight's edge with change(edge), or drop it if that returns
+        None, keeping the edge aggregates current. The adjacency list is copied
+        rather than edited so searches iterating the old list are unaffected.
+        """
+        with self._lock:
+            graph = self.graph
+            for source, edges in graph.items():
+                for position, edge in enumerate(edges):
+                    if edge.flight_number != flight_number:
+                        continue
+                    new_edge = change(edge)
+                    new_edges = list(edges)
+                    edge_count, delay_prob_sum = self._edge_totals
+                    if new_edge is None:
+                        del new_edges[position]
+                        self.edge_index.pop(flight_number, None)
+                        self._edge_totals = (edge_count - 1, delay_prob_sum - edge.delay_prob)
+                    else:
+                        new_edges[position] = new_edge
+                        self._edge_totals = (edge_count, delay_prob_sum - edge.delay_prob + new_edge.delay_prob)
+                    graph[source] = new_edges
+                    self.version += 1
+                    return True
+        return False
     
     def find_alternative_routes(self, original_route: Route, 
                               disrupted_flight: str) -> List[Route]:
@@ -300,8 +550,11 @@ class FlightNetwork:
     
     def predict_delays(self) -> Dict[str, float]:
         """Predict delays for all flights based on various factors"""
-        predictions = {}
-        
+        return {flight_number: delay_prob
+                for flight_number, _, _, delay_prob in self.iter_delay_predictions()}
+    
+    def iter_delay_predictions(self) -> Iterator[Tuple[str, str, str, float]]:
+        """Lazily yield (flight_number, source, destination, predicted delay probability) per flight"""
         # Simple delay prediction based on historical data and current conditions
         for airport_code, edges in self.graph.items():
             for edge in edges:
@@ -317,9 +570,7 @@ class FlightNetwork:
                 congestion_factor = random.uniform(0.8, 1.4)
                 
                 predicted_delay_prob = min(1.0, base_delay_prob * time_factor * weather_factor * congestion_factor)
-                predictions[edge.flight_number] = predicted_delay_prob
-        
-        return predictions
+                yield edge.flight_number, airport_code, edge.destination, predicted_delay_prob
     
     def find_route(self, source: str, destination: str, algorithm: str = "dijkstra", optimization: str = "cost"):
         """
@@ -355,13 +606,10 @@ class FlightNetwork:
                         # Get flight details from database
                         flight = Flight.query.filter_by(flight_number=flight_num).first()
                         if flight:
-                            source_airport = Airport.query.get(flight.source_id)
-                            dest_airport = Airport.query.get(flight.destination_id)
-                            
                             flights_data.append({
                                 'flight_number': flight_num,
-                                'source': source_airport.code,
-                                'destination': dest_airport.code,
+                                'source': self.registry.code_of(flight.source_id),
+                                'destination': self.registry.code_of(flight.destination_id),
                                 'price': flight.price,
                                 'duration': flight.duration,
                                 'delay_prob': flight.delay_prob
@@ -379,17 +627,12 @@ class FlightNetwork:
         }
     
     def get_network_statistics(self) -> Dict:
-        """Get network statistics"""
-        total_flights = sum(len(edges) for edges in self.graph.values())
+        """Get network statistics from the running edge aggregates (O(1))"""
+        total_flights, total_delay_prob = self._edge_totals
         total_airports = len(self.airports)
         
         avg_delay_prob = 0
         if total_flights > 0:
-            total_delay_prob = sum(
-                edge.delay_prob 
-                for edges in self.graph.values() 
-                for edge in edges
-            )
             avg_delay_prob = total_delay_prob / total_flights
         
         return {
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+In-process HTTP load test for the Flask API.
+
+Drives app.test_client() from a pool of threads with a weighted mix of
+requests (/routes/find, /flights/, /routes/handle-disruption, the visualize
+endpoints, ...) and reports throughput and latency percentiles per endpoint.
+No server needs to be running.
+
+By default the app runs against a throwaway SQLite file seeded with a
+synthetic network, so disruptions never touch the development database:
+
+    python load_test.py --concurrency 8 --requests 2000
+    python load_test.py --duration 30 --mix find=70,flights=30
+    python load_test.py --database-uri sqlite:////tmp/copy-of-database.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmark_routing import latency_summary
+from synthetic_network import SyntheticNetworkGenerator
+
+
+@dataclass
+class Scenario:
+    """One kind of request in the workload mix"""
+    name: str
+    weight: int
+    # (rng, airport_codes, flight_records) -> (method, path, json body)
+    build: Callable[[random.Random, List[str], List[Dict]], Tuple[str, str, Optional[Dict]]]
+
+
+def _find_request(rng, codes, flights):
+    source, destination = rng.sample(codes, 2)
+    return 'POST', '/routes/find', {
+        "source": source,
+        "destination": destination,
+        "algorithm": rng.choice(['dijkstra', 'a_star', 'multiple']),
+        "optimization": rng.choice(['cost', 'time', 'reliability']),
+    }
+
+
+def _disruption_request(rng, codes, flights):
+    flight = rng.choice(flights)
+    return 'POST', '/routes/handle-disruption', {
+        "flight_number": flight['flight_number'],
+        "type": 'delay',
+        "delay_minutes": rng.choice([15, 30, 60, 120]),
+        "reason": 'Load test',
+    }
+
+
+def _visualize_route_request(rng, codes, flights):
+    flight = rng.choice(flights)
+    return 'POST', '/routes/visualize-route', {
+        "airports": [flight['source'], flight['destination']],
+        "flights": [flight['flight_number']],
+        "route_type": rng.choice(['cost', 'time', 'reliability']),
+    }
+
+
+SCENARIOS = {
+    'find': Scenario('find', 50, _find_request),
+    'flights': Scenario('flights', 20, lambda rng, codes, flights: ('GET', '/flights/', None)),
+    'stats': Scenario('stats', 8, lambda rng, codes, flights: ('GET', '/routes/network-stats', None)),
+    'disruption': Scenario('disruption', 5, _disruption_request),
+    'visualize_route': Scenario('visualize_route', 15, _visualize_route_request),
+    'visualize_network': Scenario('visualize_network', 2,
+                                  lambda rng, codes, flights: ('GET', '/routes/visualize-network', None)),
+}
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, int]:
+    """'find=70,flights=30' -> {'find': 70, 'flights': 30}"""
+    if not spec:
+        return {name: scenario.weight for name, scenario in SCENARIOS.items()}
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def load_dataset(app) -> Tuple[List[str], List[Dict]]:
+    """Airport codes and flights the request builders pick from"""
+    from models import Airport, Flight
+    with app.app_context():
+        codes = [a.code for a in Airport.query.all()]
+        flights = [{
+            'flight_number': f.flight_number,
+            'source': f.source.code,
+            'destination': f.destination.code,
+        } for f in Flight.query.all()]
+    return codes, flights
+
+
+class LoadDriver:
+    """Replays a weighted request mix against the app from several threads"""
+
+    def __init__(self, app, mix: Dict[str, int], concurrency: int, seed: int = 42):
+        self.app = app
+        self.mix = mix
+        self.concurrency = concurrency
+        self.seed = seed
+        self.codes, self.flights = load_dataset(app)
+        self.samples: Dict[str, List[float]] = {name: [] for name in mix}
+        self.errors: Dict[str, int] = {name: 0 for name in mix}
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _next_ticket(self, total_requests: Optional[int], deadline: Optional[float]) -> bool:
+        with self._lock:
+            if total_requests is not None and self._issued >= total_requests:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            self._issued += 1
+            return True
+
+    def _worker(self, worker_id: int, total_requests, deadline):
+        rng = random.Random(self.seed + worker_id)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        client = self.app.test_client()
+
+        while self._next_ticket(total_requests, deadline):
+            name = rng.choices(names, weights)[0]
+            method, path, body = SCENARIOS[name].build(rng, self.codes, self.flights)
+
+            start = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self.samples[name].append(elapsed_ms)
+                if response.status_code >= 500:
+                    self.errors[name] += 1
+
+    def run(self, total_requests: Optional[int] = None, duration: Optional[float] = None) -> Dict:
+        """Run until total_requests have been sent or duration seconds have passed"""
+        deadline = time.perf_counter() + duration if duration else None
+        threads = [
+            threading.Thread(target=self._worker, args=(i, total_requests, deadline), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - start
+
+        endpoints = {}
+        for name, latencies in self.samples.items():
+            if not latencies:
+                continue
+            summary = latency_summary(latencies)
+            summary.update({
+                'requests': len(latencies),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(latencies) / wall_time, 2),
+            })
+            endpoints[name] = summary
+
+        total = sum(len(latencies) for latencies in self.samples.values())
+        return {
+            'concurrency': self.concurrency,
+            'wall_time_s': round(wall_time, 3),
+            'total_requests': total,
+            'total_errors': sum(self.errors.values()),
+            'throughput_rps': round(total / wall_time, 2) if wall_time else 0.0,
+            'endpoints': endpoints,
+        }
+
+
+def print_report(report: Dict):
+    print(f"\n📈 {report['total_requests']} requests in {report['wall_time_s']} s "
+          f"with {report['concurrency']} threads -> {report['throughput_rps']} req/s "
+          f"({report['total_errors']} errors)")
+    print(f"   {'endpoint':<18}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in sorted(report['endpoints'].items()):
+        print(f"   {name:<18}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+              f"{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load test for the Flask API")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500, help="Total requests to send")
+    parser.add_argument('--duration', type=float, help="Run for N seconds instead of a request count")
+    parser.add_argument('--mix', help="Weighted scenarios, e.g. find=70,flights=20,disruption=10")
+    parser.add_argument('--database-uri', help="Run against this database instead of a synthetic one")
+    parser.add_argument('--profile', default='development', help="Config profile (see config.py)")
+    parser.add_argument('--airports', type=int, default=30)
+    parser.add_argument('--flights', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    from app import close_app, create_app
+    from models import db
+
+    tmp_path = None
+    if args.database_uri:
+        app = create_app(args.database_uri, profile=args.profile)
+    else:
+        fd, tmp_path = tempfile.mkstemp(suffix='.db', prefix='flightres-load-')
+        os.close(fd)
+        app = create_app(f'sqlite:///{tmp_path}', profile=args.profile)
+        with app.app_context():
+            SyntheticNetworkGenerator(args.airports, args.flights, 'hub_spoke',
+                                      seed=args.seed).write_to_db()
+            db.session.remove()
+
+    try:
+        driver = LoadDriver(app, parse_mix(args.mix), args.concurrency, args.seed)
+        report = driver.run(None if args.duration else args.requests, args.duration)
+        print_report(report)
+    finally:
+        close_app(app)
+        if tmp_path:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(tmp_path + suffix):
+                    os.remove(tmp_path + suffix)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Bounded LRU of rendered folium map HTML.
+
+Building and rendering a folium map takes tens of milliseconds, while the
+same popular routes are visualized over and over. Keys include the airport
+table's data version, so renamed or moved airports never serve a stale map:
+
+    key = route_map_key(airports, flights, route_type)
+    html = get_map_cache().get(key)
+
+Comparison maps of several routes are keyed by comparison_map_key(routes).
+
+Lookups are counted in flightres_map_cache_total by result (hit/miss).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Sequence
+
+from flask import Flask, current_app
+
+from data_version import get_versions
+from metrics import registry
+
+CACHE_METRIC = 'flightres_map_cache_total'
+registry.describe(CACHE_METRIC, 'Rendered map cache lookups by map kind and result')
+
+
+class MapRenderCache:
+    """Thread-safe LRU of map HTML, bounded by entry count"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, kind: str = 'route') -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+        registry.increment(CACHE_METRIC, {'kind': kind, 'result': 'hit' if html is not None else 'miss'})
+        return html
+
+    def put(self, key: Hashable, html: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def route_map_key(airports_sequence: Sequence, flights_sequence: Sequence, route_type: str) -> tuple:
+    """Cache key for create_route_map(airports_sequence, flights_sequence, route_type)"""
+    return (
+        tuple(str(code) for code in airports_sequence),
+        tuple(str(number) for number in flights_sequence or ()),
+        route_type,
+        get_versions().get(['airport']),
+    )
+
+
+def comparison_map_key(routes_data: Sequence[dict]) -> tuple:
+    """Cache key for create_multiple_routes_comparison(routes_data), from the fields the map shows"""
+    return (
+        'comparison',
+        tuple((tuple(str(code) for code in route.get('airports', ())), route.get('route_type'),
+               route.get('total_cost'), route.get('total_duration')) for route in routes_data),
+        get_versions().get(['airport']),
+    )
+
+
+def init_app(app: Flask) -> MapRenderCache:
+    cache = MapRenderCache(app.config['MAP_CACHE_SIZE'])
+    app.extensions['map_cache'] = cache
+    return cache
+
+
+def get_map_cache() -> MapRenderCache:
+    """The map render cache of the current app"""
+    return current_app.extensions['map_cache']
@@ -0,0 +1,247 @@
+"""
+Background pre-rendering of route maps for the most requested OD pairs.
+
+Users almost always open the map of a result right after /routes/find, and
+building and rendering a folium map is the slowest thing we serve. Every
+/routes/find counts its (source, destination) pair in a Space-Saving
+sketch; when the pair is among the MAP_PRERENDER_TOP_PAIRS most frequent,
+the maps the frontend will ask for (one route map, or the comparison map of
+several routes) are rendered into the map render cache on a background
+thread pool. When the flight graph version changes, the hot pairs are
+searched again with their last request's parameters and their new maps
+rendered. Before any live traffic the sketch is seeded from the pairs most
+often saved in the route table.
+
+    get_prerenderer().routes_computed(source, destination, search, routes)
+
+A visualize request for a map still being rendered waits for that render
+instead of starting another one.
+"""
+
+import heapq
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from operator import itemgetter
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import func
+
+from flight_network import flight_network, Route
+from map_cache import comparison_map_key, get_map_cache, route_map_key
+from map_visualization import create_multiple_routes_comparison, create_route_map, render_map_html
+from metrics import registry
+from models import db, Route as RouteModel
+
+PRERENDER_METRIC = 'flightres_map_prerender_total'
+registry.describe(PRERENDER_METRIC, 'Maps rendered ahead of request by map kind and result')
+
+# Parameters of a /routes/find request without any (its defaults)
+DEFAULT_SEARCH = {'algorithm': 'dijkstra', 'optimization': 'cost', 'num_routes': 3, 'min_seats': 0}
+
+Pair = Tuple[str, str]
+
+
+class ODFrequencySketch:
+    """
+    Space-Saving top-k counter over OD pairs.
+
+    Tracks at most capacity pairs. A new pair arriving when full replaces the
+    least counted one and inherits its count, so counts are overestimated by
+    at most that minimum and every pair more frequent than it stays tracked.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: Dict[Pair, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, pair: Pair, count: int = 1) -> int:
+        with self._lock:
+            if pair not in self._counts and len(self._counts) >= self.capacity:
+                evicted = min(self._counts, key=self._counts.get)
+                count += self._counts.pop(evicted)
+            self._counts[pair] = self._counts.get(pair, 0) + count
+            return self._counts[pair]
+
+    def top(self, n: int) -> List[Tuple[Pair, int]]:
+        """The n most frequent pairs with their counts, most frequent first"""
+        with self._lock:
+            return heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def __contains__(self, pair: Pair) -> bool:
+        return pair in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class MapPrerenderer:
+    """Renders the maps of hot OD pairs into the map render cache off the request thread"""
+
+    def __init__(self, app: Flask, workers: int = 1, top_pairs: int = 20,
+                 sketch_size: int = 256, max_pending: int = 64):
+        self.app = app
+        self.workers = workers
+        self.top_pairs = top_pairs
+        self.max_pending = max_pending
+        self.sketch = ODFrequencySketch(sketch_size)
+        # Last /routes/find parameters per tracked pair, reused when the graph changes
+        self._searches: Dict[Pair, Dict] = {}
+        # Cache key -> render in flight
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._graph_version: Optional[int] = None
+        self._seeded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and self.top_pairs > 0
+
+    def hot_pairs(self) -> List[Pair]:
+        return [pair for pair, _ in self.sketch.top(self.top_pairs)]
+
+    def routes_computed(self, source: str, destination: str, search: Dict, routes: Sequence[Route]):
+        """Count a /routes/find and queue its maps if the pair is among the hot ones"""
+        if not self.enabled:
+            return
+        pair = (source, destination)
+        self.sketch.add(pair)
+        with self._lock:
+            self._searches[pair] = search
+            if len(self._searches) > 2 * self.sketch.capacity:
+                self._searches = {p: s for p, s in self._searches.items() if p in self.sketch}
+        self.refresh()
+        if routes and pair in self.hot_pairs():
+            self._submit_maps(routes)
+
+    def refresh(self):
+        """Re-search and pre-render the hot pairs if the flight graph changed since the last refresh"""
+        if not self.enabled:
+            return
+        version = flight_network.version
+        with self._lock:
+            if version == self._graph_version:
+                return
+            self._graph_version = version
+        self._submit(('hot-pairs', version), 'hot_pairs', self._warm_hot_pairs)
+
+    def result(self, key: Hashable, timeout: float = 10.0) -> Optional[str]:
+        """HTML of a map being pre-rendered under key, waiting for it; None if none is"""
+        with self._lock:
+            future = self._pending.get(key)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except Exception:
+            return None
+
+    def wait(self, timeout: float = 30.0):
+        """Block until every queued render has finished"""
+        while True:
+            with self._lock:
+                futures = list(self._pending.values())
+            if not futures:
+                return
+            done, not_done = wait(futures, timeout)
+            if not_done:
+                return
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _map_for(routes: Sequence[Route]) -> Tuple[Hashable, str, Callable, tuple]:
+        """(cache key, kind, builder, builder args) of the map the frontend shows for routes"""
+        if len(routes) == 1:
+            route = routes[0]
+            return (route_map_key(route.airports, route.flights, route.route_type), 'route',
+                    create_route_map, (route.airports, route.flights, route.route_type))
+        routes_data = [route.to_dict() for route in routes]
+        return comparison_map_key(routes_data), 'comparison', create_multiple_routes_comparison, (routes_data,)
+
+    def _submit_maps(self, routes: Sequence[Route]):
+        key, kind, build, args = self._map_for(routes)
+        self._submit(key, kind, self._render, build, *args)
+
+    def _submit(self, key: Hashable, kind: str, job: Callable, *args):
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                return
+            if key in get_map_cache():
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='map-prerender')
+            future = self._pending[key] = self._executor.submit(self._run, job, key, kind, *args)
+        future.add_done_callback(lambda _: self._done(key))
+
+    def _done(self, key: Hashable):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _run(self, job: Callable, key: Hashable, kind: str, *args):
+        with self.app.app_context():
+            try:
+                return job(key, kind, *args)
+            except Exception as e:
+                registry.increment(PRERENDER_METRIC, {'kind': kind, 'result': 'failed'})
+                print(f"⚠️ Map pre-render failed: {e}")
+                return None
+            finally:
+                db.session.remove()
+
+    def _render(self, key: Hashable, kind: str, build: Callable, *args) -> Optional[str]:
+        cache = get_map_cache()
+        if key in cache:
+            return None
+        map_viz = build(*args)
+        if not map_viz:
+            return None
+        html = render_map_html(map_viz)
+        cache.put(key, html)
+        registry.increment(PRERENDER_METRIC, {'kind': kind, 'result': 'rendered'})
+        return html
+
+    def _warm_hot_pairs(self, key: Hashable, kind: str):
+        if not self._seeded:
+            self._seed_from_saved_routes()
+        for source, destination in self.hot_pairs():
+            with self._lock:
+                search = self._searches.get((source, destination), DEFAULT_SEARCH)
+            routes = flight_network.search(source, destination, **search)
+            if routes:
+                map_key, map_kind, build, args = self._map_for(routes)
+                self._render(map_key, map_kind, build, *args)
+
+    def _seed_from_saved_routes(self):
+        """Count the pairs most often saved by /routes/find before this process started"""
+        self._seeded = True
+        if len(self.sketch):
+            return
+        rows = db.session.query(
+            RouteModel.source_airport_code, RouteModel.destination_airport_code, func.count()
+        ).group_by(
+            RouteModel.source_airport_code, RouteModel.destination_airport_code
+        ).order_by(func.count().desc()).limit(self.sketch.capacity)
+        for source, destination, count in rows:
+            self.sketch.add((source, destination), count)
+
+
+def init_app(app: Flask) -> MapPrerenderer:
+    prerenderer = MapPrerenderer(
+        app,
+        workers=app.config['MAP_PRERENDER_WORKERS'],
+        top_pairs=app.config['MAP_PRERENDER_TOP_PAIRS'],
+        sketch_size=app.config['MAP_PRERENDER_SKETCH_SIZE'],
+        max_pending=app.config['MAP_PRERENDER_MAX_PENDING'],
+    )
+    app.extensions['map_prerender'] = prerenderer
+    return prerenderer
+
+
+def get_prerenderer() -> MapPrerenderer:
+    """The map pre-renderer of the current app"""
+    return current_app.extensions['map_prerender']
@@ -1,32 +1,34 @@
 import folium
-import json
-from flask import render_template_string
-from models import Airport
+import math
+from folium.plugins import MarkerCluster
+from models import Flight
+from airport_registry import get_registry
 
-import folium
-import json
-from flask import render_template_string
-from models import Airport
+# 'auto' overview maps switch to one line per airport pair above this many flights
+AGGREGATE_ABOVE_FLIGHTS = 500
+
+def render_map_html(map_viz):
+    """
+    Full HTML document for a folium map.
+    
+    Renders the root figure directly instead of going through _repr_html_(),
+    which escapes the document into an iframe srcdoc that callers then had
+    to find with a regex and unescape again.
+    """
+    if map_viz._parent is None:
+        # Same as _repr_html_: render inside a throwaway figure
+        map_viz.add_to(folium.Figure())
+        try:
+            return map_viz._parent.render()
+        finally:
+            map_viz._parent = None
+    return map_viz.get_root().render()
 
 def create_route_map(airports_sequence, flights_sequence=None, route_type="optimal"):
     """
     Create a Folium map visualization for flight routes
     """
     
-    # Airport coordinates for Indian airports (lat, lon format)
-    airport_coords = {
-        'DEL': (28.5562, 77.1000),  # Delhi
-        'BOM': (19.0896, 72.8656),  # Mumbai  
-        'BLR': (12.9716, 77.5946),  # Bangalore
-        'MAA': (12.9941, 80.1709),  # Chennai
-        'CCU': (22.6549, 88.4462),  # Kolkata
-        'HYD': (17.2403, 78.4294),  # Hyderabad
-        'AMD': (23.0726, 72.6177),  # Ahmedabad
-        'PNQ': (18.5821, 73.9197),  # Pune
-        'GOI': (15.3808, 73.8314),  # Goa
-        'JAI': (26.8167, 75.8042),  # Jaipur
-    }
-    
     # Validate that we have airport data
     if not airports_sequence or len(airports_sequence) < 2:
         # Create default map for India
@@ -42,24 +44,21 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
         ).add_to(map_viz)
         return map_viz
     
-    # Get airport details from database
+    # Get airport details from the registry
+    registry = get_registry()
     airport_details = {}
     for code in airports_sequence:
-        airport = Airport.query.filter_by(code=code).first()
-        if airport and code in airport_coords:
+        coords = registry.coords(code)
+        if coords:
+            info = registry.info(code)
             airport_details[code] = {
-                'name': airport.name,
-                'city': airport.city,
-                'coords': airport_coords[code]
+                'name': info['name'],
+                'city': info['city'],
+                'coords': coords
             }
     
     # Calculate center point for map
-    valid_coords = [airport_coords[code] for code in airports_sequence if code in airport_coords]
-    if valid_coords:
-        center_lat = sum(coord[0] for coord in valid_coords) / len(valid_coords)
-        center_lon = sum(coord[1] for coord in valid_coords) / len(valid_coords)
-    else:
-        center_lat, center_lon = 20.5937, 78.9629  # Center of India
+    center_lat, center_lon = registry.centroid(airports_sequence) or (20.5937, 78.9629)  # Center of India
     
     # Create the map
     map_viz = folium.Map(
@@ -82,12 +81,14 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
     
     # Collect coordinates for path
     path_coordinates = []
+    path_codes = []
     
     # Add markers for each airport and collect coordinates
     for i, airport_code in enumerate(airports_sequence):
         if airport_code in airport_details:
             coords = airport_details[airport_code]['coords']
             path_coordinates.append([coords[0], coords[1]])  # [lat, lon]
+            path_codes.append(airport_code)
             
             # Determine marker style based on position in route
             if i == 0:
@@ -138,6 +139,15 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
             start = path_coordinates[i]
             end = path_coordinates[i + 1]
             
+            # Initial bearing of the segment, used to point the arrows
+            lat1, lon1 = math.radians(start[0]), math.radians(start[1])
+            lat2, lon2 = math.radians(end[0]), math.radians(end[1])
+            
+            dlon = lon2 - lon1
+            y = math.sin(dlon) * math.cos(lat2)
+            x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+            bearing = math.degrees(math.atan2(y, x))
+            
             # Calculate multiple points along the segment for better arrow placement
             num_arrows = 3
             for j in range(1, num_arrows + 1):
@@ -145,22 +155,13 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
                 arrow_lat = start[0] + t * (end[0] - start[0])
                 arrow_lon = start[1] + t * (end[1] - start[1])
                 
-                # Calculate bearing for arrow direction
-                import math
-                lat1, lon1 = math.radians(start[0]), math.radians(start[1])
-                lat2, lon2 = math.radians(end[0]), math.radians(end[1])
-                
-                dlon = lon2 - lon1
-                y = math.sin(dlon) * math.cos(lat2)
-                x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-                bearing = math.degrees(math.atan2(y, x))
-                
-                # Add arrow marker
+                # Add arrow marker; the arrow-right icon points east (bearing 90)
                 folium.Marker(
                     location=[arrow_lat, arrow_lon],
                     icon=folium.Icon(
                         color='darkblue',
                         icon='arrow-right',
+                        angle=round(bearing - 90) % 360,
                         prefix='fa'
                     ),
                     popup=f"Flight Direction<br>Segment {i+1} of {len(path_coordinates)-1}"
@@ -173,19 +174,7 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
             mid_lat = (start[0] + end[0]) / 2
             mid_lon = (start[1] + end[1]) / 2
             
-            # Calculate approximate distance
-            from math import radians, cos, sin, asin, sqrt
-            
-            def haversine(lon1, lat1, lon2, lat2):
-                lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-                dlon = lon2 - lon1
-                dlat = lat2 - lat1
-                a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                c = 2 * asin(sqrt(a))
-                r = 6371  # Radius of earth in kilometers
-                return c * r
-            
-            distance = haversine(start[1], start[0], end[1], end[0])
+            distance = registry.distance(path_codes[i], path_codes[i + 1])
             
             # Add invisible marker for segment info
             segment_info = f"Segment {i+1}<br>{airports_sequence[i]} → {airports_sequence[i+1]}<br>Distance: ~{distance:.0f} km"
@@ -202,22 +191,7 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
             ).add_to(map_viz)
     
     # Add a comprehensive legend
-    total_distance = 0
-    if len(path_coordinates) >= 2:
-        from math import radians, cos, sin, asin, sqrt
-        def haversine(lon1, lat1, lon2, lat2):
-            lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-            dlon = lon2 - lon1
-            dlat = lat2 - lat1
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            r = 6371
-            return c * r
-        
-        for i in range(len(path_coordinates) - 1):
-            start = path_coordinates[i]
-            end = path_coordinates[i + 1]
-            total_distance += haversine(start[1], start[0], end[1], end[0])
+    total_distance = sum(registry.distance(a, b) for a, b in zip(path_codes, path_codes[1:]))
     
     legend_html = f'''
     <div style="position: fixed; 
@@ -248,24 +222,22 @@ def create_route_map(airports_sequence, flights_sequence=None, route_type="optim
     
     return map_viz
 
-def create_network_overview_map():
+def create_network_overview_map(mode='auto', region_degrees=None):
     """
     Create a map showing the entire flight network
+    
+    mode 'flights' draws every flight; 'aggregated' draws one line per airport
+    pair (see create_aggregated_network_map); 'auto' aggregates networks with
+    more than AGGREGATE_ABOVE_FLIGHTS flights. region_degrees implies 'aggregated'.
     """
+    from flight_network import flight_network
     
-    # Airport coordinates
-    airport_coords = {
-        'DEL': (28.5562, 77.1000),  # Delhi
-        'BOM': (19.0896, 72.8656),  # Mumbai
-        'BLR': (12.9716, 77.5946),  # Bangalore
-        'MAA': (12.9941, 80.1709),  # Chennai
-        'CCU': (22.6549, 88.4462),  # Kolkata
-        'HYD': (17.2403, 78.4294),  # Hyderabad
-        'AMD': (23.0726, 72.6177),  # Ahmedabad
-        'PNQ': (18.5821, 73.9197),  # Pune
-        'GOI': (15.3808, 73.8314),  # Goa
-        'JAI': (26.8167, 75.8042),  # Jaipur
-    }
+    if mode == 'auto':
+        mode = 'aggregated' if Flight.query.count() > AGGREGATE_ABOVE_FLIGHTS else 'flights'
+    if mode == 'aggregated' or region_degrees:
+        return create_aggregated_network_map(region_degrees)
+    
+    registry = get_registry()
     
     # Create map centered on India
     map_viz = folium.Map(
@@ -275,40 +247,28 @@ def create_network_overview_map():
     )
     
     # Add all airports
-    airports = Airport.query.all()
-    for airport in airports:
-        if airport.code in airport_coords:
-            coords = airport_coords[airport.code]
-            
-            folium.Marker(
-                location=coords,
-                popup=f"<strong>{airport.code}</strong><br>{airport.name}<br>{airport.city}",
-                tooltip=f"{airport.code} - {airport.city}",
-                icon=folium.Icon(color='blue', icon='plane', prefix='fa')
-            ).add_to(map_viz)
+    for code in registry.located_codes():
+        airport = registry.info(code)
+        folium.Marker(
+            location=registry.coords(code),
+            popup=f"<strong>{code}</strong><br>{airport['name']}<br>{airport['city']}",
+            tooltip=f"{code} - {airport['city']}",
+            icon=folium.Icon(color='blue', icon='plane', prefix='fa')
+        ).add_to(map_viz)
     
     # Add flight connections (simplified)
-    from flight_network import flight_network
     flight_network.build_network()
     
     for source, edges in flight_network.graph.items():
-        if source in airport_coords:
-            source_coords = airport_coords[source]
+        source_coords = registry.coords(source)
+        if source_coords:
             for edge in edges:
-                if edge.destination in airport_coords:
-                    dest_coords = airport_coords[edge.destination]
-                    
-                    # Color based on delay probability
-                    if edge.delay_prob < 0.1:
-                        color = 'green'
-                    elif edge.delay_prob < 0.2:
-                        color = 'orange'
-                    else:
-                        color = 'red'
+                dest_coords = registry.coords(edge.destination)
+                if dest_coords:
                     
                     folium.PolyLine(
                         [source_coords, dest_coords],
-                        color=color,
+                        color=_delay_color(edge.delay_prob),
                         weight=2,
                         opacity=0.6,
                         popup=f"{edge.flight_number}: {source} → {edge.destination}<br>Delay Risk: {edge.delay_prob:.1%}"
@@ -331,34 +291,159 @@ def create_network_overview_map():
     
     return map_viz
 
+def _delay_color(delay_prob):
+    """Line color for a delay probability, matching the overview legend"""
+    if delay_prob < 0.1:
+        return 'green'
+    if delay_prob < 0.2:
+        return 'orange'
+    return 'red'
+
+def aggregate_airport_pairs(graph, node_of):
+    """
+    Collapse flights into one entry per unordered pair of nodes.
+
+    node_of maps an airport code to its node (the code itself, or a region)
+    or None to skip the airport. Flights within one node are counted under
+    (node, node). Each entry has flights, min_cost, avg_duration and
+    avg_delay_prob.
+    """
+    pairs = {}
+    for source, edges in graph.items():
+        a = node_of(source)
+        if a is None:
+            continue
+        for edge in edges:
+            b = node_of(edge.destination)
+            if b is None:
+                continue
+            key = (a, b) if a <= b else (b, a)
+            stats = pairs.get(key)
+            if stats is None:
+                stats = pairs[key] = {'flights': 0, 'min_cost': edge.cost, 'duration': 0.0, 'delay_prob': 0.0}
+            stats['flights'] += 1
+            stats['min_cost'] = min(stats['min_cost'], edge.cost)
+            stats['duration'] += edge.duration
+            stats['delay_prob'] += edge.delay_prob
+
+    for stats in pairs.values():
+        stats['avg_duration'] = stats.pop('duration') / stats['flights']
+        stats['avg_delay_prob'] = stats.pop('delay_prob') / stats['flights']
+    return pairs
+
+def create_aggregated_network_map(region_degrees=None):
+    """
+    Network overview whose size depends on airport pairs, not flights.
+
+    Parallel flights between two airports (both directions) become one line
+    weighted by flight count, with the cheapest fare, average duration and
+    delay risk in its popup; airport markers are clustered. With
+    region_degrees, airports are bucketed into a lat/lon grid of that cell
+    size and the lines join regions instead of airports.
+    """
+    from flight_network import flight_network
+    flight_network.build_network()
+
+    registry = flight_network.registry
+    coords = {code: registry.coords(code) for code in registry.located_codes()}
+
+    map_viz = folium.Map(
+        location=[20.5937, 78.9629],
+        zoom_start=5,
+        tiles='OpenStreetMap'
+    )
+
+    if region_degrees:
+        def region_of(code):
+            lat, lon = coords[code]
+            return (math.floor(lat / region_degrees), math.floor(lon / region_degrees))
+
+        # Grid cell -> member airports; each region is drawn at its members' centroid
+        members = {}
+        for code in coords:
+            members.setdefault(region_of(code), []).append(code)
+        node_coords = {region: registry.centroid(codes) for region, codes in members.items()}
+        pairs = aggregate_airport_pairs(flight_network.graph, lambda code: region_of(code) if code in coords else None)
+
+        for region, codes in members.items():
+            internal = pairs.get((region, region), {}).get('flights', 0)
+            listed = ', '.join(sorted(codes)[:10]) + (f' +{len(codes) - 10} more' if len(codes) > 10 else '')
+            folium.CircleMarker(
+                location=node_coords[region],
+                radius=4 + 2 * math.sqrt(len(codes)),
+                color='darkblue',
+                fill=True,
+                fill_opacity=0.7,
+                popup=f"<strong>{len(codes)} airports</strong><br>{listed}<br>{internal} flights within the region",
+                tooltip=f"{len(codes)} airports"
+            ).add_to(map_viz)
+
+        def node_label(region):
+            return f"{region[0] * region_degrees:g}°, {region[1] * region_degrees:g}°"
+    else:
+        node_coords = coords
+        pairs = aggregate_airport_pairs(flight_network.graph, lambda code: code if code in coords else None)
+
+        cluster = MarkerCluster(name='Airports').add_to(map_viz)
+        for code, location in coords.items():
+            airport = flight_network.airports[code]
+            folium.Marker(
+                location=location,
+                popup=f"<strong>{code}</strong><br>{airport['name']}<br>{airport['city']}"
+                      f"<br>{len(flight_network.graph.get(code, ()))} departures",
+                tooltip=f"{code} - {airport['city']}",
+                icon=folium.Icon(color='blue', icon='plane', prefix='fa')
+            ).add_to(cluster)
+        node_label = str
+
+    total_flights = sum(stats['flights'] for stats in pairs.values())
+    connections = 0
+    for (a, b), stats in pairs.items():
+        if a == b:
+            continue
+        connections += 1
+        folium.PolyLine(
+            [node_coords[a], node_coords[b]],
+            color=_delay_color(stats['avg_delay_prob']),
+            # Width grows with the log of the number of flights on the pair
+            weight=min(10.0, 1.5 + 1.5 * math.log2(stats['flights'])),
+            opacity=0.6,
+            popup=f"{node_label(a)} ↔ {node_label(b)}<br>{stats['flights']} flights"
+                  f"<br>From ₹{stats['min_cost']:.0f}, avg {stats['avg_duration']:.1f}h"
+                  f"<br>Avg Delay Risk: {stats['avg_delay_prob']:.1%}"
+        ).add_to(map_viz)
+
+    # Add legend
+    legend_html = f'''
+    <div style="position: fixed;
+                top: 10px; right: 10px; width: 220px; height: auto;
+                background-color: white; border:2px solid grey; z-index:9999;
+                font-size:14px; padding: 10px">
+    <h4>Flight Network Overview</h4>
+    <p>{total_flights} flights on {connections} {'region' if region_degrees else 'airport'} pairs</p>
+    <p><strong>━</strong> Wider lines carry more flights</p>
+    <p><span style="color:green">—</span> Low Delay Risk (&lt;10%)</p>
+    <p><span style="color:orange">—</span> Medium Delay Risk (10-20%)</p>
+    <p><span style="color:red">—</span> High Delay Risk (&gt;20%)</p>
+    </div>
+    '''
+    map_viz.get_root().html.add_child(folium.Element(legend_html))
+
+    return map_viz
+
 def create_multiple_routes_comparison(routes_data):
     """
     Create a map comparing multiple routes
     """
     
-    airport_coords = {
-        'DEL': (28.5562, 77.1000),
-        'BOM': (19.0896, 72.8656),
-        'BLR': (12.9716, 77.5946),
-        'MAA': (12.9941, 80.1709),
-        'CCU': (22.6549, 88.4462),
-        'HYD': (17.2403, 78.4294),
-    }
+    registry = get_registry()
     
     # Calculate center from all routes
     all_airports = set()
     for route in routes_data:
         all_airports.update(route['airports'])
     
-    if all_airports:
-        valid_airports = [code for code in all_airports if code in airport_coords]
-        if valid_airports:
-            center_lat = sum(airport_coords[code][0] for code in valid_airports) / len(valid_airports)
-            center_lon = sum(airport_coords[code][1] for code in valid_airports) / len(valid_airports)
-        else:
-            center_lat, center_lon = 20.5937, 78.9629
-    else:
-        center_lat, center_lon = 20.5937, 78.9629
+    center_lat, center_lon = registry.centroid(all_airports) or (20.5937, 78.9629)
     
     map_viz = folium.Map(
         location=[center_lat, center_lon],
@@ -372,13 +457,13 @@ def create_multiple_routes_comparison(routes_data):
     # Add all airports first
     all_coords = []
     for airport_code in all_airports:
-        if airport_code in airport_coords:
-            coords = airport_coords[airport_code]
+        coords = registry.coords(airport_code)
+        if coords:
             all_coords.append([coords[0], coords[1]])  # [lat, lon] format
             
-            airport = Airport.query.filter_by(code=airport_code).first()
-            airport_name = airport.name if airport else airport_code
-            airport_city = airport.city if airport else "Unknown"
+            airport = registry.info(airport_code)
+            airport_name = airport['name']
+            airport_city = airport['city']
             
             folium.Marker(
                 location=coords,
@@ -394,8 +479,8 @@ def create_multiple_routes_comparison(routes_data):
         path_coordinates = []
         
         for airport_code in route['airports']:
-            if airport_code in airport_coords:
-                coords = airport_coords[airport_code]
+            coords = registry.coords(airport_code)
+            if coords:
                 path_coordinates.append([coords[0], coords[1]])  # [lat, lon] format
         
         if len(path_coordinates) >= 2:
@@ -0,0 +1,190 @@
+"""
+Lightweight in-process metrics: phase timers feeding histograms and counters,
+exposed in Prometheus text format by the /metrics endpoint.
+
+    with phase_timer('search'):
+        route = flight_network.dijkstra_shortest_path(...)
+
+Labels default to the current endpoint plus whatever the router set with
+set_request_labels() (algorithm, optimization), so timers deep inside
+FlightNetwork are attributed to the request that triggered them. Label
+values come from a fixed set (LABEL_VALUES, route patterns), so clients
+can't create unbounded series with made-up parameters or URLs.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from flask import Flask, g, has_app_context, has_request_context, request
+
+# Seconds; tuned for phases between sub-millisecond searches and multi-second map renders
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASE_METRIC = 'flightres_phase_duration_seconds'
+REQUEST_METRIC = 'flightres_request_duration_seconds'
+
+# Values kept for request labels; anything else is recorded as OTHER_LABEL
+LABEL_VALUES = {
+    'algorithm': frozenset({'dijkstra', 'a_star', 'multiple'}),
+    'optimization': frozenset({'cost', 'time', 'reliability'}),
+}
+OTHER_LABEL = 'other'
+# Endpoint label of requests that matched no route (404s)
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram for a single label set"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of histograms and counters keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {
+            PHASE_METRIC: 'Time spent in each phase of a request',
+            REQUEST_METRIC: 'Total request handling time',
+        }
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, labels: Dict[str, str]):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, labels: Dict[str, str] = None, amount: float = 1):
+        key = tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def counter_value(self, name: str, labels: Dict[str, str] = None) -> float:
+        key = tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+        with self._lock:
+            return self._counters.get(name, {}).get(key, 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, le=_format_value(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, le: str = None) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in key]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Global registry used by the routers, FlightNetwork and /metrics
+registry = MetricsRegistry()
+
+
+def _label_value(name: str, value) -> str:
+    value = str(value)
+    allowed = LABEL_VALUES.get(name)
+    return value if allowed is None or value in allowed else OTHER_LABEL
+
+
+def set_request_labels(**labels):
+    """Attach labels (e.g. algorithm, optimization) to every timer in the current request"""
+    if has_app_context():
+        g.setdefault('metric_labels', {}).update({k: _label_value(k, v) for k, v in labels.items()})
+
+
+def current_labels() -> Dict[str, str]:
+    """Endpoint plus any labels set for the current request"""
+    labels = {'endpoint': 'none', 'algorithm': '', 'optimization': ''}
+    if has_request_context():
+        labels['endpoint'] = request.url_rule.rule if request.url_rule else UNMATCHED_ENDPOINT
+    if has_app_context():
+        labels.update(g.get('metric_labels', {}))
+    return labels
+
+
+@contextmanager
+def phase_timer(phase: str, **labels):
+    """Record how long the with-block takes as one phase of the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        all_labels = current_labels()
+        all_labels.update({k: _label_value(k, v) for k, v in labels.items()})
+        all_labels['phase'] = phase
+        registry.observe(PHASE_METRIC, elapsed, all_labels)
+
+
+def init_app(app: Flask):
+    """Time every request end to end, labelled by endpoint, method and status"""
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request_time(response):
+        started = g.get('request_started')
+        if started is not None and request.endpoint != 'metrics.metrics':
+            labels = current_labels()
+            labels.update({'method': request.method, 'status': str(response.status_code)})
+            registry.observe(REQUEST_METRIC, time.perf_counter() - started, labels)
+        return response
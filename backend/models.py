@@ -25,10 +25,18 @@ class Flight(db.Model):
     arrival_time = db.Column(db.String(10), default='10:00')    # HH:MM format
     aircraft_type = db.Column(db.String(50), default='Boeing 737')
     max_capacity = db.Column(db.Integer, default=180)
+    # Confirmed bookings; only changed by the conditional UPDATEs in routers/bookings.py
+    seats_booked = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     source = db.relationship('Airport', foreign_keys=[source_id])
     destination = db.relationship('Airport', foreign_keys=[destination_id])
 
+    __table_args__ = (
+        db.Index('ix_flight_source_destination', 'source_id', 'destination_id'),
+        # /flights/search by destination only
+        db.Index('ix_flight_destination_id', 'destination_id'),
+    )
+
 class FlightStatus(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     flight_id = db.Column(db.Integer, db.ForeignKey('flight.id'))
@@ -39,6 +47,13 @@ class FlightStatus(db.Model):
     
     flight = db.relationship('Flight', backref='status_updates')
 
+    __table_args__ = (
+        # Latest status per flight: filter by flight_id, newest updated_at first
+        db.Index('ix_flight_status_flight_id_updated_at', 'flight_id', 'updated_at'),
+        # Disruptions recorded since a given time (network stats)
+        db.Index('ix_flight_status_updated_at', 'updated_at'),
+    )
+
 class Route(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     source_airport_code = db.Column(db.String(10), nullable=False)
@@ -49,8 +64,32 @@ class Route(db.Model):
     total_delay_prob = db.Column(db.Float, default=0.0)
     airports_sequence = db.Column(db.Text)  # JSON string of airport codes
     flights_sequence = db.Column(db.Text)   # JSON string of flight numbers
+    content_hash = db.Column(db.String(64))  # SHA-256 of airports + flights, see route_writer
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_route_created_at', 'created_at'),
+        db.Index('ix_route_content_hash', 'content_hash'),
+    )
+
+class RouteSegment(db.Model):
+    """One leg of a saved Route, so itineraries can be looked up by flight"""
+    id = db.Column(db.Integer, primary_key=True)
+    route_id = db.Column(db.Integer, db.ForeignKey('route.id'), nullable=False)
+    leg_index = db.Column(db.Integer, nullable=False)
+    flight_id = db.Column(db.Integer, db.ForeignKey('flight.id'))
+    from_airport_code = db.Column(db.String(10), nullable=False)
+    to_airport_code = db.Column(db.String(10), nullable=False)
+
+    route = db.relationship('Route', backref=db.backref('segments', order_by='RouteSegment.leg_index'))
+    flight = db.relationship('Flight')
+
+    __table_args__ = (
+        # Which saved itineraries use a given flight (disruption handling)
+        db.Index('ix_route_segment_flight_id', 'flight_id'),
+        db.Index('ix_route_segment_route_id_leg_index', 'route_id', 'leg_index', unique=True),
+    )
+
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_name = db.Column(db.String(50), nullable=False)
@@ -61,3 +100,10 @@ class Booking(db.Model):
     
     flight = db.relationship('Flight', backref='bookings')
     route = db.relationship('Route', backref='bookings')
+
+    __table_args__ = (
+        db.Index('ix_booking_flight_id', 'flight_id'),
+        # Bookings on a saved itinerary (disruption handling)
+        db.Index('ix_booking_route_id', 'route_id'),
+    )
+
@@ -0,0 +1,194 @@
+"""
+GeoJSON views of the flight network for client-side map rendering.
+
+Airports become Point features and flights become LineString features that
+follow the great-circle arc between their airports, so the frontend can
+draw them with any map library instead of receiving a full folium page.
+Geometry is computed once per FlightNetwork.version:
+
+    geometry = network_geometry(flight_network)
+    collection = route_collection(geometry, ['DEL', 'BOM'], ['AI101'], 'cost')
+
+Coordinates are [longitude, latitude] rounded to COORDINATE_DECIMALS.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence
+
+# ~11 m at the equator; plenty for drawing routes
+COORDINATE_DECIMALS = 4
+# One arc vertex per this many km, between 2 and MAX_ARC_POINTS vertices
+ARC_SEGMENT_KM = 200
+MAX_ARC_POINTS = 32
+
+EARTH_RADIUS_KM = 6371
+
+
+def great_circle_arc(lat1: float, lon1: float, lat2: float, lon2: float,
+                     points: Optional[int] = None) -> List[List[float]]:
+    """[lon, lat] vertices along the great circle from (lat1, lon1) to (lat2, lon2)"""
+    phi1, lam1, phi2, lam2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    # Angular distance (haversine form, stable for short arcs)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin((lam2 - lam1) / 2) ** 2
+    delta = 2 * math.asin(min(1.0, math.sqrt(a)))
+    if points is None:
+        points = min(MAX_ARC_POINTS, max(2, int(delta * EARTH_RADIUS_KM / ARC_SEGMENT_KM) + 2))
+    if delta == 0:
+        return [[round(lon1, COORDINATE_DECIMALS), round(lat1, COORDINATE_DECIMALS)]] * 2
+
+    # Spherical linear interpolation between the two unit vectors
+    x1, y1, z1 = math.cos(phi1) * math.cos(lam1), math.cos(phi1) * math.sin(lam1), math.sin(phi1)
+    x2, y2, z2 = math.cos(phi2) * math.cos(lam2), math.cos(phi2) * math.sin(lam2), math.sin(phi2)
+    sin_delta = math.sin(delta)
+    coordinates = []
+    for i in range(points):
+        f = i / (points - 1)
+        a = math.sin((1 - f) * delta) / sin_delta
+        b = math.sin(f * delta) / sin_delta
+        x, y, z = a * x1 + b * x2, a * y1 + b * y2, a * z1 + b * z2
+        lat = math.degrees(math.atan2(z, math.hypot(x, y)))
+        lon = math.degrees(math.atan2(y, x))
+        coordinates.append([round(lon, COORDINATE_DECIMALS), round(lat, COORDINATE_DECIMALS)])
+    return coordinates
+
+
+def _point(coordinates: List[float], properties: Dict) -> Dict:
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": coordinates}, "properties": properties}
+
+
+def _line(coordinates: List[List[float]], properties: Dict) -> Dict:
+    return {"type": "Feature", "geometry": {"type": "LineString", "coordinates": coordinates},
+            "properties": properties}
+
+
+def feature_collection(features: List[Dict], **properties) -> Dict:
+    collection = {"type": "FeatureCollection", "features": features}
+    if properties:
+        collection["properties"] = properties
+    return collection
+
+
+class NetworkGeometry:
+    """Airport points and flight arcs for one version of a FlightNetwork"""
+
+    def __init__(self, network):
+        self.version = network.version
+        graph, airports, registry = network.graph, network.airports, network.registry
+        # Airports without coordinates have no point, and their flights no arc
+        self.airports: Dict[str, Dict] = {}
+        for code, info in airports.items():
+            coords = registry.coords(code)
+            if coords is None:
+                continue
+            self.airports[code] = _point(
+                [round(coords[1], COORDINATE_DECIMALS), round(coords[0], COORDINATE_DECIMALS)],
+                {"code": code, "name": info['name'], "city": info['city'],
+                 "departures": len(graph.get(code, ()))}
+            )
+
+        # Flights between the same pair of airports share one arc
+        arcs: Dict[tuple, List[List[float]]] = {}
+        self.flights: Dict[str, Dict] = {}
+        for source, edges in graph.items():
+            if source not in self.airports:
+                continue
+            for edge in edges:
+                if edge.destination not in self.airports:
+                    continue
+                pair = (source, edge.destination)
+                if pair not in arcs:
+                    arcs[pair] = self.arc(source, edge.destination)
+                self.flights[edge.flight_number] = _line(arcs[pair], {
+                    "flight_number": edge.flight_number,
+                    "source": source,
+                    "destination": edge.destination,
+                    "cost": edge.cost,
+                    "duration": edge.duration,
+                    "delay_prob": round(edge.delay_prob, 3),
+                    "distance_km": round(edge.distance, 1),
+                    "delayed": edge.flight_number in network.delayed_flights,
+                })
+
+    def arc(self, source: str, destination: str) -> List[List[float]]:
+        (lon1, lat1), (lon2, lat2) = (self.airports[source]['geometry']['coordinates'],
+                                      self.airports[destination]['geometry']['coordinates'])
+        return great_circle_arc(lat1, lon1, lat2, lon2)
+
+    def network_collection(self) -> Dict:
+        return feature_collection(list(self.airports.values()) + list(self.flights.values()),
+                                  graph_version=self.version)
+
+    def route_features(self, airports_sequence: Sequence[str], flights_sequence: Sequence[str],
+                       route_type: str, route_index: Optional[int] = None) -> List[Dict]:
+        """One LineString per leg of the route, flight properties included when the flight is known"""
+        features = []
+        for leg, (source, destination) in enumerate(zip(airports_sequence, airports_sequence[1:])):
+            if source not in self.airports or destination not in self.airports:
+                continue
+            flight_number = flights_sequence[leg] if leg < len(flights_sequence) else None
+            flight = self.flights.get(flight_number)
+            if flight and (flight['properties']['source'], flight['properties']['destination']) == (source, destination):
+                geometry, properties = flight['geometry'], dict(flight['properties'])
+            else:
+                geometry = {"type": "LineString", "coordinates": self.arc(source, destination)}
+                properties = {"flight_number": flight_number, "source": source, "destination": destination}
+            properties.update({"leg": leg, "route_type": route_type})
+            if route_index is not None:
+                properties["route_index"] = route_index
+            features.append({"type": "Feature", "geometry": geometry, "properties": properties})
+        return features
+
+    def airport_features(self, airports_sequence: Sequence[str]) -> List[Dict]:
+        """Airports of a route, each tagged origin, layover or destination"""
+        features = []
+        last = len(airports_sequence) - 1
+        for position, code in enumerate(airports_sequence):
+            airport = self.airports.get(code)
+            if airport is None:
+                continue
+            role = 'origin' if position == 0 else 'destination' if position == last else 'layover'
+            features.append({**airport, "properties": {**airport['properties'], "role": role}})
+        return features
+
+
+_geometry: Optional[NetworkGeometry] = None
+_geometry_network = None
+_lock = threading.Lock()
+
+
+def network_geometry(network) -> NetworkGeometry:
+    """Geometry for network's current version, rebuilt only when the version changes"""
+    global _geometry, _geometry_network
+    geometry = _geometry
+    if geometry is not None and _geometry_network is network and geometry.version == network.version:
+        return geometry
+    with _lock:
+        if _geometry is None or _geometry_network is not network or _geometry.version != network.version:
+            _geometry, _geometry_network = NetworkGeometry(network), network
+        return _geometry
+
+
+def route_collection(geometry: NetworkGeometry, airports_sequence: Sequence[str],
+                     flights_sequence: Sequence[str], route_type: str) -> Dict:
+    return feature_collection(
+        geometry.airport_features(airports_sequence)
+        + geometry.route_features(airports_sequence, flights_sequence, route_type),
+        route_type=route_type, graph_version=geometry.version
+    )
+
+
+def comparison_collection(geometry: NetworkGeometry, routes: Sequence[Dict]) -> Dict:
+    """Legs of every route tagged with route_index, plus each airport once"""
+    features, seen = [], set()
+    for index, route in enumerate(routes):
+        airports_sequence = route.get('airports', [])
+        for airport in geometry.airport_features(airports_sequence):
+            code = airport['properties']['code']
+            if code not in seen:
+                seen.add(code)
+                airport['properties'].pop('role')
+                features.append(airport)
+        features.extend(geometry.route_features(airports_sequence, route.get('flights', []),
+                                                route.get('route_type', 'optimal'), index))
+    return feature_collection(features, routes=len(routes), graph_version=geometry.version)
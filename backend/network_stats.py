@@ -0,0 +1,158 @@
+"""
+Cached database counters for /routes/network-stats.
+
+The dashboard polls network-stats, which used to run three COUNT queries
+per call. The counts are now kept in memory: inserts and deletes of Route
+and FlightStatus rows are tallied per session on flush and applied when
+the transaction commits (and dropped on rollback). Code that bulk-inserts
+past the ORM unit of work calls record() itself. A background thread
+recounts from the database every NETWORK_STATS_RECONCILE_INTERVAL seconds
+so writes made outside the app (seed scripts, other processes) can't make
+the counters drift for long. The thread stops on close(), which close_app()
+and process exit call.
+"""
+
+import atexit
+import threading
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, FlightStatus, Route
+
+PENDING_KEY = 'network_stats_pending'
+
+
+def _today() -> date:
+    # Same UTC day boundary as the FlightStatus.updated_at timestamps
+    return datetime.utcnow().date()
+
+
+class NetworkStatsCache:
+    """saved_routes, total_disruptions_recorded and disruptions_today without querying"""
+
+    def __init__(self, app: Flask, reconcile_interval: float = 60.0):
+        self.app = app
+        self.reconcile_interval = reconcile_interval
+        self.saved_routes = 0
+        self.total_disruptions = 0
+        self.disruptions_by_day: Dict[date, int] = {}
+        self.reconciled_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def apply(self, deltas: Counter):
+        """Add committed changes: 'saved_routes', 'disruptions' and per-day (date) keys"""
+        with self._lock:
+            self.saved_routes += deltas.get('saved_routes', 0)
+            self.total_disruptions += deltas.get('disruptions', 0)
+            for key, amount in deltas.items():
+                if isinstance(key, date):
+                    self.disruptions_by_day[key] = self.disruptions_by_day.get(key, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """Current counters; the first call loads them and starts the reconciler"""
+        if self.reconciled_at is None:
+            self.reconcile()
+        if self._thread is None:
+            self._start()
+        with self._lock:
+            return {
+                "saved_routes": self.saved_routes,
+                "total_disruptions_recorded": self.total_disruptions,
+                "disruptions_today": self.disruptions_by_day.get(_today(), 0)
+            }
+
+    def reconcile(self) -> Dict:
+        """Recount from the database and replace the counters; returns how far they had drifted"""
+        today = _today()
+        with self.app.app_context():
+            saved_routes = Route.query.count()
+            total_disruptions = FlightStatus.query.count()
+            disruptions_today = FlightStatus.query.filter(
+                FlightStatus.updated_at >= datetime.combine(today, datetime.min.time())
+            ).count()
+            db.session.remove()
+
+        with self._lock:
+            drift = {
+                "saved_routes": saved_routes - self.saved_routes,
+                "total_disruptions_recorded": total_disruptions - self.total_disruptions,
+                "disruptions_today": disruptions_today - self.disruptions_by_day.get(today, 0)
+            }
+            self.saved_routes = saved_routes
+            self.total_disruptions = total_disruptions
+            self.disruptions_by_day = {today: disruptions_today}
+            self.reconciled_at = datetime.utcnow()
+        return drift
+
+    def close(self):
+        """Stop the reconciler thread"""
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='network-stats-reconciler', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped.wait(self.reconcile_interval):
+            try:
+                drift = self.reconcile()
+            except Exception as e:
+                print(f"⚠️ Network stats reconciliation failed: {e}")
+                continue
+            if any(drift.values()):
+                print(f"⚠️ Network stats drifted, corrected by {drift}")
+
+
+def record(session, key, amount: int = 1):
+    """Count a change made in session; applied to the cache only if the session commits"""
+    session.info.setdefault(PENDING_KEY, Counter())[key] += amount
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_flushed_objects(session, flush_context):
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            if isinstance(obj, Route):
+                record(session, 'saved_routes', sign)
+            elif isinstance(obj, FlightStatus):
+                record(session, 'disruptions', sign)
+                record(session, (obj.updated_at or datetime.utcnow()).date(), sign)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_counts(session):
+    deltas = session.info.pop(PENDING_KEY, None)
+    if deltas and has_app_context():
+        cache = current_app.extensions.get('network_stats')
+        if cache is not None:
+            cache.apply(deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_counts(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def init_app(app: Flask) -> NetworkStatsCache:
+    cache = NetworkStatsCache(app, app.config['NETWORK_STATS_RECONCILE_INTERVAL'])
+    app.extensions['network_stats'] = cache
+    return cache
+
+
+def get_stats_cache() -> NetworkStatsCache:
+    """The network stats cache of the current app"""
+    return current_app.extensions['network_stats']
@@ -0,0 +1,87 @@
+"""
+Keyset (cursor) pagination for collection endpoints.
+
+Pages are selected with WHERE (key columns) > (last seen values) on indexed
+columns, so fetching page 1000 costs the same as fetching page 1. Cursors are
+opaque URL-safe tokens; clients pass ?cursor=<token>&limit=<n> back verbatim.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from flask import current_app, request
+from sqlalchemy import DateTime, tuple_
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed limit or cursor; routers turn it into a 400"""
+
+
+def wants_pagination() -> bool:
+    """True when the client asked for a page instead of the full collection"""
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def get_page_size(default: Optional[int] = None) -> int:
+    """Page size from ?limit=, capped at API_MAX_PAGE_SIZE"""
+    raw = request.args.get('limit')
+    if raw is None:
+        return default or current_app.config['API_PAGE_SIZE']
+    try:
+        size = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if size < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(size, current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def encode_cursor(kind: str, values: Sequence) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({'k': kind, 'v': payload}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(kind: str, token: str, columns: Sequence) -> List:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        values = data['v']
+        if data['k'] != kind or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def keyset_paginate(query, kind: str, columns: Sequence, key: Callable[[object], Sequence],
+                    limit: int, cursor: Optional[str] = None,
+                    descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of query ordered by columns.
+
+    kind namespaces the cursor so a token from one endpoint is rejected by another;
+    key extracts the column values from a result row. Returns (rows, next_cursor),
+    next_cursor being None on the last page.
+    """
+    if cursor:
+        values = decode_cursor(kind, cursor, columns)
+        if len(columns) == 1:
+            condition = columns[0] < values[0] if descending else columns[0] > values[0]
+        else:
+            condition = tuple_(*columns) < tuple_(*values) if descending else tuple_(*columns) > tuple_(*values)
+        query = query.filter(condition)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(None).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(kind, key(rows[-1]))
+    return rows, next_cursor
@@ -0,0 +1,226 @@
+"""
+Write-behind persistence for computed routes.
+
+/routes/find used to insert and commit a Route row per result before
+responding. Routes are now queued in memory and written by a background
+thread in batched inserts, either when ROUTE_WRITER_BATCH_SIZE records are
+waiting or every ROUTE_WRITER_FLUSH_INTERVAL seconds, whichever comes first.
+A batch that fails to write (e.g. "database is locked") is requeued and
+retried on the following flushes, up to ROUTE_WRITER_MAX_RETRIES times
+(at close, right away with a short backoff).
+Routes are deduplicated by a hash of their airport and flight sequence, each
+leg is written to route_segment so itineraries can be found by flight, and
+the queue is flushed when the process exits.
+
+    get_writer().submit([route_record(source, destination, route)])
+"""
+
+import atexit
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence
+
+from flask import Flask, current_app
+from sqlalchemy import insert
+
+from models import db, Flight, Route as RouteModel, RouteSegment
+import network_stats
+
+# Seconds before the first retry of a failed flush at close; doubles per retry
+CLOSE_RETRY_DELAY = 0.05
+
+
+def route_content_hash(airports: Sequence[str], flights: Sequence[str]) -> str:
+    """Stable identity of a route: SHA-256 over its airport and flight sequence"""
+    payload = json.dumps([list(airports), list(flights)], separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def route_record(source: str, destination: str, route) -> Dict:
+    """Row values for a flight_network.Route, timestamped when it was computed"""
+    return {
+        'source_airport_code': source,
+        'destination_airport_code': destination,
+        'route_type': route.route_type,
+        'total_cost': route.total_cost,
+        'total_duration': route.total_duration,
+        'total_delay_prob': route.total_delay_prob,
+        'airports_sequence': json.dumps(route.airports),
+        'flights_sequence': json.dumps(route.flights),
+        'content_hash': route_content_hash(route.airports, route.flights),
+        'created_at': datetime.utcnow(),
+    }
+
+
+def segment_records(route_id: int, airports: Sequence[str], flights: Sequence[str],
+                    flight_ids: Dict[str, int]) -> List[Dict]:
+    """route_segment rows for a saved route; leg i flies flights[i] from airports[i] to airports[i + 1]"""
+    return [{
+        'route_id': route_id,
+        'leg_index': leg,
+        'flight_id': flight_ids.get(flight_number),
+        'from_airport_code': airports[leg],
+        'to_airport_code': airports[leg + 1],
+    } for leg, flight_number in enumerate(flights)]
+
+
+def flight_ids_for(flight_numbers: Iterable[str]) -> Dict[str, int]:
+    """flight_number -> id for the given flights, in one query"""
+    numbers = set(flight_numbers)
+    if not numbers:
+        return {}
+    return dict(db.session.query(Flight.flight_number, Flight.id)
+                .filter(Flight.flight_number.in_(numbers)))
+
+
+class RouteWriter:
+    """Buffers route records and inserts them in batches off the request thread"""
+
+    def __init__(self, app: Flask, batch_size: int = 100, flush_interval: float = 2.0,
+                 max_retries: int = 5):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        # Consecutive failed flushes of the records at the head of the buffer
+        self._failures = 0
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        # Serialises flushes so the duplicate check and the insert see a consistent table
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    def submit(self, records: List[Dict]):
+        """
+        Queue records for the next batch; never touches the database while the
+        writer runs. After close() nothing would flush them, so they are written
+        right away.
+        """
+        with self._lock:
+            self._buffer.extend(records)
+            pending = len(self._buffer)
+            closed = self._stopped.is_set()
+            if self._thread is None and not closed:
+                self._start()
+        if closed:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows inserted"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            unique = {}
+            for record in batch:
+                unique.setdefault(record['content_hash'], record)
+
+            with self.app.app_context():
+                try:
+                    existing = {
+                        content_hash for (content_hash,) in db.session.query(RouteModel.content_hash)
+                        .filter(RouteModel.content_hash.in_(list(unique)))
+                    }
+                    rows = [record for content_hash, record in unique.items() if content_hash not in existing]
+                    if rows:
+                        self._insert_routes(rows)
+                        # Bulk inserts bypass the flush events network_stats counts from
+                        network_stats.record(db.session, 'saved_routes', len(rows))
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self._requeue(batch, getattr(e, 'orig', e))
+                    return 0
+                finally:
+                    db.session.remove()
+
+            self._failures = 0
+            self.written += len(rows)
+            self.duplicates += len(batch) - len(rows)
+            return len(rows)
+
+    def _requeue(self, batch: List[Dict], error):
+        """Put a failed batch back in front of newer records, or drop it after max_retries"""
+        self._failures += 1
+        if self._failures > self.max_retries:
+            self._failures = 0
+            self.dropped += len(batch)
+            print(f"⚠️ Route writer dropped {len(batch)} routes after {self.max_retries} retries: {error}")
+            return
+        with self._lock:
+            self._buffer[:0] = batch
+        print(f"⚠️ Route writer will retry {len(batch)} routes ({self._failures}/{self.max_retries}): {error}")
+
+    def _insert_routes(self, rows: List[Dict]):
+        """Insert routes and their segments; RETURNING gives the new route ids in row order"""
+        route_ids = db.session.execute(
+            insert(RouteModel).returning(RouteModel.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        legs = [json.loads(row['flights_sequence']) for row in rows]
+        flight_ids = flight_ids_for(number for flights in legs for number in flights)
+        segments = []
+        for route_id, row, flights in zip(route_ids, rows, legs):
+            segments.extend(segment_records(route_id, json.loads(row['airports_sequence']), flights, flight_ids))
+        if segments:
+            db.session.execute(insert(RouteSegment), segments)
+
+    def close(self):
+        """
+        Stop the background thread and write whatever is still queued. No
+        later flush would retry a failed batch, so it is retried here, up to
+        max_retries times, before it is dropped.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        delay = CLOSE_RETRY_DELAY
+        while self.pending():
+            time.sleep(delay)
+            delay *= 2
+            self.flush()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='route-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def init_app(app: Flask) -> RouteWriter:
+    writer = RouteWriter(
+        app,
+        batch_size=app.config['ROUTE_WRITER_BATCH_SIZE'],
+        flush_interval=app.config['ROUTE_WRITER_FLUSH_INTERVAL'],
+        max_retries=app.config['ROUTE_WRITER_MAX_RETRIES'],
+    )
+    app.extensions['route_writer'] = writer
+    return writer
+
+
+def get_writer() -> RouteWriter:
+    """The route writer of the current app"""
+    return current_app.extensions['route_writer']
@@ -1,25 +1,184 @@
+from collections import Counter
+
 from flask import Blueprint, jsonify, request
-from models import db, Booking
+from sqlalchemy import update
+from models import db, Booking, Flight
+from flight_network import flight_network
+from pagination import PaginationError, get_page_size, keyset_paginate, wants_pagination
+from streaming import STREAM_BATCH_SIZE, stream_mode, streamed_response
 
 bookings_blueprint = Blueprint('bookings', __name__, url_prefix='/bookings')
 
+MAX_BULK_BOOKINGS = 500
+
+# Fields a client may set on a booking; id, status and dates are the server's
+BOOKING_FIELDS = ('user_name', 'flight_id', 'route_id')
+
+def _unexpected_fields(item):
+    return sorted(set(item) - set(BOOKING_FIELDS))
+
+def _new_booking(item):
+    return Booking(**{field: item[field] for field in BOOKING_FIELDS if field in item})
+
+def _reserve_seats(flight_id, seats):
+    """
+    Atomically take `seats` seats on a flight inside the current transaction.
+    
+    The capacity check and the increment are one conditional UPDATE, so
+    concurrent bookings can never push seats_booked past max_capacity.
+    Returns the flight number, or None when the flight does not have that
+    many seats left.
+    """
+    return db.session.execute(
+        update(Flight)
+        .where(Flight.id == flight_id, Flight.seats_booked + seats <= Flight.max_capacity)
+        .values(seats_booked=Flight.seats_booked + seats)
+        .returning(Flight.flight_number)
+    ).scalar_one_or_none()
+
+def _reservation_error(flight_id):
+    if db.session.get(Flight, flight_id) is None:
+        return jsonify({"error": f"Flight {flight_id} not found"}), 404
+    return jsonify({"error": f"Flight {flight_id} does not have enough seats left", "flight_id": flight_id}), 409
+
+def _booking_dict(b):
+    return {
+        "id": b.id,
+        "user_name": b.user_name,
+        "flight_id": b.flight_id,
+        "status": b.status
+    }
+
 @bookings_blueprint.route('/', methods=['GET'])
 def get_bookings():
-    bookings = Booking.query.all()
-    result = [
-        {
-            "id": b.id,
-            "user_name": b.user_name,
-            "flight_id": b.flight_id,
-            "status": b.status
-        } for b in bookings
-    ]
-    return jsonify(result)
+    """
+    All bookings; ?limit= / ?cursor= page by id with the next token in X-Next-Cursor.
+    Accept: application/x-ndjson or application/stream+json streams them instead.
+    """
+    next_cursor = None
+    if wants_pagination():
+        try:
+            bookings, next_cursor = keyset_paginate(
+                Booking.query, 'bookings', [Booking.id], lambda b: [b.id],
+                get_page_size(), request.args.get('cursor')
+            )
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        mode = stream_mode()
+        if mode:
+            bookings = Booking.query.order_by(Booking.id).yield_per(STREAM_BATCH_SIZE)
+            return streamed_response(bookings, _booking_dict, mode)
+        bookings = Booking.query.all()
+    response = jsonify([_booking_dict(b) for b in bookings])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @bookings_blueprint.route('/add', methods=['POST'])
 def add_booking():
-    data = request.json
-    booking = Booking(**data)
-    db.session.add(booking)
-    db.session.commit()
-    return jsonify({"message": "Booking created"}), 201
+    """Book one seat; 409 when the flight is full"""
+    data = request.json or {}
+    if not isinstance(data, dict) or not data.get('flight_id') or not data.get('user_name'):
+        return jsonify({"error": "user_name and flight_id are required"}), 400
+    unexpected = _unexpected_fields(data)
+    if unexpected:
+        return jsonify({"error": f"Unexpected booking fields: {', '.join(unexpected)}"}), 400
+    
+    # Read before the booking is written: a rebuild after this already counts it
+    seats_version, built_from = flight_network.seats_version, flight_network.built_from
+    try:
+        flight_number = _reserve_seats(data['flight_id'], 1)
+        if flight_number is None:
+            db.session.rollback()
+            return _reservation_error(data['flight_id'])
+        booking = _new_booking(data)
+        db.session.add(booking)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    
+    # Keep capacity-aware routing current without rebuilding the network
+    flight_network.adjust_remaining_seats(flight_number, -1, seats_version)
+    flight_network.seats_written(built_from)
+    return jsonify({"message": "Booking created", "booking_id": booking.id}), 201
+
+@bookings_blueprint.route('/bulk', methods=['POST'])
+def add_bookings_bulk():
+    """
+    Book many seats in one transaction: either every booking in
+    {"bookings": [{"user_name", "flight_id", "route_id"?}, ...]} is made or none is.
+    """
+    items = (request.json or {}).get('bookings')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "bookings must be a non-empty list"}), 400
+    if len(items) > MAX_BULK_BOOKINGS:
+        return jsonify({"error": f"At most {MAX_BULK_BOOKINGS} bookings per request"}), 400
+    if not all(isinstance(item, dict) and item.get('flight_id') and item.get('user_name') for item in items):
+        return jsonify({"error": "Every booking needs user_name and flight_id"}), 400
+    unexpected = sorted({field for item in items for field in _unexpected_fields(item)})
+    if unexpected:
+        return jsonify({"error": f"Unexpected booking fields: {', '.join(unexpected)}"}), 400
+    
+    seats_version, built_from = flight_network.seats_version, flight_network.built_from
+    try:
+        # One counter update per flight, in id order so concurrent bulk requests lock consistently
+        seats_per_flight = Counter(item['flight_id'] for item in items)
+        reserved = {}
+        for flight_id in sorted(seats_per_flight):
+            flight_number = _reserve_seats(flight_id, seats_per_flight[flight_id])
+            if flight_number is None:
+                db.session.rollback()
+                return _reservation_error(flight_id)
+            reserved[flight_number] = seats_per_flight[flight_id]
+        
+        bookings = [_new_booking(item) for item in items]
+        db.session.add_all(bookings)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    
+    for flight_number, seats in reserved.items():
+        flight_network.adjust_remaining_seats(flight_number, -seats, seats_version)
+    flight_network.seats_written(built_from)
+    
+    return jsonify({
+        "message": f"{len(bookings)} bookings created",
+        "booking_ids": [b.id for b in bookings]
+    }), 201
+
+@bookings_blueprint.route('/<int:booking_id>/cancel', methods=['POST'])
+def cancel_booking(booking_id):
+    """Cancel a booking and release its seat"""
+    seats_version, built_from = flight_network.seats_version, flight_network.built_from
+    try:
+        booking = db.session.get(Booking, booking_id)
+        if booking is None:
+            return jsonify({"error": "Booking not found"}), 404
+        
+        # Only the request that actually flips the status releases the seat
+        cancelled = db.session.execute(
+            update(Booking)
+            .where(Booking.id == booking_id, Booking.status != 'cancelled')
+            .values(status='cancelled')
+        ).rowcount
+        released = None
+        if cancelled:
+            released = db.session.execute(
+                update(Flight)
+                .where(Flight.id == booking.flight_id, Flight.seats_booked > 0)
+                .values(seats_booked=Flight.seats_booked - 1)
+                .returning(Flight.flight_number)
+            ).scalar_one_or_none()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+    
+    if released:
+        flight_network.adjust_remaining_seats(released, 1, seats_version)
+        flight_network.seats_written(built_from)
+    
+    return jsonify({"message": "Booking cancelled", "booking_id": booking_id}), 200
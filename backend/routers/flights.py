@@ -1,116 +1,191 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased, contains_eager
 from models import db, Flight, Airport, FlightStatus
 from flight_network import flight_network
+from pagination import PaginationError, get_page_size, keyset_paginate, wants_pagination
+from streaming import STREAM_BATCH_SIZE, stream_mode, streamed_response
+from data_version import cached_json
+from serialization import serialize_airport, serialize_flight, serialize_flight_status
 from datetime import datetime
 
 flights_blueprint = Blueprint('flights', __name__, url_prefix='/flights')
 
+SourceAirport = aliased(Airport, name='source_airport')
+DestinationAirport = aliased(Airport, name='destination_airport')
+
+def _parse_clock(value: str) -> str:
+    """Normalise an HH:MM argument so it compares correctly with departure_time"""
+    return datetime.strptime(value, '%H:%M').strftime('%H:%M')
+
+def _flights_with_status_query():
+    """
+    One query for flights, their airports and latest status.
+    
+    The latest status row is a correlated subquery served by
+    ix_flight_status_flight_id_updated_at, so the listing is a single round
+    trip and a LIMITed page only does index lookups for the flights it
+    returns. Booked seats come from the flight.seats_booked counter.
+    """
+    latest_status_id = db.session.query(FlightStatus.id).filter(
+        FlightStatus.flight_id == Flight.id
+    ).order_by(
+        FlightStatus.updated_at.desc(), FlightStatus.id.desc()
+    ).limit(1).correlate(Flight).scalar_subquery()
+    
+    return db.session.query(
+        Flight,
+        FlightStatus.status,
+        FlightStatus.delay_minutes
+    ).outerjoin(
+        SourceAirport, Flight.source_id == SourceAirport.id
+    ).outerjoin(
+        DestinationAirport, Flight.destination_id == DestinationAirport.id
+    ).outerjoin(
+        FlightStatus, FlightStatus.id == latest_status_id
+    ).options(
+        contains_eager(Flight.source.of_type(SourceAirport)),
+        contains_eager(Flight.destination.of_type(DestinationAirport))
+    ).order_by(Flight.id)
+
+def _flight_row_dict(row):
+    """Listing entry for a (Flight, latest status, delay minutes) row"""
+    f, status, delay_minutes = row
+    data = serialize_flight(f)
+    data["status"] = status or "on_time"
+    data["delay_minutes"] = delay_minutes if status else 0
+    return data
+
+# Tables the flight listing is built from; their versions make its ETag
+FLIGHT_LISTING_TABLES = ('flight', 'airport', 'flight_status')
+
 @flights_blueprint.route('/', methods=['GET'])
 def get_flights():
-    """Get all flights with enhanced information"""
-    flights = Flight.query.all()
-    result = []
-    
-    for f in flights:
-        # Get latest status
-        latest_status = FlightStatus.query.filter_by(flight_id=f.id).order_by(
-            FlightStatus.updated_at.desc()
-        ).first()
-        
-        flight_data = {
-            "id": f.id,
-            "flight_number": f.flight_number,
-            "source": {
-                "code": f.source.code,
-                "name": f.source.name,
-                "city": f.source.city
-            },
-            "destination": {
-                "code": f.destination.code,
-                "name": f.destination.name,
-                "city": f.destination.city
-            },
-            "duration": f.duration,
-            "price": f.price,
-            "delay_prob": f.delay_prob,
-            "departure_time": f.departure_time,
-            "arrival_time": f.arrival_time,
-            "aircraft_type": f.aircraft_type,
-            "max_capacity": f.max_capacity,
-            "current_bookings": 0,  # TODO: Calculate from bookings
-            "status": latest_status.status if latest_status else "on_time",
-            "delay_minutes": latest_status.delay_minutes if latest_status else 0
-        }
-        
-        result.append(flight_data)
+    """
+    Get all flights with enhanced information.
+    
+    Pass ?limit= and/or ?cursor= to page through the flights by id; the token
+    for the next page is returned in the X-Next-Cursor header. Without them,
+    Accept: application/x-ndjson or application/stream+json streams every flight.
+    Buffered responses carry an ETag and are cached until the data changes.
+    """
+    mode = None if wants_pagination() else stream_mode()
+    if mode:
+        query = _flights_with_status_query().yield_per(STREAM_BATCH_SIZE)
+        return streamed_response(query, _flight_row_dict, mode)
+    return cached_json('flights', FLIGHT_LISTING_TABLES, _flight_listing)
+
+def _flight_listing():
+    query = _flights_with_status_query()
+    next_cursor = None
+    
+    if wants_pagination():
+        try:
+            rows, next_cursor = keyset_paginate(
+                query, 'flights', [Flight.id], lambda row: [row[0].id],
+                get_page_size(), request.args.get('cursor')
+            )
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        rows = query.all()
     
-    return jsonify(result)
+    response = jsonify([_flight_row_dict(row) for row in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @flights_blueprint.route('/airports', methods=['GET'])
 def get_airports():
     """Get all airports"""
-    airports = Airport.query.all()
-    result = []
-    
-    for airport in airports:
-        airport_data = {
-            "id": airport.id,
-            "code": airport.code,
-            "name": airport.name,
-            "city": airport.city,
-            "latitude": airport.latitude,
-            "longitude": airport.longitude,
-            "timezone": airport.timezone
-        }
-        result.append(airport_data)
-    
-    return jsonify(result)
+    return cached_json('airports', ('airport',), _airport_listing)
+
+def _airport_listing():
+    return jsonify([serialize_airport(airport) for airport in Airport.query.all()])
+
+# query arg -> (parser, column, comparison) for the numeric/text search filters
+SEARCH_FILTERS = {
+    'min_price': (float, Flight.price, '>='),
+    'max_price': (float, Flight.price, '<='),
+    'min_duration': (float, Flight.duration, '>='),
+    'max_duration': (float, Flight.duration, '<='),
+    'max_delay_prob': (float, Flight.delay_prob, '<='),
+    'departure_after': (_parse_clock, Flight.departure_time, '>='),
+    'departure_before': (_parse_clock, Flight.departure_time, '<='),
+    'aircraft_type': (str, Flight.aircraft_type, '=='),
+}
+
+def _search_query(args):
+    """
+    Compile the /flights/search arguments into one joined query.
+    
+    Airport codes are matched on the joined airport rows rather than looked
+    up separately, and every filter becomes a WHERE clause on a flight column.
+    Returns (query, search_criteria); raises ValueError for a malformed argument.
+    """
+    query = _flights_with_status_query()
+    criteria = {}
+    
+    if args.get('source'):
+        criteria['source'] = args['source']
+        query = query.filter(SourceAirport.code == args['source'])
+    if args.get('destination'):
+        criteria['destination'] = args['destination']
+        query = query.filter(DestinationAirport.code == args['destination'])
+    
+    for name, (parse, column, op) in SEARCH_FILTERS.items():
+        raw = args.get(name)
+        if raw in (None, ''):
+            continue
+        try:
+            value = parse(raw)
+        except ValueError:
+            raise ValueError(f"Invalid value for {name}: {raw}")
+        criteria[name] = value
+        if op == '>=':
+            query = query.filter(column >= value)
+        elif op == '<=':
+            query = query.filter(column <= value)
+        else:
+            query = query.filter(column == value)
+    
+    status = args.get('status')
+    if status:
+        criteria['status'] = status
+        if status == 'on_time':
+            query = query.filter(or_(FlightStatus.id.is_(None), FlightStatus.status == 'on_time'))
+        else:
+            query = query.filter(FlightStatus.status == status)
+    
+    return query, criteria
 
 @flights_blueprint.route('/search', methods=['GET'])
 def search_flights():
-    """Search flights by source and destination"""
-    source = request.args.get('source')
-    destination = request.args.get('destination')
-    
-    query = Flight.query
-    
-    if source:
-        source_airport = Airport.query.filter_by(code=source).first()
-        if source_airport:
-            query = query.filter_by(source_id=source_airport.id)
+    """
+    Search flights by route, price, duration, departure window, aircraft and reliability.
+    
+    Query args: source, destination, min_price, max_price, min_duration,
+    max_duration, departure_after, departure_before (HH:MM), aircraft_type,
+    max_delay_prob and status.
+    """
+    try:
+        query, criteria = _search_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    if destination:
-        dest_airport = Airport.query.filter_by(code=destination).first()
-        if dest_airport:
-            query = query.filter_by(destination_id=dest_airport.id)
-    
-    flights = query.all()
     result = []
     
-    for f in flights:
-        flight_data = {
-            "id": f.id,
-            "flight_number": f.flight_number,
-            "source": {
-                "code": f.source.code,
-                "name": f.source.name,
-                "city": f.source.city
-            },
-            "destination": {
-                "code": f.destination.code,
-                "name": f.destination.name,
-                "city": f.destination.city
-            },
-            "duration": f.duration,
-            "price": f.price,
-            "delay_prob": f.delay_prob,
-            "departure_time": f.departure_time,
-            "arrival_time": f.arrival_time,
-            "aircraft_type": f.aircraft_type
-        }
+    for row in query:
+        flight_data = _flight_row_dict(row)
+        f = row[0]
+        flight_data["availability"] = max((f.max_capacity or 0) - f.seats_booked, 0)
         result.append(flight_data)
     
-    return jsonify(result)
+    return jsonify({
+        "flights": result,
+        "count": len(result),
+        "search_criteria": criteria
+    })
 
 @flights_blueprint.route('/status/<flight_number>', methods=['GET'])
 def get_flight_status(flight_number):
@@ -126,13 +201,7 @@ def get_flight_status(flight_number):
     ).first()
     
     if latest_status:
-        return jsonify({
-            "flight_number": flight.flight_number,
-            "status": latest_status.status,
-            "delay_minutes": latest_status.delay_minutes,
-            "reason": latest_status.reason,
-            "updated_at": latest_status.updated_at.isoformat()
-        })
+        return jsonify({"flight_number": flight.flight_number, **serialize_flight_status(latest_status)})
     else:
         return jsonify({
             "flight_number": flight.flight_number,
@@ -169,7 +238,7 @@ def simulate_delay():
     db.session.commit()
     
     # Trigger re-routing for affected passengers
-    flight_network.handle_disruption(flight_number, 'delayed', delay_minutes)
+    flight_network.handle_flight_delay(flight_number, delay_minutes)
     
     return jsonify({
         "message": f"Simulated {delay_minutes} minute delay for flight {flight_number}",
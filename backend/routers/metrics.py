@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from metrics import registry
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request phase timings in Prometheus text format"""
+    return Response(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
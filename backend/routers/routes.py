@@ -1,17 +1,38 @@
-from flask import Blueprint, jsonify, request, make_response
-from models import db, Flight, Airport, Route as RouteModel, FlightStatus
-from flight_network import flight_network, Route
-from map_visualization import create_route_map, create_network_overview_map, create_multiple_routes_comparison
+from flask import Blueprint, current_app, jsonify, request, make_response
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from models import db, Flight, Airport, Route as RouteModel, RouteSegment, FlightStatus, Booking
+from flight_network import flight_network, Route, SearchStats
+from map_visualization import (
+    create_route_map, create_network_overview_map, create_multiple_routes_comparison, render_map_html
+)
+from metrics import phase_timer, set_request_labels
+from pagination import PaginationError, get_page_size, keyset_paginate
+from route_writer import get_writer, route_record
+from network_stats import get_stats_cache
+from data_version import cached_json, content_etag
+from serialization import serialize_route
+from map_cache import comparison_map_key, get_map_cache, route_map_key
+from map_prerender import get_prerenderer
+from network_geojson import comparison_collection, network_geometry, route_collection
+from streaming import stream_mode, streamed_response
 import json
+import statistics
+from collections import Counter
 from datetime import datetime
 
 routes_blueprint = Blueprint('routes', __name__, url_prefix='/routes')
 
+def _current_network():
+    """Rebuild the flight graph only if flights or airports changed (bookings adjust it in place)"""
+    flight_network.build_network_if_stale(current_app.config['NETWORK_MAX_AGE'])
+
 @routes_blueprint.route('/build-network', methods=['POST'])
 def build_network():
     """Build or rebuild the flight network graph"""
     try:
         flight_network.build_network()
+        get_prerenderer().refresh()
         stats = flight_network.get_network_statistics()
         return jsonify({
             "message": "Flight network built successfully",
@@ -30,94 +51,95 @@ def find_optimal_routes():
         algorithm = data.get('algorithm', 'dijkstra')  # dijkstra or a_star
         optimization = data.get('optimization', 'cost')  # cost, time, reliability
         num_routes = data.get('num_routes', 3)
+        min_seats = data.get('min_seats', 0)  # party size: skip flights with fewer free seats
         
         if not source or not destination:
             return jsonify({"error": "Source and destination are required"}), 400
+        if not isinstance(min_seats, int) or isinstance(min_seats, bool) or min_seats < 0:
+            return jsonify({"error": "min_seats must be a non-negative integer"}), 400
+        
+        set_request_labels(algorithm=algorithm, optimization=optimization)
         
         # Ensure network is built
-        flight_network.build_network()
+        _current_network()
         
-        if algorithm == 'multiple':
-            routes = flight_network.find_multiple_routes(source, destination, num_routes)
-        elif algorithm == 'a_star':
-            route = flight_network.a_star_shortest_path(source, destination, optimization)
-            routes = [route] if route else []
-        else:  # dijkstra
-            route = flight_network.dijkstra_shortest_path(source, destination, optimization)
-            routes = [route] if route else []
+        search = {'algorithm': algorithm, 'optimization': optimization,
+                  'num_routes': num_routes, 'min_seats': min_seats}
+        with phase_timer('search'):
+            routes = flight_network.search(source, destination, **search)
+        
+        # Popular pairs get their map rendered in the background before it is asked for
+        get_prerenderer().routes_computed(source, destination, search, routes)
         
         if not routes:
             return jsonify({"message": "No routes found between the specified airports"}), 404
         
-        # Save routes to database and format response
-        result_routes = []
-        for route in routes:
-            # Save to database
-            route_model = RouteModel(
-                source_airport_code=source,
-                destination_airport_code=destination,
-                route_type=route.route_type,
-                total_cost=route.total_cost,
-                total_duration=route.total_duration,
-                total_delay_prob=route.total_delay_prob,
-                airports_sequence=json.dumps(route.airports),
-                flights_sequence=json.dumps(route.flights)
-            )
-            db.session.add(route_model)
+        # Queue routes for the background writer instead of committing on the request path
+        with phase_timer('persist'):
+            get_writer().submit([route_record(source, destination, route) for route in routes])
+        
+        # Format response
+        with phase_timer('serialize'):
+            result_routes = [route.to_dict() for route in routes]
             
-            result_routes.append({
-                "route_type": route.route_type,
-                "airports": route.airports,
-                "flights": route.flights,
-                "total_cost": round(route.total_cost, 2),
-                "total_duration": round(route.total_duration, 2),
-                "average_delay_probability": round(route.total_delay_prob, 3),
-                "stops": len(route.airports) - 2  # Excluding source and destination
+            response = jsonify({
+                "source": source,
+                "destination": destination,
+                "algorithm_used": algorithm,
+                "optimization_criteria": optimization,
+                "routes_found": len(result_routes),
+                "routes": result_routes
             })
         
-        db.session.commit()
-        
-        return jsonify({
-            "source": source,
-            "destination": destination,
-            "algorithm_used": algorithm,
-            "optimization_criteria": optimization,
-            "routes_found": len(result_routes),
-            "routes": result_routes
-        }), 200
+        return response, 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+def _prediction_dict(prediction):
+    flight_number, source, destination, delay_prob = prediction
+    return {
+        "flight_number": flight_number,
+        "source": source,
+        "destination": destination,
+        "predicted_delay_probability": round(delay_prob, 3),
+        "risk_level": "high" if delay_prob > 0.5 else "medium" if delay_prob > 0.2 else "low"
+    }
+
 @routes_blueprint.route('/delay-prediction', methods=['GET'])
 def get_delay_predictions():
-    """Get delay predictions for all flights"""
+    """
+    Get delay predictions for all flights.
+    
+    Route codes come from the graph, so no per-flight queries are needed.
+    Accept: application/x-ndjson or application/stream+json streams the
+    predictions as they are computed.
+    """
     try:
-        flight_network.build_network()
-        predictions = flight_network.predict_delays()
-        
-        # Format predictions with flight details
-        result = []
-        for flight_number, delay_prob in predictions.items():
-            flight = Flight.query.filter_by(flight_number=flight_number).first()
-            if flight:
-                result.append({
-                    "flight_number": flight_number,
-                    "source": flight.source.code,
-                    "destination": flight.destination.code,
-                    "predicted_delay_probability": round(delay_prob, 3),
-                    "risk_level": "high" if delay_prob > 0.5 else "medium" if delay_prob > 0.2 else "low"
-                })
+        _current_network()
+        generated_at = datetime.utcnow().isoformat()
+        
+        mode = stream_mode()
+        if mode:
+            return streamed_response(flight_network.iter_delay_predictions(), _prediction_dict, mode,
+                                     key="predictions", envelope={"generated_at": generated_at})
+        
+        with phase_timer('predict'):
+            result = [_prediction_dict(p) for p in flight_network.iter_delay_predictions()]
         
         return jsonify({
             "predictions": result,
-            "generated_at": datetime.utcnow().isoformat()
+            "generated_at": generated_at
         }), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _itineraries_using(flight_id):
+    """Ids of saved routes with a leg on flight_id (served by ix_route_segment_flight_id)"""
+    return db.session.query(RouteSegment.route_id).filter(RouteSegment.flight_id == flight_id).distinct()
+
 @routes_blueprint.route('/handle-disruption', methods=['POST'])
 def handle_flight_disruption():
     """Handle flight delays or cancellations and find alternative routes"""
@@ -147,28 +169,50 @@ def handle_flight_disruption():
         # Update flight status
         flight.status = 'cancelled' if disruption_type == 'cancellation' else 'delayed'
         
-        # Handle the disruption in the network
+        # Handle the disruption in the network (applied to the current graph in place)
+        _current_network()
         if disruption_type == 'cancellation':
             flight_network.handle_flight_cancellation(flight_number)
         else:
             flight_network.handle_flight_delay(flight_number, delay_minutes)
         
-        # Find affected bookings and suggest alternatives
-        affected_bookings = flight.bookings
+        # Bookings on the flight itself or on a saved itinerary that uses it
+        affected_bookings = Booking.query.options(joinedload(Booking.route)).filter(or_(
+            Booking.flight_id == flight.id,
+            Booking.route_id.in_(_itineraries_using(flight.id))
+        )).all()
         alternatives = []
         
+        # Rebook the whole itinerary if there is one, otherwise the disrupted leg
+        trips = {}
         for booking in affected_bookings:
-            # Find alternative routes from source to destination
-            alt_routes = flight_network.find_multiple_routes(
-                flight.source.code, 
-                flight.destination.code, 
-                3
-            )
+            if booking.route is not None:
+                trips[booking.id] = (booking.route.source_airport_code, booking.route.destination_airport_code)
+            else:
+                trips[booking.id] = (flight.source.code, flight.destination.code)
+        
+        # Passengers sharing an origin and destination are rerouted as a group,
+        # so only flights with a seat for every one of them are considered
+        group_sizes = Counter(trips.values())
+        searched = {}
+        for (origin, final_destination), group_size in group_sizes.items():
+            with phase_timer('search', algorithm='multiple'):
+                searched[origin, final_destination] = flight_network.find_multiple_routes(
+                    origin,
+                    final_destination,
+                    3,
+                    min_seats=group_size
+                )
+        
+        for booking in affected_bookings:
+            origin, final_destination = trips[booking.id]
+            alt_routes = searched[origin, final_destination]
             
             if alt_routes:
                 alternatives.append({
                     "booking_id": booking.id,
                     "passenger": booking.user_name,
+                    "route_id": booking.route_id,
                     "alternative_routes": [{
                         "route_type": route.route_type,
                         "airports": route.airports,
@@ -179,7 +223,9 @@ def handle_flight_disruption():
                     } for route in alt_routes]
                 })
         
-        db.session.commit()
+        with phase_timer('persist'):
+            db.session.commit()
+        get_prerenderer().refresh()
         
         return jsonify({
             "message": f"Flight {flight_number} {disruption_type} handled successfully",
@@ -187,6 +233,7 @@ def handle_flight_disruption():
             "disruption_type": disruption_type,
             "delay_minutes": delay_minutes if disruption_type == 'delay' else None,
             "affected_passengers": len(affected_bookings),
+            "affected_itineraries": _itineraries_using(flight.id).count(),
             "alternative_routes_found": len(alternatives),
             "alternatives": alternatives
         }), 200
@@ -197,58 +244,110 @@ def handle_flight_disruption():
 
 @routes_blueprint.route('/network-stats', methods=['GET'])
 def get_network_statistics():
-    """Get flight network statistics"""
+    """
+    Get flight network statistics.
+    
+    Served from counters: edge aggregates maintained by FlightNetwork and
+    database counts cached by network_stats, so polling it costs no queries
+    unless flights or airports changed. The graph is rebuilt when they were
+    written, and at least once per reconcile interval for writes made
+    outside this process. The ETag is a hash of the stats, so unchanged
+    stats answer 304.
+    """
     try:
-        flight_network.build_network()
+        cache = get_stats_cache()
+        flight_network.build_network_if_stale(cache.reconcile_interval)
         stats = flight_network.get_network_statistics()
+        stats.update(cache.snapshot())
         
-        # Add additional database statistics
-        total_routes = RouteModel.query.count()
-        total_disruptions = FlightStatus.query.count()
-        recent_disruptions = FlightStatus.query.filter(
-            FlightStatus.updated_at >= datetime.utcnow().replace(hour=0, minute=0, second=0)
-        ).count()
-        
-        stats.update({
-            "saved_routes": total_routes,
-            "total_disruptions_recorded": total_disruptions,
-            "disruptions_today": recent_disruptions
-        })
-        
-        return jsonify(stats), 200
+        return content_etag('network-stats', stats)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@routes_blueprint.route('/saved-routes', methods=['GET'])
-def get_saved_routes():
-    """Get all saved routes from database"""
+@routes_blueprint.route('/affected-itineraries/<flight_number>', methods=['GET'])
+def get_affected_itineraries(flight_number):
+    """Saved routes that include the given flight, with the leg it is flown on"""
     try:
-        routes = RouteModel.query.order_by(RouteModel.created_at.desc()).limit(50).all()
+        flight = Flight.query.filter_by(flight_number=flight_number).first()
+        if not flight:
+            return jsonify({"error": "Flight not found"}), 404
+        
+        rows = db.session.query(RouteModel, RouteSegment.leg_index).join(
+            RouteSegment, RouteSegment.route_id == RouteModel.id
+        ).filter(RouteSegment.flight_id == flight.id).order_by(RouteModel.id).all()
         
-        result = []
-        for route in routes:
-            result.append({
+        return jsonify({
+            "flight_number": flight_number,
+            "itineraries": [{
                 "id": route.id,
                 "source": route.source_airport_code,
                 "destination": route.destination_airport_code,
                 "route_type": route.route_type,
-                "total_cost": route.total_cost,
-                "total_duration": route.total_duration,
-                "delay_probability": route.total_delay_prob,
                 "airports": json.loads(route.airports_sequence),
                 "flights": json.loads(route.flights_sequence),
-                "created_at": route.created_at.isoformat()
-            })
+                "leg_index": leg_index
+            } for route, leg_index in rows],
+            "count": len(rows)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+SAVED_ROUTES_PAGE_SIZE = 50
+
+@routes_blueprint.route('/saved-routes', methods=['GET'])
+def get_saved_routes():
+    """
+    Get saved routes from database, newest first.
+    
+    Returns SAVED_ROUTES_PAGE_SIZE routes unless ?limit= says otherwise; pass
+    the returned next_cursor back as ?cursor= for the following page.
+    """
+    try:
+        routes, next_cursor = keyset_paginate(
+            RouteModel.query, 'saved-routes', [RouteModel.created_at, RouteModel.id],
+            lambda route: [route.created_at, route.id],
+            get_page_size(SAVED_ROUTES_PAGE_SIZE), request.args.get('cursor'),
+            descending=True
+        )
+        
+        result = [serialize_route(route) for route in routes]
         
         return jsonify({
             "routes": result,
-            "total_count": len(result)
+            "total_count": len(result),
+            "next_cursor": next_cursor
         }), 200
         
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MAX_COMPARE_REPEAT = 100
+
+def _run_with_effort(search, source, destination, optimization, repeat):
+    """Run a search `repeat` times; return its route, work counters and timing statistics"""
+    route = None
+    effort = None
+    wall_times = []
+    for _ in range(repeat):
+        stats = SearchStats()
+        route = search(source, destination, optimization, stats)
+        wall_times.append(stats.wall_time_ms)
+        # Counters are deterministic, so the first run is representative
+        effort = effort or stats.to_dict()
+    
+    effort["wall_time_ms"] = {
+        "min": round(min(wall_times), 4),
+        "mean": round(statistics.mean(wall_times), 4),
+        "median": round(statistics.median(wall_times), 4),
+        "max": round(max(wall_times), 4),
+        "stdev": round(statistics.stdev(wall_times), 4) if len(wall_times) > 1 else 0.0
+    }
+    return route, effort
+
 @routes_blueprint.route('/compare-algorithms', methods=['POST'])
 def compare_algorithms():
     """Compare Dijkstra vs A* algorithms for the same route"""
@@ -257,17 +356,25 @@ def compare_algorithms():
         source = data.get('source')
         destination = data.get('destination')
         optimization = data.get('optimization', 'cost')
+        repeat = data.get('repeat', 1)
         
         if not source or not destination:
             return jsonify({"error": "Source and destination are required"}), 400
+        if not isinstance(repeat, int) or isinstance(repeat, bool) or not 1 <= repeat <= MAX_COMPARE_REPEAT:
+            return jsonify({"error": f"repeat must be an integer between 1 and {MAX_COMPARE_REPEAT}"}), 400
         
-        flight_network.build_network()
+        set_request_labels(optimization=optimization)
+        _current_network()
         
         # Run Dijkstra
-        dijkstra_route = flight_network.dijkstra_shortest_path(source, destination, optimization)
+        with phase_timer('search', algorithm='dijkstra'):
+            dijkstra_route, dijkstra_effort = _run_with_effort(
+                flight_network.dijkstra_shortest_path, source, destination, optimization, repeat)
         
         # Run A*
-        astar_route = flight_network.a_star_shortest_path(source, destination, optimization)
+        with phase_timer('search', algorithm='a_star'):
+            astar_route, astar_effort = _run_with_effort(
+                flight_network.a_star_shortest_path, source, destination, optimization, repeat)
         
         result = {
             "source": source,
@@ -300,7 +407,12 @@ def compare_algorithms():
             result["comparison"] = {
                 "same_route": dijkstra_route.flights == astar_route.flights,
                 "cost_difference": round(abs(dijkstra_route.total_cost - astar_route.total_cost), 2),
-                "time_difference": round(abs(dijkstra_route.total_duration - astar_route.total_duration), 2)
+                "time_difference": round(abs(dijkstra_route.total_duration - astar_route.total_duration), 2),
+                "repeat": repeat,
+                "search_effort": {
+                    "dijkstra": dijkstra_effort,
+                    "a_star": astar_effort
+                }
             }
         
         return jsonify(result), 200
@@ -308,6 +420,72 @@ def compare_algorithms():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+GEOJSON = 'application/geo+json'
+
+def _geometry():
+    """GeoJSON geometry for the current network, rebuilt when flights or airports changed"""
+    _current_network()
+    return network_geometry(flight_network)
+
+def _geojson_response(collection):
+    response = jsonify(collection)
+    response.mimetype = GEOJSON
+    return response
+
+@routes_blueprint.route('/geojson/network', methods=['GET'])
+def geojson_network():
+    """
+    The whole network as a GeoJSON FeatureCollection: airports as points,
+    flights as great-circle LineStrings. Cached with an ETag per graph version.
+    """
+    try:
+        geometry = _geometry()
+        return cached_json('geojson-network', (), lambda: _geojson_response(geometry.network_collection()),
+                           extra=(geometry.version,))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@routes_blueprint.route('/geojson/route', methods=['POST'])
+def geojson_route():
+    """One route (same body as /visualize-route) as a GeoJSON FeatureCollection"""
+    try:
+        data = request.get_json()
+        if not data or not data.get('airports'):
+            return jsonify({"error": "Airports sequence is required"}), 400
+        
+        collection = route_collection(_geometry(), data['airports'], data.get('flights', []),
+                                      data.get('route_type', 'optimal'))
+        return _geojson_response(collection)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@routes_blueprint.route('/geojson/comparison', methods=['POST'])
+def geojson_comparison():
+    """Several routes (same body as /visualize-comparison), legs tagged with route_index"""
+    try:
+        data = request.get_json()
+        routes_data = (data or {}).get('routes', [])
+        if not routes_data:
+            return jsonify({"error": "Routes data is required"}), 400
+        
+        return _geojson_response(comparison_collection(_geometry(), routes_data))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _render_route_map(airports_sequence, flights_sequence, route_type):
+    """Full HTML document for a route map, or None if it could not be built"""
+    # Create the map
+    with phase_timer('build_map'):
+        map_viz = create_route_map(airports_sequence, flights_sequence, route_type)
+    
+    if not map_viz:
+        return None
+    
+    with phase_timer('render'):
+        map_html = render_map_html(map_viz)
+    
+    return map_html
+
 @routes_blueprint.route('/visualize-route', methods=['POST'])
 def visualize_route():
     """Generate Folium map visualization for a specific route"""
@@ -325,33 +503,14 @@ def visualize_route():
         if not airports_sequence:
             return jsonify({"error": "Airports sequence is required"}), 400
         
-        print(f"[DEBUG] Creating map for airports: {airports_sequence}")
-        
-        # Create the map
-        map_viz = create_route_map(airports_sequence, flights_sequence, route_type)
-        
-        if not map_viz:
-            return jsonify({"error": "Failed to create map"}), 500
-        
-        # Get the HTML content and extract just the map div content
-        map_html = map_viz._repr_html_()
-        
-        if not map_html:
-            return jsonify({"error": "Failed to generate map HTML"}), 500
-        
-        # Extract just the inner content without the outer iframe wrapper
-        import re
-        
-        # Find the srcdoc content from the iframe
-        srcdoc_match = re.search(r'srcdoc="([^"]*)"', map_html)
-        if srcdoc_match:
-            # Decode HTML entities
-            import html
-            inner_html = html.unescape(srcdoc_match.group(1))
-            print(f"[DEBUG] Extracted inner HTML size: {len(inner_html)} bytes")
-            map_html = inner_html
-        
-        print(f"[DEBUG] Final HTML size: {len(map_html)} bytes")
+        key = route_map_key(airports_sequence, flights_sequence, route_type)
+        # A map still being pre-rendered is waited for rather than rendered twice
+        map_html = get_map_cache().get(key) or get_prerenderer().result(key)
+        if map_html is None:
+            map_html = _render_route_map(airports_sequence, flights_sequence, route_type)
+            if map_html is None:
+                return jsonify({"error": "Failed to create map"}), 500
+            get_map_cache().put(key, map_html)
         
         # Return HTML response
         response = make_response(map_html)
@@ -365,26 +524,35 @@ def visualize_route():
         traceback.print_exc()
         return jsonify({"error": f"Map generation failed: {str(e)}"}), 500
 
+NETWORK_MAP_MODES = ('auto', 'flights', 'aggregated')
+
 @routes_blueprint.route('/visualize-network', methods=['GET'])
 def visualize_network():
-    """Generate Folium map visualization for the entire flight network"""
+    """
+    Generate Folium map visualization for the entire flight network
+    
+    ?mode=flights|aggregated|auto (default auto) picks one line per flight or
+    per airport pair; ?region_degrees= buckets airports into a grid of that size.
+    """
+    mode = request.args.get('mode', 'auto')
+    if mode not in NETWORK_MAP_MODES:
+        return jsonify({"error": f"mode must be one of {', '.join(NETWORK_MAP_MODES)}"}), 400
+    region_degrees = request.args.get('region_degrees')
+    try:
+        if region_degrees is not None:
+            region_degrees = float(region_degrees)
+            if not 0 < region_degrees <= 90:
+                raise ValueError
+    except ValueError:
+        return jsonify({"error": "region_degrees must be a number between 0 and 90"}), 400
+    
     try:
         # Create the network overview map
-        map_viz = create_network_overview_map()
-        
-        # Get the HTML content and extract just the map div content
-        map_html = map_viz._repr_html_()
+        with phase_timer('build_map'):
+            map_viz = create_network_overview_map(mode, region_degrees)
         
-        # Extract just the inner content without the outer iframe wrapper
-        import re
-        import html
-        
-        # Find the srcdoc content from the iframe
-        srcdoc_match = re.search(r'srcdoc="([^"]*)"', map_html)
-        if srcdoc_match:
-            # Decode HTML entities
-            inner_html = html.unescape(srcdoc_match.group(1))
-            map_html = inner_html
+        with phase_timer('render'):
+            map_html = render_map_html(map_viz)
         
         # Return HTML response
         response = make_response(map_html)
@@ -405,22 +573,16 @@ def visualize_comparison():
         if not routes_data:
             return jsonify({"error": "Routes data is required"}), 400
         
-        # Create the comparison map
-        map_viz = create_multiple_routes_comparison(routes_data)
-        
-        # Get the HTML content and extract just the map div content
-        map_html = map_viz._repr_html_()
-        
-        # Extract just the inner content without the outer iframe wrapper
-        import re
-        import html
-        
-        # Find the srcdoc content from the iframe
-        srcdoc_match = re.search(r'srcdoc="([^"]*)"', map_html)
-        if srcdoc_match:
-            # Decode HTML entities
-            inner_html = html.unescape(srcdoc_match.group(1))
-            map_html = inner_html
+        key = comparison_map_key(routes_data)
+        map_html = get_map_cache().get(key, 'comparison') or get_prerenderer().result(key)
+        if map_html is None:
+            # Create the comparison map
+            with phase_timer('build_map'):
+                map_viz = create_multiple_routes_comparison(routes_data)
+            
+            with phase_timer('render'):
+                map_html = render_map_html(map_viz)
+            get_map_cache().put(key, map_html)
         
         # Return HTML response
         response = make_response(map_html)
@@ -0,0 +1,159 @@
+"""
+JSON encoding for API responses.
+
+OrjsonProvider is a drop-in Flask JSON provider backed by orjson, so jsonify,
+request.get_json and current_app.json.dumps all use it. When orjson is not
+installed (or JSON_BACKEND = 'stdlib') the app keeps Flask's standard
+provider; output is the same JSON either way.
+
+The row serializers turn model objects into response dicts. Each one is
+compiled once from a field spec into a single dict expression, e.g.
+
+    serialize_airport(airport) -> {"id": airport.id, "code": airport.code, ...}
+
+instead of assembling the dict field by field on every row.
+"""
+
+import json
+from typing import Callable, Dict, Union
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson"""
+
+    def _options(self, indent: bool = False) -> int:
+        # Dates still go through Flask's default() so they render as before
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # json.dumps arguments orjson has no equivalent for
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+JSON_BACKENDS = {
+    'stdlib': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def init_app(app: Flask) -> str:
+    """Install the JSON provider named by JSON_BACKEND ('auto' prefers orjson); returns its name"""
+    backend = app.config.get('JSON_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'orjson' if orjson is not None else 'stdlib'
+    elif backend == 'orjson' and orjson is None:
+        print("⚠️ JSON_BACKEND is 'orjson' but orjson is not installed; using the stdlib encoder")
+        backend = 'stdlib'
+    app.json = JSON_BACKENDS[backend](app)
+    return backend
+
+
+# Field spec: output key -> attribute name, nested spec, or (attribute name, converter)
+FieldSpec = Dict[str, Union[str, 'FieldSpec', tuple]]
+
+
+def compile_serializer(spec: FieldSpec, name: str = 'serialize') -> Callable[[object], Dict]:
+    """Compile spec into a function that builds the whole dict in one expression"""
+    converters = {}
+
+    def expression(spec, target):
+        items = []
+        for key, field in spec.items():
+            if isinstance(field, dict):
+                value = expression(field, target)
+            elif isinstance(field, tuple):
+                attribute, converter = field
+                converters[f'_c{len(converters)}'] = converter
+                value = f'_c{len(converters) - 1}({target}.{attribute})'
+            else:
+                value = f'{target}.{field}'
+            items.append(f'{key!r}: {value}')
+        return '{' + ', '.join(items) + '}'
+
+    source = f'def {name}(obj):\n    return {expression(spec, "obj")}\n'
+    namespace = dict(converters)
+    exec(compile(source, f'<serializer {name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+AIRPORT_SUMMARY_FIELDS = {'code': 'code', 'name': 'name', 'city': 'city'}
+
+AIRPORT_FIELDS = {
+    'id': 'id',
+    'code': 'code',
+    'name': 'name',
+    'city': 'city',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+    'timezone': 'timezone',
+}
+
+FLIGHT_FIELDS = {
+    'id': 'id',
+    'flight_number': 'flight_number',
+    'source': {key: f'source.{attribute}' for key, attribute in AIRPORT_SUMMARY_FIELDS.items()},
+    'destination': {key: f'destination.{attribute}' for key, attribute in AIRPORT_SUMMARY_FIELDS.items()},
+    'duration': 'duration',
+    'price': 'price',
+    'delay_prob': 'delay_prob',
+    'departure_time': 'departure_time',
+    'arrival_time': 'arrival_time',
+    'aircraft_type': 'aircraft_type',
+    'max_capacity': 'max_capacity',
+    'current_bookings': 'seats_booked',
+}
+
+ROUTE_FIELDS = {
+    'id': 'id',
+    'source': 'source_airport_code',
+    'destination': 'destination_airport_code',
+    'route_type': 'route_type',
+    'total_cost': 'total_cost',
+    'total_duration': 'total_duration',
+    'delay_probability': 'total_delay_prob',
+    'airports': ('airports_sequence', json.loads),
+    'flights': ('flights_sequence', json.loads),
+    'created_at': ('created_at', _isoformat),
+}
+
+FLIGHT_STATUS_FIELDS = {
+    'status': 'status',
+    'delay_minutes': 'delay_minutes',
+    'reason': 'reason',
+    'updated_at': ('updated_at', _isoformat),
+}
+
+serialize_airport = compile_serializer(AIRPORT_FIELDS, 'serialize_airport')
+serialize_flight = compile_serializer(FLIGHT_FIELDS, 'serialize_flight')
+serialize_route = compile_serializer(ROUTE_FIELDS, 'serialize_route')
+serialize_flight_status = compile_serializer(FLIGHT_STATUS_FIELDS, 'serialize_flight_status')
@@ -0,0 +1,81 @@
+"""
+Streaming responses for large collection endpoints.
+
+Clients opt in through the Accept header:
+
+    Accept: application/x-ndjson      one JSON object per line
+    Accept: application/stream+json   the usual JSON document, sent in chunks
+
+Anything else (including */*) gets the regular buffered response. Rows are
+serialised one at a time from a generator (typically a yield_per query), so
+memory stays flat however many rows there are, and the first chunk goes out
+as soon as the first row is ready.
+"""
+
+from typing import Callable, Dict, Iterable, Optional
+
+from flask import Response, current_app, request, stream_with_context
+
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+JSON_STREAM = 'application/stream+json'
+
+# Rows fetched per round trip from the database cursor
+STREAM_BATCH_SIZE = 500
+# Serialised bytes collected before a chunk is sent
+CHUNK_BYTES = 64 * 1024
+
+
+def stream_mode() -> Optional[str]:
+    """NDJSON or JSON_STREAM if the client asked for a streamed response, else None"""
+    best = request.accept_mimetypes.best_match([JSON, NDJSON, JSON_STREAM])
+    return best if best in (NDJSON, JSON_STREAM) else None
+
+
+def _chunked(pieces: Iterable[str]) -> Iterable[str]:
+    """Coalesce small pieces into ~CHUNK_BYTES chunks; the first piece is sent on its own"""
+    buffer, size, first = [], 0, True
+    for piece in pieces:
+        if first:
+            yield piece
+            first = False
+            continue
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def streamed_response(rows: Iterable, serialize: Callable[[object], Dict], mode: str,
+                      key: Optional[str] = None, envelope: Optional[Dict] = None) -> Response:
+    """
+    Stream serialize(row) for every row.
+
+    With JSON_STREAM the body is a JSON array, or {**envelope, key: [...]} when
+    key is given, matching the buffered response. With NDJSON only the rows
+    are sent, one per line.
+    """
+    dumps = current_app.json.dumps
+
+    def ndjson():
+        for row in rows:
+            yield dumps(serialize(row)) + '\n'
+
+    def json_array():
+        if key is None:
+            yield '['
+        else:
+            # '{"generated_at":"...",' + '"predictions":['
+            head = dumps(envelope or {})[:-1]
+            yield head + (',' if envelope else '') + dumps(key) + ':['
+        separator = ''
+        for row in rows:
+            yield separator + dumps(serialize(row))
+            separator = ','
+        yield ']' if key is None else ']}'
+
+    body = ndjson() if mode == NDJSON else json_array()
+    return Response(stream_with_context(_chunked(body)), mimetype=mode)
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Synthetic flight network generator for scale testing.
+
+seed.py and complex_seed.py describe a handful of Indian airports. This module
+produces deterministic, seeded networks from 10 up to 10,000 airports and up to
+1M flights so the routing engines can be measured at realistic sizes.
+
+Two topologies are supported:
+    hub_spoke  - a meshed set of hubs, every spoke served from its nearest hub,
+                 extra frequencies concentrated on hub routes
+    geometric  - random geometric graph, flights connect nearby airports
+
+The generated records have the same shape as the ones in seed.py, so they can
+be written straight to the database or loaded into an in-memory FlightNetwork.
+"""
+
+import argparse
+import math
+import random
+from itertools import product
+from string import ascii_uppercase
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flight_network import FlightNetwork
+
+# Latitude / longitude box the airports are scattered in (roughly India)
+INDIA_BBOX = (6.5, 68.0, 35.5, 97.5)
+
+AIRLINES = ['AI', '6E', 'SG', 'UK', 'QP', 'IX']
+
+# (max distance in km, aircraft type, seats)
+FLEET = [
+    (600, 'ATR 72-600', 70),
+    (1500, 'Airbus A320', 180),
+    (2500, 'Boeing 737', 189),
+    (5000, 'Airbus A321neo', 220),
+    (float('inf'), 'Boeing 787-9', 290),
+]
+
+TOPOLOGIES = ('hub_spoke', 'geometric')
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance between two points in km"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) ** 2)
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+class SyntheticNetworkGenerator:
+    """Deterministic generator for large synthetic flight networks"""
+
+    def __init__(self, num_airports: int = 50, num_flights: int = 500,
+                 topology: str = 'hub_spoke', seed: int = 42,
+                 num_hubs: Optional[int] = None, neighbors: int = 12,
+                 bbox: Tuple[float, float, float, float] = INDIA_BBOX):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology: {topology}")
+        if num_airports < 2:
+            raise ValueError("At least two airports are required")
+
+        self.num_airports = num_airports
+        self.num_flights = num_flights
+        self.topology = topology
+        self.seed = seed
+        self.num_hubs = num_hubs or max(1, round(math.sqrt(num_airports) / 2))
+        self.num_hubs = min(self.num_hubs, num_airports - 1)
+        self.bbox = bbox
+        self._k = min(neighbors, num_airports - 1)
+
+        self._airports: Optional[List[Dict]] = None
+        self._neighbors: Optional[List[List[int]]] = None
+        self._home_hub: Optional[List[int]] = None
+
+    # ------------------------------------------------------------------
+    # Airports
+    # ------------------------------------------------------------------
+
+    def airports(self) -> List[Dict]:
+        """Airport records; ids are 1-based and match the flight source/destination ids"""
+        if self._airports is None:
+            rng = random.Random(self.seed)
+            lat_min, lon_min, lat_max, lon_max = self.bbox
+            self._airports = []
+            for i, code in enumerate(self._airport_codes(rng)):
+                is_hub = self.topology == 'hub_spoke' and i < self.num_hubs
+                self._airports.append({
+                    "id": i + 1,
+                    "code": code,
+                    "name": f"{code} {'Hub' if is_hub else 'Regional'} Airport",
+                    "city": f"City {code}",
+                    "latitude": round(rng.uniform(lat_min, lat_max), 4),
+                    "longitude": round(rng.uniform(lon_min, lon_max), 4),
+                    "timezone": "Asia/Kolkata",
+                })
+        return self._airports
+
+    def _airport_codes(self, rng: random.Random) -> List[str]:
+        """Unique IATA-style codes, 3 letters while they last"""
+        length = 3 if self.num_airports <= 26 ** 3 else 4
+        indices = rng.sample(range(26 ** length), self.num_airports)
+        combos = [''.join(c) for c in product(ascii_uppercase, repeat=length)] if length == 3 else None
+        codes = []
+        for index in indices:
+            if combos is not None:
+                codes.append(combos[index])
+            else:
+                letters = []
+                for _ in range(length):
+                    index, rem = divmod(index, 26)
+                    letters.append(ascii_uppercase[rem])
+                codes.append(''.join(letters))
+        return codes
+
+    def _build_spatial_index(self):
+        """Nearest-neighbour lists (grid bucketed) and the home hub of every airport"""
+        airports = self.airports()
+        n = len(airports)
+        lat_min, lon_min, lat_max, lon_max = self.bbox
+        cells_per_side = max(1, int(math.sqrt(n / 4)))
+        cell_lat = (lat_max - lat_min) / cells_per_side or 1.0
+        cell_lon = (lon_max - lon_min) / cells_per_side or 1.0
+
+        def cell_of(a):
+            row = min(cells_per_side - 1, int((a['latitude'] - lat_min) / cell_lat))
+            col = min(cells_per_side - 1, int((a['longitude'] - lon_min) / cell_lon))
+            return row, col
+
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, a in enumerate(airports):
+            grid.setdefault(cell_of(a), []).append(i)
+
+        self._neighbors = []
+        for i, a in enumerate(airports):
+            row, col = cell_of(a)
+            candidates: List[int] = []
+            ring = 0
+            # Expand one extra ring past the first one that yields enough candidates
+            # so that neighbours just across a cell border are not missed
+            enough_at = None
+            while ring <= cells_per_side:
+                for r in range(row - ring, row + ring + 1):
+                    for c in range(col - ring, col + ring + 1):
+                        if max(abs(r - row), abs(c - col)) == ring:
+                            candidates.extend(grid.get((r, c), ()))
+                if enough_at is None and len(candidates) > self._k:
+                    enough_at = ring
+                if enough_at is not None and ring > enough_at:
+                    break
+                ring += 1
+            candidates = [j for j in candidates if j != i]
+            candidates.sort(key=lambda j: (airports[j]['latitude'] - a['latitude']) ** 2 +
+                                          (airports[j]['longitude'] - a['longitude']) ** 2)
+            self._neighbors.append(candidates[:self._k])
+
+        self._home_hub = []
+        if self.topology == 'hub_spoke':
+            hubs = airports[:self.num_hubs]
+            for a in airports:
+                self._home_hub.append(min(
+                    range(self.num_hubs),
+                    key=lambda h: (hubs[h]['latitude'] - a['latitude']) ** 2 +
+                                  (hubs[h]['longitude'] - a['longitude']) ** 2
+                ))
+
+    # ------------------------------------------------------------------
+    # Flights
+    # ------------------------------------------------------------------
+
+    def iter_flights(self) -> Iterator[Dict]:
+        """
+        Yield flight records lazily so 1M-flight networks never sit in memory at once.
+        Every call replays exactly the same sequence.
+        """
+        if self._neighbors is None:
+            self._build_spatial_index()
+
+        rng = random.Random(self.seed + 1)
+        if self.topology == 'hub_spoke':
+            pairs = self._hub_spoke_pairs(rng)
+        else:
+            pairs = self._geometric_pairs(rng)
+
+        for index, (src, dst) in enumerate(pairs):
+            if index >= self.num_flights:
+                break
+            yield self._make_flight(rng, index, src, dst)
+
+    def _hub_spoke_pairs(self, rng: random.Random) -> Iterator[Tuple[int, int]]:
+        """Airport index pairs: connected backbone first, then extra frequencies"""
+        n, h = self.num_airports, self.num_hubs
+
+        # Hub mesh and spoke <-> home hub links keep the network strongly connected
+        for a in range(h):
+            for b in range(h):
+                if a != b:
+                    yield a, b
+        for spoke in range(h, n):
+            hub = self._home_hub[spoke]
+            yield spoke, hub
+            yield hub, spoke
+
+        while True:
+            roll = rng.random()
+            if roll < 0.45 and h > 1:
+                a, b = rng.sample(range(h), 2)
+                yield a, b
+            elif roll < 0.85:
+                spoke = rng.randrange(h, n)
+                hub = self._home_hub[spoke]
+                yield (spoke, hub) if rng.random() < 0.5 else (hub, spoke)
+            else:
+                spoke = rng.randrange(h, n)
+                yield spoke, rng.choice(self._neighbors[spoke])
+
+    def _geometric_pairs(self, rng: random.Random) -> Iterator[Tuple[int, int]]:
+        """Airport index pairs: a snake-ordered chain as backbone, then nearby pairs"""
+        airports = self.airports()
+        n = len(airports)
+        lat_min, _, lat_max, _ = self.bbox
+        bands = max(1, int(math.sqrt(n)))
+        band_height = (lat_max - lat_min) / bands or 1.0
+
+        def snake_key(i):
+            a = airports[i]
+            band = min(bands - 1, int((a['latitude'] - lat_min) / band_height))
+            lon = a['longitude'] if band % 2 == 0 else -a['longitude']
+            return band, lon
+
+        order = sorted(range(n), key=snake_key)
+        for a, b in zip(order, order[1:]):
+            yield a, b
+            yield b, a
+
+        while True:
+            src = rng.randrange(n)
+            yield src, rng.choice(self._neighbors[src])
+
+    def _make_flight(self, rng: random.Random, index: int, src: int, dst: int) -> Dict:
+        """Flight record with distance-driven duration, price, delay risk and aircraft"""
+        airports = self.airports()
+        a, b = airports[src], airports[dst]
+        distance = haversine_km(a['latitude'], a['longitude'], b['latitude'], b['longitude'])
+
+        # Block time: taxi/climb overhead plus cruise at ~780 km/h
+        duration = round(0.5 + distance / 780 * rng.uniform(0.95, 1.1), 2)
+
+        # Fare: base fare plus per-km component with lognormal market noise
+        price = (1800 + 3.2 * distance) * rng.lognormvariate(0, 0.18)
+        price = max(1500, round(price / 50) * 50)
+
+        # Delay risk: beta-distributed around ~12%, hubs are more congested
+        delay_prob = rng.betavariate(2, 14)
+        if self.topology == 'hub_spoke' and (src < self.num_hubs or dst < self.num_hubs):
+            delay_prob += 0.03
+        delay_prob = round(min(0.6, max(0.01, delay_prob)), 3)
+
+        departure = rng.randrange(6 * 12, 23 * 12) * 5  # minutes, 06:00-22:55
+        arrival = int(departure + duration * 60) % (24 * 60)
+
+        aircraft_type, capacity = next((t, s) for limit, t, s in FLEET if distance <= limit)
+
+        return {
+            "flight_number": f"{AIRLINES[index % len(AIRLINES)]}{10000 + index}",
+            "source_id": a['id'],
+            "destination_id": b['id'],
+            "duration": duration,
+            "price": float(price),
+            "delay_prob": delay_prob,
+            "departure_time": f"{departure // 60:02d}:{departure % 60:02d}",
+            "arrival_time": f"{arrival // 60:02d}:{arrival % 60:02d}",
+            "aircraft_type": aircraft_type,
+            "max_capacity": capacity,
+        }
+
+    # ------------------------------------------------------------------
+    # Sinks
+    # ------------------------------------------------------------------
+
+    def load_into_network(self, network: Optional[FlightNetwork] = None) -> FlightNetwork:
+        """Load the synthetic network into a FlightNetwork without touching the database"""
+        network = network or FlightNetwork()
+        airports = self.airports()
+        codes = {a['id']: a['code'] for a in airports}
+
+        network.load_network(airports, (
+            {
+                'flight_number': f['flight_number'],
+                'source': codes[f['source_id']],
+                'destination': codes[f['destination_id']],
+                'price': f['price'],
+                'duration': f['duration'],
+                'delay_prob': f['delay_prob'],
+                'max_capacity': f['max_capacity'],
+            } for f in self.iter_flights()
+        ))
+        return network
+
+    def write_to_db(self, reset: bool = True, batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Bulk insert the network into the current app's database.
+        Must be called inside an app context. reset drops and recreates all tables.
+        """
+        from models import db, Airport, Flight
+
+        if reset:
+            db.drop_all()
+            db.create_all()
+
+        airports = self.airports()
+        db.session.execute(Airport.__table__.insert(), airports)
+
+        batch: List[Dict] = []
+        total_flights = 0
+        for flight in self.iter_flights():
+            batch.append(flight)
+            if len(batch) >= batch_size:
+                db.session.execute(Flight.__table__.insert(), batch)
+                total_flights += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(Flight.__table__.insert(), batch)
+            total_flights += len(batch)
+
+        db.session.commit()
+        return {"airports": len(airports), "flights": total_flights}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic flight network")
+    parser.add_argument('--airports', type=int, default=100)
+    parser.add_argument('--flights', type=int, default=2000)
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='hub_spoke')
+    parser.add_argument('--hubs', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--to-db', action='store_true',
+                        help="Replace the app database with the synthetic network")
+    args = parser.parse_args()
+
+    generator = SyntheticNetworkGenerator(
+        num_airports=args.airports,
+        num_flights=args.flights,
+        topology=args.topology,
+        seed=args.seed,
+        num_hubs=args.hubs
+    )
+
+    if args.to_db:
+        from app import app
+        with app.app_context():
+            counts = generator.write_to_db()
+        print(f"✅ Wrote {counts['airports']} airports and {counts['flights']} flights to the database")
+    else:
+        network = generator.load_into_network()
+        print(f"✅ Synthetic network built in memory: {network.get_network_statistics()}")
+
+
+if __name__ == '__main__':
+    main()
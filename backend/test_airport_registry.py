@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory airport registry
+"""
+
+import pytest
+
+import airport_registry
+from airport_registry import AirportRegistry, get_registry, haversine
+from flight_network import flight_network
+from map_visualization import create_route_map, render_map_html
+from models import db, Airport, Flight
+
+AIRPORTS = [
+    {'id': 1, 'code': 'DEL', 'name': 'Delhi Airport', 'city': 'Delhi', 'latitude': 28.5562, 'longitude': 77.1000},
+    {'id': 2, 'code': 'BOM', 'name': 'Mumbai Airport', 'city': 'Mumbai', 'latitude': 19.0896, 'longitude': 72.8656},
+    {'id': 3, 'code': 'IXZ', 'name': 'Veer Savarkar Airport', 'city': 'Port Blair',
+     'latitude': 11.6412, 'longitude': 92.7297},
+    {'id': 4, 'code': 'NEW', 'name': 'Unsurveyed Airport', 'city': 'Nowhere', 'latitude': 0.0, 'longitude': 0.0},
+]
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(0)
+    with app.app_context():
+        db.session.add_all([Airport(**airport) for airport in AIRPORTS])
+        db.session.add(Flight(flight_number='AI501', source_id=1, destination_id=3, duration=3.5, price=7000.0,
+                              delay_prob=0.1, departure_time='08:00', arrival_time='11:30', aircraft_type='A320'))
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_distance_matrix_matches_haversine(monkeypatch, vectorized):
+    if not vectorized:
+        monkeypatch.setattr(airport_registry, 'np', None)
+    registry = AirportRegistry(AIRPORTS)
+    expected = haversine(28.5562, 77.1000, 11.6412, 92.7297)
+    assert registry.distance('DEL', 'IXZ') == pytest.approx(expected)
+    assert registry.distances_to('IXZ')[registry.index['DEL']] == pytest.approx(expected)
+    assert registry.distance('DEL', 'DEL') == 0.0
+
+    # 0/0 is the column default, not a location
+    assert registry.coords('NEW') is None and registry.info('NEW')['lat'] is None
+    assert registry.distance('NEW', 'DEL') == 0.0 and registry.distance('DEL', 'XXX') == 0.0
+    assert registry.located_codes() == ['DEL', 'BOM', 'IXZ']
+    assert registry.centroid(['DEL', 'BOM', 'NEW']) == pytest.approx((23.8229, 74.9828))
+    assert registry.code_of(3) == 'IXZ'
+
+
+def test_registry_is_reloaded_only_when_airports_change(app):
+    with app.app_context():
+        registry = get_registry()
+        assert get_registry() is registry and len(registry) == 4
+
+        Flight.query.first().price = 6500.0
+        db.session.commit()
+        assert get_registry() is registry
+
+        db.session.add(Airport(code='GOI', name='Goa Airport', city='Goa', latitude=15.3808, longitude=73.8314))
+        db.session.commit()
+        reloaded = get_registry()
+        assert reloaded is not registry and reloaded.coords('GOI') == (15.3808, 73.8314)
+
+
+def test_network_and_maps_use_database_coordinates(app):
+    with app.app_context():
+        flight_network.build_network()
+        edge = flight_network.graph['DEL'][0]
+        assert edge.distance == pytest.approx(haversine(28.5562, 77.1000, 11.6412, 92.7297))
+        assert flight_network.airports['IXZ']['lat'] == 11.6412
+
+        document = render_map_html(create_route_map(['DEL', 'IXZ'], ['AI501'], 'cost'))
+    assert 'Veer Savarkar Airport' in document and '11.6412' in document
+
+    features = app.test_client().get('/routes/geojson/network').get_json()['features']
+    points = {f['properties']['code'] for f in features if f['geometry']['type'] == 'Point'}
+    assert points == {'DEL', 'BOM', 'IXZ'}
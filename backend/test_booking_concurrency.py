@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Seat inventory under concurrent booking: many threads hammer one flight
+through the API and the seats_booked counter must never exceed capacity.
+"""
+
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import text
+
+from db import upgrade_schema
+from models import db, Booking, Flight
+
+THREADS = 16
+ATTEMPTS_PER_THREAD = 12
+CAPACITY = 50
+
+
+@pytest.fixture
+def app(make_app, temp_database_uri):
+    # A file database, so the threads below really contend for it
+    return make_app(10, 40, seed=8, database_uri=temp_database_uri, profile='production')
+
+
+@pytest.fixture
+def flight_ids(app):
+    """Ids of two flights with CAPACITY seats"""
+    with app.app_context():
+        flights = Flight.query.order_by(Flight.id).limit(2).all()
+        for flight in flights:
+            flight.max_capacity = CAPACITY
+        db.session.commit()
+        flight_ids = [flight.id for flight in flights]
+        db.session.remove()
+    return flight_ids
+
+
+def hammer(app, worker):
+    """Run worker(client, thread_index) on THREADS threads at once; collect status codes"""
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def run(index):
+        client = app.test_client()
+        barrier.wait()
+        for code in worker(client, index):
+            with lock:
+                statuses[code] += 1
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def seats_and_bookings(app, flight_id):
+    with app.app_context():
+        flight = db.session.get(Flight, flight_id)
+        confirmed = Booking.query.filter_by(flight_id=flight_id, status='confirmed').count()
+        return flight.seats_booked, confirmed
+
+
+def test_single_bookings_never_oversell(app, flight_ids):
+    flight_id = flight_ids[0]
+
+    def book(client, index):
+        for attempt in range(ATTEMPTS_PER_THREAD):
+            yield client.post('/bookings/add', json={
+                "user_name": f"user-{index}-{attempt}", "flight_id": flight_id
+            }).status_code
+
+    statuses = hammer(app, book)
+
+    assert statuses[201] == CAPACITY
+    assert statuses[409] == THREADS * ATTEMPTS_PER_THREAD - CAPACITY
+    assert seats_and_bookings(app, flight_id) == (CAPACITY, CAPACITY)
+
+
+def test_bulk_bookings_are_all_or_nothing(app, flight_ids):
+    first, second = flight_ids
+
+    def book_pairs(client, index):
+        # Each request wants 2 seats on the first flight and 1 on the second
+        for attempt in range(3):
+            yield client.post('/bookings/bulk', json={"bookings": [
+                {"user_name": f"a-{index}-{attempt}", "flight_id": first},
+                {"user_name": f"b-{index}-{attempt}", "flight_id": first},
+                {"user_name": f"c-{index}-{attempt}", "flight_id": second},
+            ]}).status_code
+
+    statuses = hammer(app, book_pairs)
+
+    assert statuses[201] == CAPACITY // 2
+    assert seats_and_bookings(app, first) == (CAPACITY, CAPACITY)
+    assert seats_and_bookings(app, second) == (CAPACITY // 2, CAPACITY // 2)
+
+
+def test_cancel_releases_the_seat_once(app, flight_ids):
+    flight_id = flight_ids[0]
+    client = app.test_client()
+    booking_id = client.post('/bookings/add', json={"user_name": "eve", "flight_id": flight_id}
+                             ).get_json()['booking_id']
+
+    statuses = hammer(app, lambda c, i: [c.post(f'/bookings/{booking_id}/cancel').status_code])
+
+    assert statuses[200] == THREADS
+    assert seats_and_bookings(app, flight_id) == (0, 0)
+    assert client.post('/bookings/add', json={"user_name": "x", "flight_id": 10**6}).status_code == 404
+    assert client.post('/bookings/bulk', json={"bookings": []}).status_code == 400
+
+
+def test_upgrade_schema_adds_and_backfills_seats_booked(app, flight_ids):
+    with app.app_context():
+        db.session.add_all([
+            Booking(user_name='a', flight_id=flight_ids[0]),
+            Booking(user_name='b', flight_id=flight_ids[0]),
+            Booking(user_name='c', flight_id=flight_ids[0], status='cancelled'),
+        ])
+        db.session.commit()
+        db.session.execute(text('ALTER TABLE flight DROP COLUMN seats_booked'))
+        db.session.commit()
+
+        assert 'flight.seats_booked' in upgrade_schema()
+        db.session.expire_all()
+        assert db.session.get(Flight, flight_ids[0]).seats_booked == 2
+        assert db.session.get(Flight, flight_ids[1]).seats_booked == 0
+
+
+def test_bookings_only_take_client_fields(app, flight_ids):
+    flight_id = flight_ids[0]
+    client = app.test_client()
+    for body in ({"user_name": "mallory", "flight_id": flight_id, "status": "cancelled"},
+                 {"user_name": "mallory", "flight_id": flight_id, "id": 999},
+                 {"user_name": "mallory", "flight_id": flight_id, "seat": "1A"}):
+        response = client.post('/bookings/add', json=body)
+        assert response.status_code == 400 and 'Unexpected booking fields' in response.get_json()['error']
+    response = client.post('/bookings/bulk', json={"bookings": [
+        {"user_name": "ok", "flight_id": flight_id},
+        {"user_name": "mallory", "flight_id": flight_id, "status": "cancelled"},
+    ]})
+    assert response.status_code == 400
+    assert seats_and_bookings(app, flight_id) == (0, 0)
+
+    # Every booking that holds a seat can release it
+    response = client.post('/bookings/bulk', json={"bookings": [
+        {"user_name": "ok", "flight_id": flight_id, "route_id": None}]})
+    booking_id, = response.get_json()['booking_ids']
+    assert seats_and_bookings(app, flight_id) == (1, 1)
+    assert client.post(f'/bookings/{booking_id}/cancel').status_code == 200
+    assert seats_and_bookings(app, flight_id) == (0, 0)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for capacity-aware routing: searches skip flights without enough free seats
+"""
+
+from flight_network import FlightNetwork, flight_network
+from models import db, Airport, Booking, Flight
+
+AIRPORTS = [
+    {'code': code, 'name': code, 'city': code, 'latitude': lat, 'longitude': lon}
+    for code, lat, lon in [('AAA', 10.0, 70.0), ('BBB', 12.0, 72.0), ('CCC', 11.0, 74.0)]
+]
+
+
+def triangle_flights(direct_seats_booked):
+    """AAA->CCC direct (cheap, 10 seats) or via BBB (expensive, plenty of seats)"""
+    return [
+        {'flight_number': 'D1', 'source': 'AAA', 'destination': 'CCC', 'price': 100,
+         'duration': 1.0, 'delay_prob': 0.1, 'max_capacity': 10, 'seats_booked': direct_seats_booked},
+        {'flight_number': 'L1', 'source': 'AAA', 'destination': 'BBB', 'price': 150,
+         'duration': 1.0, 'delay_prob': 0.1},
+        {'flight_number': 'L2', 'source': 'BBB', 'destination': 'CCC', 'price': 150,
+         'duration': 1.0, 'delay_prob': 0.1},
+    ]
+
+
+def triangle(direct_seats_booked):
+    network = FlightNetwork()
+    network.load_network(AIRPORTS, triangle_flights(direct_seats_booked))
+    return network
+
+
+def test_min_seats_skips_flights_without_room_for_the_group():
+    network = triangle(direct_seats_booked=7)
+
+    assert network.dijkstra_shortest_path('AAA', 'CCC', 'cost').flights == ['D1']
+    assert network.dijkstra_shortest_path('AAA', 'CCC', 'cost', min_seats=3).flights == ['D1']
+    assert network.dijkstra_shortest_path('AAA', 'CCC', 'cost', min_seats=4).flights == ['L1', 'L2']
+    assert network.a_star_shortest_path('AAA', 'CCC', 'cost', min_seats=4).flights == ['L1', 'L2']
+    assert all(route.flights == ['L1', 'L2']
+               for route in network.find_multiple_routes('AAA', 'CCC', min_seats=4))
+
+
+def test_adjust_remaining_seats_updates_searches_without_a_rebuild():
+    network = triangle(direct_seats_booked=0)
+    graph = network.graph
+
+    network.adjust_remaining_seats('D1', -10)
+    assert network.dijkstra_shortest_path('AAA', 'CCC', 'cost', min_seats=1).flights == ['L1', 'L2']
+
+    network.adjust_remaining_seats('D1', 1)
+    assert network.dijkstra_shortest_path('AAA', 'CCC', 'cost', min_seats=1).flights == ['D1']
+    assert network.graph is graph
+    # Unknown or cancelled flights are ignored
+    network.adjust_remaining_seats('NOPE', -1)
+
+
+def test_seat_deltas_are_not_applied_twice_across_a_rebuild():
+    network = triangle(direct_seats_booked=7)
+    index = network.edge_index['D1']
+    seats_version = network.seats_version
+
+    # The booking commits and a rebuild reads it before the booking adjusts the seats
+    network.load_network(AIRPORTS, triangle_flights(direct_seats_booked=8))
+    network.adjust_remaining_seats('D1', -1, seats_version)
+    assert network.remaining_seats[index] == 2
+
+    network.adjust_remaining_seats('D1', -1, network.seats_version)
+    assert network.remaining_seats[index] == 1
+
+
+def test_bookings_update_the_live_seat_array(make_app):
+    app = make_app(10, 40, seed=3)
+    with app.app_context():
+        flight = Flight.query.first()
+        flight.max_capacity = 3
+        db.session.commit()
+        flight_id, flight_number = flight.id, flight.flight_number
+        flight_network.build_network()
+
+    client = app.test_client()
+    index = flight_network.edge_index[flight_number]
+    assert flight_network.remaining_seats[index] == 3
+    seats_version = flight_network.seats_version
+
+    booking_id = client.post('/bookings/add', json={"user_name": "a", "flight_id": flight_id}
+                             ).get_json()['booking_id']
+    client.post('/bookings/bulk', json={"bookings": [{"user_name": "b", "flight_id": flight_id},
+                                                     {"user_name": "c", "flight_id": flight_id}]})
+    assert flight_network.remaining_seats[index] == 0
+
+    client.post(f'/bookings/{booking_id}/cancel')
+    assert flight_network.remaining_seats[index] == 1
+
+    # Searches reuse the adjusted seat array instead of rebuilding it from the database
+    source, destination = next((code, edge.destination) for code, edges in flight_network.graph.items()
+                               for edge in edges if edge.flight_number == flight_number)
+    client.post('/routes/find', json={"source": source, "destination": destination})
+    assert flight_network.seats_version == seats_version
+
+    # Other flight changes still rebuild it
+    with app.app_context():
+        db.session.get(Flight, flight_id).price += 1
+        db.session.commit()
+    client.post('/routes/find', json={"source": source, "destination": destination})
+    assert flight_network.seats_version == seats_version + 1
+    assert flight_network.remaining_seats[index] == 1
+
+
+def test_group_reroute_only_uses_flights_with_seats_for_everyone(make_app):
+    app = make_app(0)
+    with app.app_context():
+        airports = [Airport(code=a['code'], name=a['name'], city=a['city'],
+                            latitude=a['latitude'], longitude=a['longitude']) for a in AIRPORTS]
+        db.session.add_all(airports)
+        db.session.flush()
+        aaa, bbb, ccc = airports
+        flights = [
+            Flight(flight_number='X1', source_id=aaa.id, destination_id=ccc.id, duration=1, price=90),
+            Flight(flight_number='D1', source_id=aaa.id, destination_id=ccc.id, duration=1, price=100,
+                   max_capacity=10, seats_booked=8),
+            Flight(flight_number='L1', source_id=aaa.id, destination_id=bbb.id, duration=1, price=150),
+            Flight(flight_number='L2', source_id=bbb.id, destination_id=ccc.id, duration=1, price=150),
+        ]
+        db.session.add_all(flights)
+        db.session.flush()
+        db.session.add_all([Booking(user_name=f'p{i}', flight_id=flights[0].id) for i in range(3)])
+        db.session.commit()
+
+    response = app.test_client().post('/routes/handle-disruption', json={
+        "flight_number": "X1", "type": "cancellation"
+    }).get_json()
+    cheapest = {alternative['alternative_routes'][0]['flights'][0] for alternative in response['alternatives']}
+    # D1 is cheaper but only has 2 seats left for a party of 3
+    assert response['affected_passengers'] == 3
+    assert cheapest == {'L1'}
+
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for gzip response compression
+"""
+
+import gzip
+import json
+
+from compression import CompressedBodyCache, GZIP_ETAG_SUFFIX
+from metrics import registry
+
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+def test_negotiated_gzip_round_trips(make_app):
+    app = make_app(20, 120, seed=3)
+    client = app.test_client()
+    plain = client.get('/flights/')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    compressed = client.get('/flights/', headers=GZIP)
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert int(compressed.headers['Content-Length']) * 4 < len(plain.get_data())
+    assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+
+    # Refused, tiny and streamed responses go out as they are
+    assert 'Content-Encoding' not in client.get('/flights/', headers={'Accept-Encoding': 'gzip;q=0'}).headers
+    assert 'Content-Encoding' not in client.get('/health', headers=GZIP).headers
+    streamed = client.get('/flights/', headers={**GZIP, 'Accept': 'application/x-ndjson'})
+    assert 'Content-Encoding' not in streamed.headers
+
+
+def test_strong_etags_differ_per_encoding(make_app):
+    app = make_app(0)
+
+    @app.route('/strong')
+    def strong():
+        response = app.response_class('x' * 4096, mimetype='text/plain')
+        response.set_etag('body-v1')
+        return response
+
+    client = app.test_client()
+    plain, compressed = client.get('/strong'), client.get('/strong', headers=GZIP)
+    assert plain.headers['ETag'] == '"body-v1"'
+    assert compressed.headers['ETag'] == f'"body-v1{GZIP_ETAG_SUFFIX}"'
+
+    # Weak ETags only promise equivalent content, so both encodings share them
+    assert client.get('/flights/').headers['ETag'].startswith('W/')
+
+
+def test_cacheable_bodies_are_compressed_once(make_app):
+    app = make_app(20, 120, seed=3)
+    client = app.test_client()
+    cache = app.extensions['compression']
+
+    def hits():
+        return registry.counter_value('flightres_compression_cache_total', {'result': 'hit'})
+
+    first = client.get('/flights/', headers=GZIP)
+    before = hits()
+    second = client.get('/flights/', headers=GZIP)
+    assert hits() == before + 1
+    assert second.get_data() == first.get_data()
+    assert len(cache) == 1
+
+    # Bodies without an ETag are compressed on every request and not kept
+    search = client.get('/flights/search', headers=GZIP)
+    assert search.headers['Content-Encoding'] == 'gzip' and 'ETag' not in search.headers
+    assert len(cache) == 1
+
+
+def test_level_and_threshold_are_configurable(make_app):
+    app = make_app(20, 120, seed=3)
+    client = app.test_client()
+    app.config['COMPRESS_LEVEL'] = 1
+    fast = client.get('/flights/', headers=GZIP)
+    app.extensions['compression'] = CompressedBodyCache(app.config['COMPRESS_CACHE_BYTES'])
+    app.config['COMPRESS_LEVEL'] = 9
+    small = client.get('/flights/', headers=GZIP)
+    assert len(small.get_data()) < len(fast.get_data())
+
+    app.config['COMPRESS_MIN_SIZE'] = 10 * 1024 * 1024
+    assert 'Content-Encoding' not in client.get('/flights/', headers=GZIP).headers
@@ -3,16 +3,30 @@
 Direct test of the flight network functionality without Flask server
 """
 
-from app import app, db
+import os
+import shutil
+import tempfile
+
+from app import app, create_app, db
+from db import upgrade_schema
 from models import Airport, Flight
 from flight_network import flight_network
 
+def migrated_copy(directory):
+    """App on an upgraded copy of the development database, which itself is left as it is"""
+    path = os.path.join(directory, 'database.db')
+    shutil.copy(os.path.join(app.instance_path, 'database.db'), path)
+    copy = create_app(f'sqlite:///{path}')
+    with copy.app_context():
+        upgrade_schema()
+    return copy
+
 def test_direct_functionality():
     """Test the core functionality directly"""
     print("🛫 Testing Flight Network Core Functionality")
     print("="*60)
     
-    with app.app_context():
+    with tempfile.TemporaryDirectory() as directory, migrated_copy(directory).app_context():
         # Build the network
         print("Building flight network...")
         flight_network.build_network()
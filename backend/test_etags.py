@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for ETags and the per-data-version response cache
+"""
+
+from sqlalchemy import event, text
+
+from data_version import get_versions
+from models import db, Airport, Flight
+from test_flights_api import count_queries
+
+
+def test_unchanged_listing_answers_304_without_queries(make_app):
+    app = make_app(12, 60, seed=8)
+    client = app.test_client()
+    first = client.get('/flights/')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    with count_queries(app) as statements:
+        revalidated = client.get('/flights/', headers={'If-None-Match': etag})
+        repeated = client.get('/flights/')
+    assert statements == []
+    assert revalidated.status_code == 304 and revalidated.headers['ETag'] == etag
+    assert repeated.get_data() == first.get_data() and repeated.headers['ETag'] == etag
+
+
+def test_commits_change_only_the_etags_of_their_tables(make_app):
+    app = make_app(12, 60, seed=8)
+    client = app.test_client()
+    flights_etag = client.get('/flights/').headers['ETag']
+    airports_etag = client.get('/flights/airports').headers['ETag']
+
+    with app.app_context():
+        flight = Flight.query.first()
+        flight_id, booked = flight.id, flight.seats_booked
+    assert client.post('/bookings/add', json={"user_name": "ann", "flight_id": flight_id}).status_code == 201
+
+    changed = client.get('/flights/', headers={'If-None-Match': flights_etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != flights_etag
+    listed = next(f for f in changed.get_json() if f['id'] == flight_id)
+    assert listed['current_bookings'] == booked + 1
+    assert client.get('/flights/airports', headers={'If-None-Match': airports_etag}).status_code == 304
+
+    # Raw SQL writes count too; rolled back ones do not
+    with app.app_context():
+        before = get_versions().get(['airport'])
+        db.session.add(Airport(code='ZZZ', name='Nowhere', city='Nowhere'))
+        db.session.flush()
+        db.session.rollback()
+        assert get_versions().get(['airport']) == before
+        db.session.execute(text("UPDATE airport SET city = 'Renamed' WHERE id = 1"))
+        db.session.commit()
+        assert get_versions().get(['airport']) != before
+    assert client.get('/flights/airports', headers={'If-None-Match': airports_etag}).status_code == 200
+
+
+def test_versions_are_bumped_only_after_the_commit_lands(make_app):
+    app = make_app(12, 60, seed=8)
+    with app.app_context():
+        versions = get_versions()
+        before = versions.get(['airport'])
+        seen_during_commit = []
+
+        @event.listens_for(db.engine, 'commit')
+        def _during_commit(conn):
+            seen_during_commit.append(versions.get(['airport']))
+
+        db.session.execute(text("UPDATE airport SET city = 'Renamed' WHERE id = 1"))
+        db.session.commit()
+        event.remove(db.engine, 'commit', _during_commit)
+        assert seen_during_commit == [before]
+        assert versions.get(['airport']) == (before[0] + 1,)
+
+
+def test_pages_are_cached_with_their_cursor_and_network_stats_revalidate(make_app):
+    app = make_app(12, 60, seed=8)
+    client = app.test_client()
+    page = client.get('/flights/?limit=10')
+    with count_queries(app) as statements:
+        cached = client.get('/flights/?limit=10')
+    assert statements == []
+    assert cached.headers['X-Next-Cursor'] == page.headers['X-Next-Cursor']
+    assert client.get('/flights/?limit=10&cursor=bogus').status_code == 400
+
+    stats = client.get('/routes/network-stats')
+    assert client.get('/routes/network-stats',
+                      headers={'If-None-Match': stats.headers['ETag']}).status_code == 304
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the /flights endpoints against a small synthetic database
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models import db, Booking, Flight, FlightStatus, Route
+
+
+@contextmanager
+def count_queries(app):
+    """Collect every SQL statement executed inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_get_flights_is_one_query_with_latest_status_and_bookings(make_app):
+    app = make_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        first, second = Flight.query.order_by(Flight.id).limit(2).all()
+        db.session.add_all([
+            FlightStatus(flight_id=first.id, status='delayed', delay_minutes=30, updated_at=now - timedelta(hours=2)),
+            FlightStatus(flight_id=first.id, status='cancelled', delay_minutes=0, updated_at=now),
+            FlightStatus(flight_id=second.id, status='delayed', delay_minutes=45, updated_at=now),
+        ])
+        db.session.commit()
+        first_id, second_id = first.id, second.id
+
+    booking_client = app.test_client()
+    booking_ids = [
+        booking_client.post('/bookings/add', json={"user_name": name, "flight_id": first_id}).get_json()['booking_id']
+        for name in ('alice', 'bob', 'carol')
+    ]
+    assert booking_client.post(f'/bookings/{booking_ids[-1]}/cancel').status_code == 200
+
+    client = app.test_client()
+    with count_queries(app) as statements:
+        flights = client.get('/flights/').get_json()
+
+    assert len(statements) == 1
+    assert len(flights) == 200
+    by_id = {f['id']: f for f in flights}
+    assert by_id[first_id]['status'] == 'cancelled'
+    assert by_id[first_id]['current_bookings'] == 2
+    assert by_id[second_id]['status'] == 'delayed'
+    assert by_id[second_id]['delay_minutes'] == 45
+    untouched = next(f for f in flights if f['id'] not in (first_id, second_id))
+    assert untouched['status'] == 'on_time'
+    assert untouched['delay_minutes'] == 0
+    assert untouched['current_bookings'] == 0
+    assert untouched['source']['code'] and untouched['destination']['city']
+
+
+def test_flights_keyset_pagination_walks_every_flight_once(make_app):
+    app = make_app(num_flights=57)
+    client = app.test_client()
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        url = '/flights/?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(f['id'] for f in response.get_json())
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert pages == 6
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 57
+    assert 'X-Next-Cursor' not in client.get('/flights/').headers
+
+
+def test_pagination_rejects_bad_input(make_app):
+    app = make_app(num_flights=10)
+    client = app.test_client()
+
+    assert client.get('/flights/?limit=abc').status_code == 400
+    assert client.get('/flights/?limit=0').status_code == 400
+    assert client.get('/flights/?cursor=not-a-cursor').status_code == 400
+
+    with app.app_context():
+        flight = Flight.query.first()
+        db.session.add_all([Booking(user_name=f'user{i}', flight_id=flight.id) for i in range(3)])
+        db.session.commit()
+    response = client.get('/bookings/?limit=2')
+    assert len(response.get_json()) == 2
+    bookings_cursor = response.headers['X-Next-Cursor']
+    # A cursor only works on the endpoint that issued it
+    assert client.get(f'/flights/?cursor={bookings_cursor}').status_code == 400
+    assert len(client.get(f'/bookings/?cursor={bookings_cursor}').get_json()) == 1
+
+
+def test_saved_routes_pages_newest_first(make_app):
+    app = make_app(num_flights=10)
+    base = datetime(2024, 1, 1)
+    with app.app_context():
+        db.session.add_all([
+            Route(source_airport_code='AAA', destination_airport_code='BBB', route_type='cost',
+                  total_cost=100.0, total_duration=60, total_delay_prob=0.1,
+                  airports_sequence='["AAA", "BBB"]', flights_sequence='["X1"]',
+                  created_at=base + timedelta(minutes=i // 2))
+            for i in range(7)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    first = client.get('/routes/saved-routes?limit=4').get_json()
+    second = client.get(f"/routes/saved-routes?limit=4&cursor={first['next_cursor']}").get_json()
+
+    ids = [r['id'] for r in first['routes'] + second['routes']]
+    assert len(ids) == len(set(ids)) == 7
+    created = [r['created_at'] for r in first['routes'] + second['routes']]
+    assert created == sorted(created, reverse=True)
+    assert second['next_cursor'] is None
+
+
+def test_search_pushes_every_filter_into_one_query(make_app):
+    app = make_app(num_flights=300)
+    with app.app_context():
+        flights = Flight.query.all()
+        hub = max({f.source.code for f in flights},
+                  key=lambda code: sum(f.source.code == code for f in flights))
+        expected = sorted(
+            f.id for f in flights
+            if f.source.code == hub and 1000 <= f.price <= 9000 and f.duration <= 4
+            and '06:00' <= f.departure_time <= '20:00' and f.delay_prob <= 0.3
+        )
+
+    client = app.test_client()
+    with count_queries(app) as statements:
+        data = client.get(f'/flights/search?source={hub}&min_price=1000&max_price=9000'
+                          '&max_duration=4&departure_after=6:00&departure_before=20:00'
+                          '&max_delay_prob=0.3').get_json()
+
+    assert len(statements) == 1
+    assert sorted(f['id'] for f in data['flights']) == expected
+    assert data['count'] == len(expected)
+    assert data['search_criteria']['departure_after'] == '06:00'
+    assert all(f['availability'] == f['max_capacity'] for f in data['flights'])
+
+
+def test_search_by_aircraft_and_status(make_app):
+    app = make_app(num_flights=50)
+    with app.app_context():
+        flight = Flight.query.first()
+        db.session.add(FlightStatus(flight_id=flight.id, status='delayed', delay_minutes=25))
+        db.session.commit()
+        flight_id, aircraft = flight.id, flight.aircraft_type
+        same_aircraft = Flight.query.filter_by(aircraft_type=aircraft).count()
+
+    client = app.test_client()
+    delayed = client.get('/flights/search?status=delayed').get_json()
+    assert [f['id'] for f in delayed['flights']] == [flight_id]
+    assert delayed['flights'][0]['delay_minutes'] == 25
+    assert client.get('/flights/search?status=on_time').get_json()['count'] == 49
+    assert client.get(f'/flights/search?aircraft_type={aircraft}').get_json()['count'] == same_aircraft
+    assert client.get('/flights/search?max_price=cheap').status_code == 400
+    assert client.get('/flights/search?departure_after=25:00').status_code == 400
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the GeoJSON route and network endpoints
+"""
+
+import json
+
+from flight_network import FlightNetwork, flight_network
+from models import Flight, db
+from network_geojson import great_circle_arc, network_geometry
+from synthetic_network import SyntheticNetworkGenerator
+
+
+def test_great_circle_arc_follows_the_sphere():
+    # London -> New York bulges north of both endpoints
+    arc = great_circle_arc(51.47, -0.45, 40.64, -73.78)
+    assert arc[0] == [-0.45, 51.47] and arc[-1] == [-73.78, 40.64]
+    assert len(arc) == 29
+    assert max(lat for _, lat in arc) > 52
+    assert len(great_circle_arc(10.0, 10.0, 10.1, 10.1)) == 2
+
+
+def test_network_collection_is_cached_per_graph_version(make_app):
+    app = make_app(15, 80, seed=21, build_network=True)
+    client = app.test_client()
+    response = client.get('/routes/geojson/network')
+    assert response.mimetype == 'application/geo+json'
+    collection = response.get_json()
+    kinds = [f['geometry']['type'] for f in collection['features']]
+    assert kinds.count('Point') == 15
+    assert kinds.count('LineString') == sum(len(edges) for edges in flight_network.graph.values())
+
+    # Rebuilding unchanged data keeps the version; a delay changes it
+    etag = response.headers['ETag']
+    with app.app_context():
+        flight_network.build_network()
+        flight_number = Flight.query.first().flight_number
+    assert client.get('/routes/geojson/network', headers={'If-None-Match': etag}).status_code == 304
+    flight_network.handle_flight_delay(flight_number, 30)
+    changed = client.get('/routes/geojson/network', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    delayed = [f for f in changed.get_json()['features'] if f['properties'].get('flight_number') == flight_number]
+    assert delayed[0]['properties']['delayed'] is True
+
+
+def test_network_collection_follows_new_flights(make_app):
+    app = make_app(15, 80, seed=21, build_network=True)
+    client = app.test_client()
+    before = client.get('/routes/geojson/network').get_json()['features']
+    with app.app_context():
+        template = Flight.query.first()
+        db.session.add(Flight(flight_number='GJ999', source_id=template.destination_id,
+                              destination_id=template.source_id, duration=2.0, price=150.0))
+        db.session.commit()
+    # No explicit /build-network: the committed flight marks the graph stale
+    features = client.get('/routes/geojson/network').get_json()['features']
+    assert len(features) == len(before) + 1
+    assert any(f['properties'].get('flight_number') == 'GJ999' for f in features)
+
+
+def test_route_and_comparison_collections(make_app):
+    app = make_app(15, 80, seed=21, build_network=True)
+    client = app.test_client()
+    codes = sorted(flight_network.airports)
+    route = client.post('/routes/find', json={"source": codes[1], "destination": codes[-1],
+                                              "algorithm": "multiple"}).get_json()['routes']
+
+    legs = client.post('/routes/geojson/route', json=route[0]).get_json()
+    lines = [f for f in legs['features'] if f['geometry']['type'] == 'LineString']
+    assert [f['properties']['flight_number'] for f in lines] == route[0]['flights']
+    assert all('cost' in f['properties'] for f in lines)
+    roles = [f['properties']['role'] for f in legs['features'] if f['geometry']['type'] == 'Point']
+    assert roles[0] == 'origin' and roles[-1] == 'destination'
+
+    comparison = client.post('/routes/geojson/comparison', json={"routes": route}).get_json()
+    assert comparison['properties']['routes'] == len(route)
+    assert {f['properties']['route_index'] for f in comparison['features']
+            if f['geometry']['type'] == 'LineString'} == set(range(len(route)))
+
+    assert client.post('/routes/geojson/route', json={}).status_code == 400
+    assert client.post('/routes/geojson/comparison', json={"routes": []}).status_code == 400
+
+
+def test_geometry_is_reused_until_the_network_changes():
+    generator = SyntheticNetworkGenerator(10, 40, 'hub_spoke', seed=2)
+    network = generator.load_into_network(FlightNetwork())
+    geometry = network_geometry(network)
+    generator.load_into_network(network)
+    assert network_geometry(network) is geometry
+    network.handle_flight_cancellation(next(iter(network.edge_index)))
+    assert network_geometry(network) is not geometry
+    assert json.dumps(network_geometry(network).network_collection())
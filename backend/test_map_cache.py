@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for map rendering and the rendered map cache behind /routes/visualize-route
+"""
+
+import time
+
+import folium
+import pytest
+
+from map_cache import CACHE_METRIC, MapRenderCache, get_map_cache
+from map_visualization import create_route_map, render_map_html
+from metrics import registry
+from models import db, Airport
+
+ROUTE = {"airports": ["DEL", "BOM", "BLR"], "flights": ["AI101", "6E202"], "route_type": "cost"}
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(0)
+    with app.app_context():
+        db.session.add_all([
+            Airport(code='DEL', name='Indira Gandhi International Airport', city='Delhi', latitude=28.5562, longitude=77.1000),
+            Airport(code='BOM', name='Chhatrapati Shivaji Maharaj International Airport', city='Mumbai', latitude=19.0896, longitude=72.8656),
+            Airport(code='BLR', name='Kempegowda International Airport', city='Bangalore', latitude=12.9716, longitude=77.5946),
+        ])
+        db.session.commit()
+    return app
+
+
+def lookups(result):
+    return registry.counter_value(CACHE_METRIC, {'kind': 'route', 'result': result})
+
+
+def test_repeated_route_maps_are_served_from_the_cache(app):
+    client = app.test_client()
+    misses, hits = lookups('miss'), lookups('hit')
+
+    first = client.post('/routes/visualize-route', json=ROUTE)
+    assert first.status_code == 200 and first.mimetype == 'text/html'
+    start = time.perf_counter()
+    second = client.post('/routes/visualize-route', json=ROUTE)
+    elapsed = time.perf_counter() - start
+
+    assert second.get_data() == first.get_data()
+    assert (lookups('miss'), lookups('hit')) == (misses + 1, hits + 1)
+    assert elapsed < 0.05, elapsed
+
+    # Another route type is a different map
+    client.post('/routes/visualize-route', json={**ROUTE, "route_type": "time"})
+    assert lookups('miss') == misses + 2
+
+
+def test_airport_changes_invalidate_cached_maps(app):
+    client = app.test_client()
+    client.post('/routes/visualize-route', json=ROUTE)
+
+    with app.app_context():
+        Airport.query.filter_by(code='BOM').first().name = 'Renamed Mumbai Airport'
+        db.session.commit()
+    html = client.post('/routes/visualize-route', json=ROUTE).get_data(as_text=True)
+    assert 'Renamed Mumbai Airport' in html
+    with app.app_context():
+        assert len(get_map_cache()) == 2
+
+
+def test_cache_is_bounded_lru():
+    cache = MapRenderCache(2)
+    cache.put('a', '<a>')
+    cache.put('b', '<b>')
+    assert cache.get('a') == '<a>'
+    cache.put('c', '<c>')
+    assert 'b' not in cache and 'a' in cache and len(cache) == 2
+
+
+def test_maps_render_to_a_full_document_without_an_iframe(app):
+    with app.app_context():
+        map_viz = create_route_map(ROUTE['airports'], ROUTE['flights'], 'cost')
+        document = render_map_html(map_viz)
+    assert document.lstrip().startswith('<!DOCTYPE html>')
+    assert 'srcdoc' not in document and 'Kempegowda' in document
+
+    detached = folium.Map(location=[20.0, 78.0])
+    detached._parent = None
+    assert '<!DOCTYPE html>' in render_map_html(detached) and detached._parent is None
+
+    response = app.test_client().get('/routes/visualize-network')
+    assert response.status_code == 200 and 'srcdoc' not in response.get_data(as_text=True)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for background pre-rendering of maps for popular OD pairs
+"""
+
+from flight_network import flight_network
+from map_cache import CACHE_METRIC, get_map_cache, route_map_key
+from map_prerender import ODFrequencySketch, PRERENDER_METRIC
+from metrics import registry
+from models import db, Airport, Flight
+
+
+def make_network_app(make_app):
+    """App on a 15-airport network and an OD pair to search"""
+    app = make_app(15, 90, seed=8, build_network=True)
+    source, destination = sorted(flight_network.graph)[:2]
+    return app, source, destination
+
+
+def lookups(kind, result):
+    return registry.counter_value(CACHE_METRIC, {'kind': kind, 'result': result})
+
+
+def test_sketch_keeps_the_heavy_hitters():
+    sketch = ODFrequencySketch(4)
+    for n in range(100):
+        sketch.add(('DEL', 'BOM'))
+        if n % 2:
+            sketch.add(('BLR', 'MAA'))
+        if n % 3 == 0:
+            sketch.add((f'X{n}', 'GOI'))  # one-off pairs churning through the spare counters
+    assert [pair for pair, _ in sketch.top(2)] == [('DEL', 'BOM'), ('BLR', 'MAA')]
+    assert len(sketch) == 4 and sketch.top(1)[0][1] == 100
+
+
+def test_maps_of_found_routes_are_ready_before_they_are_asked_for(make_app):
+    app, source, destination = make_network_app(make_app)
+    client = app.test_client()
+    prerenderer = app.extensions['map_prerender']
+
+    found = client.post('/routes/find', json={'source': source, 'destination': destination}).get_json()
+    prerenderer.wait()
+    route = found['routes'][0]
+    misses, hits = lookups('route', 'miss'), lookups('route', 'hit')
+    response = client.post('/routes/visualize-route', json={
+        'airports': route['airports'], 'flights': route['flights'], 'route_type': route['route_type']
+    })
+    assert response.status_code == 200
+    assert (lookups('route', 'miss'), lookups('route', 'hit')) == (misses, hits + 1)
+
+    # Several routes are shown as one comparison map
+    found = client.post('/routes/find', json={'source': source, 'destination': destination,
+                                              'algorithm': 'multiple'}).get_json()
+    prerenderer.wait()
+    hits = lookups('comparison', 'hit')
+    response = client.post('/routes/visualize-comparison', json={'routes': found['routes']})
+    assert response.status_code == 200 and lookups('comparison', 'hit') == hits + 1
+
+
+def test_hot_pairs_are_rendered_again_when_the_graph_changes(make_app):
+    app, source, destination = make_network_app(make_app)
+    client = app.test_client()
+    prerenderer = app.extensions['map_prerender']
+    client.post('/routes/find', json={'source': source, 'destination': destination})
+    prerenderer.wait()
+
+    rendered = registry.counter_value(PRERENDER_METRIC, {'kind': 'route', 'result': 'rendered'})
+    with app.app_context():
+        airports = {a.code: a.id for a in Airport.query.all()}
+        db.session.add(Flight(flight_number='ZZ999', source_id=airports[source], destination_id=airports[destination],
+                              duration=1.0, price=1.0, delay_prob=0.0, departure_time='06:00',
+                              arrival_time='07:00', aircraft_type='A320'))
+        db.session.commit()
+    client.post('/routes/build-network')
+    prerenderer.wait()
+
+    assert registry.counter_value(PRERENDER_METRIC, {'kind': 'route', 'result': 'rendered'}) == rendered + 1
+    with app.app_context():
+        route, = flight_network.search(source, destination)
+        assert route.flights == ['ZZ999']
+        assert route_map_key(route.airports, route.flights, route.route_type) in get_map_cache()
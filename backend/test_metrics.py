@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for phase timing metrics and the Prometheus /metrics endpoint
+"""
+
+from metrics import MetricsRegistry, registry, OTHER_LABEL, PHASE_METRIC, REQUEST_METRIC, UNMATCHED_ENDPOINT
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = MetricsRegistry()
+    for value in (0.0004, 0.003, 0.003, 2.0):
+        reg.observe('phase_seconds', value, {'phase': 'search', 'endpoint': '/routes/find'})
+    reg.increment('cache_hits_total', {'cache': 'map'}, 3)
+
+    text = reg.render_prometheus()
+
+    assert '# TYPE phase_seconds histogram' in text
+    assert 'phase_seconds_bucket{endpoint="/routes/find",phase="search",le="0.0005"} 1' in text
+    assert 'phase_seconds_bucket{endpoint="/routes/find",phase="search",le="0.005"} 3' in text
+    assert 'phase_seconds_bucket{endpoint="/routes/find",phase="search",le="+Inf"} 4' in text
+    assert 'phase_seconds_count{endpoint="/routes/find",phase="search"} 4' in text
+    assert 'cache_hits_total{cache="map"} 3' in text
+
+
+def test_label_values_are_escaped():
+    reg = MetricsRegistry()
+    reg.increment('odd_total', {'reason': 'say "hi"\n'})
+    assert 'odd_total{reason="say \\"hi\\"\\n"} 1' in reg.render_prometheus()
+
+
+def test_find_records_every_phase(make_app, airport_codes):
+    app = make_app(20, 120, seed=2)
+    codes = airport_codes(app)
+    registry.reset()
+
+    client = app.test_client()
+    response = client.post('/routes/find', json={
+        "source": codes[0], "destination": codes[-1], "algorithm": "dijkstra", "optimization": "time"
+    })
+    assert response.status_code == 200
+
+    text = client.get('/metrics').get_data(as_text=True)
+    for phase in ('build_network', 'search', 'persist', 'serialize'):
+        assert (f'{PHASE_METRIC}_count{{algorithm="dijkstra",endpoint="/routes/find",'
+                f'optimization="time",phase="{phase}"}} 1') in text
+    assert 'flightres_request_duration_seconds_count' in text
+
+
+def test_client_input_cannot_create_new_series(make_app, airport_codes):
+    app = make_app(20, 120, seed=2)
+    codes = airport_codes(app)
+    registry.reset()
+
+    client = app.test_client()
+    for n in range(3):
+        client.post('/routes/find', json={"source": codes[0], "destination": codes[-1],
+                                          "algorithm": f"made-up-{n}", "optimization": f"x{n}"})
+        client.get(f'/no/such/page/{n}')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'made-up' not in text and '/no/such' not in text
+    assert (f'{REQUEST_METRIC}_count{{algorithm="{OTHER_LABEL}",endpoint="/routes/find",'
+            f'method="POST",optimization="{OTHER_LABEL}",status="200"}} 3') in text
+    assert f'endpoint="{UNMATCHED_ENDPOINT}",method="GET",optimization="",status="404"}} 3' in text
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the aggregated network overview map
+"""
+
+from flight_network import FlightNetwork
+from map_visualization import aggregate_airport_pairs, create_route_map, render_map_html
+from models import db, Airport, Flight
+from synthetic_network import SyntheticNetworkGenerator
+
+AIRPORT_COORDS = {
+    'DEL': (28.5562, 77.1000), 'BOM': (19.0896, 72.8656), 'BLR': (12.9716, 77.5946),
+    'MAA': (12.9941, 80.1709), 'CCU': (22.6549, 88.4462), 'HYD': (17.2403, 78.4294),
+    'AMD': (23.0726, 72.6177), 'PNQ': (18.5821, 73.9197), 'GOI': (15.3808, 73.8314),
+    'JAI': (26.8167, 75.8042),
+}
+
+def with_overview_flights(app, flights_per_direction):
+    """app with every ordered pair of the overview airports flown flights_per_direction times"""
+    with app.app_context():
+        airports = [Airport(code=code, name=f'{code} Airport', city=code, latitude=lat, longitude=lon)
+                    for code, (lat, lon) in AIRPORT_COORDS.items()]
+        db.session.add_all(airports)
+        db.session.flush()
+        rows = []
+        for source in airports:
+            for destination in airports:
+                if source is destination:
+                    continue
+                for n in range(flights_per_direction):
+                    rows.append(dict(flight_number=f'{source.code}{destination.code}{n}', source_id=source.id,
+                                     destination_id=destination.id, duration=1.5 + n % 3, price=3000.0 + 100 * n,
+                                     delay_prob=0.05 * (n % 5), departure_time='08:00', arrival_time='10:00',
+                                     aircraft_type='A320'))
+        db.session.execute(Flight.__table__.insert(), rows)
+        db.session.commit()
+    return app
+
+
+def overview(app, query=''):
+    response = app.test_client().get('/routes/visualize-network' + query)
+    assert response.status_code == 200, response.get_data(as_text=True)[:200]
+    return response.get_data(as_text=True)
+
+
+def test_aggregated_html_is_bounded_by_airport_pairs(make_app):
+    small, large = with_overview_flights(make_app(0), 2), with_overview_flights(make_app(0), 12)
+    flights_html = overview(large, '?mode=flights')
+    small_html, large_html = overview(small, '?mode=aggregated'), overview(large, '?mode=aggregated')
+
+    # 45 pairs either way; six times the flights adds only popup digits
+    assert large_html.count('L.polyline(') == small_html.count('L.polyline(') == 45
+    assert abs(len(large_html) - len(small_html)) < len(small_html) * 0.05
+    assert flights_html.count('L.polyline(') == 90 * 12
+    assert len(large_html) * 5 < len(flights_html)
+    assert 'markerClusterGroup' in large_html and '24 flights' in large_html
+
+    # 'auto' aggregates above the threshold (1080 flights)
+    assert overview(large).count('L.polyline(') == 45
+
+
+def test_region_buckets_join_regions(make_app):
+    app = with_overview_flights(make_app(0), 1)
+    html = overview(app, '?region_degrees=5')
+    assert 'L.circleMarker(' in html and 'markerClusterGroup' not in html
+    assert html.count('L.polyline(') < 45
+    assert 'flights within the region' in html
+
+    client = app.test_client()
+    assert client.get('/routes/visualize-network?region_degrees=abc').status_code == 400
+    assert client.get('/routes/visualize-network?region_degrees=0').status_code == 400
+    assert client.get('/routes/visualize-network?mode=everything').status_code == 400
+
+
+def test_pair_aggregates_cover_every_flight():
+    network = SyntheticNetworkGenerator(20, 300, 'hub_spoke', seed=5).load_into_network(FlightNetwork())
+    pairs = aggregate_airport_pairs(network.graph, lambda code: code)
+    edges = [(source, edge) for source, edges in network.graph.items() for edge in edges]
+    assert sum(stats['flights'] for stats in pairs.values()) == len(edges)
+    assert len(pairs) == len({tuple(sorted((source, edge.destination))) for source, edge in edges})
+    for (a, b), stats in pairs.items():
+        costs = [edge.cost for source, edge in edges if {source, edge.destination} == {a, b}]
+        assert stats['min_cost'] == min(costs)
+
+
+def test_route_arrows_follow_segment_bearing(make_app):
+    app = with_overview_flights(make_app(0), 1)
+    with app.app_context():
+        html = render_map_html(create_route_map(['DEL', 'MAA', 'CCU']))
+    # DEL -> MAA heads almost due south, MAA -> CCU north-north-east; the icon points east
+    assert html.count('fa-rotate-79"') == 3
+    assert html.count('fa-rotate-308"') == 3
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached /routes/network-stats counters
+"""
+
+from sqlalchemy import text
+
+from app import close_app
+from flight_network import FlightNetwork
+from models import db, Flight, FlightStatus
+from network_stats import get_stats_cache
+from route_writer import get_writer
+from synthetic_network import SyntheticNetworkGenerator
+from test_flights_api import count_queries
+
+
+def test_stats_are_served_from_counters_and_follow_commits(make_app, airport_codes):
+    app = make_app(15, 90, seed=6)
+    codes = airport_codes(app)
+    client = app.test_client()
+    assert client.get('/routes/network-stats').get_json()['saved_routes'] == 0
+
+    with app.app_context():
+        flight_number = Flight.query.first().flight_number
+        writer = get_writer()
+    writer.flush_interval = 60
+    client.post('/routes/handle-disruption', json={"flight_number": flight_number, "type": "delay",
+                                                   "delay_minutes": 30})
+    client.post('/flights/simulate-delay', json={"flight_number": flight_number})
+    client.post('/routes/find', json={"source": codes[1], "destination": codes[-1],
+                                      "algorithm": "multiple"})
+    saved = writer.flush()
+
+    with count_queries(app) as statements:
+        stats = client.get('/routes/network-stats').get_json()
+    assert statements == []
+    assert stats['total_disruptions_recorded'] == 2
+    assert stats['disruptions_today'] == 2
+    assert stats['saved_routes'] == saved > 0
+    assert stats['delayed_flights'] == 1
+
+
+def test_rolled_back_changes_are_not_counted(make_app):
+    app = make_app(15, 90, seed=6)
+    with app.app_context():
+        cache = get_stats_cache()
+        cache.snapshot()
+        flight = Flight.query.first()
+        db.session.add(FlightStatus(flight_id=flight.id, status='delayed'))
+        db.session.flush()
+        db.session.rollback()
+        assert cache.snapshot()['total_disruptions_recorded'] == 0
+
+
+def test_reconcile_corrects_writes_made_outside_the_session(make_app):
+    app = make_app(15, 90, seed=6)
+    with app.app_context():
+        cache = get_stats_cache()
+        cache.snapshot()
+        flight = Flight.query.first()
+        db.session.execute(text(
+            "INSERT INTO flight_status (flight_id, status, delay_minutes, updated_at)"
+            " VALUES (:flight_id, 'delayed', 10, '2020-01-01 00:00:00')"), {'flight_id': flight.id})
+        db.session.commit()
+
+        assert cache.snapshot()['total_disruptions_recorded'] == 0
+        assert cache.reconcile() == {"saved_routes": 0, "total_disruptions_recorded": 1, "disruptions_today": 0}
+        assert cache.snapshot()['total_disruptions_recorded'] == 1
+
+
+def test_reconciler_thread_stops_with_the_app(make_app):
+    app = make_app(15, 90, seed=6)
+    with app.app_context():
+        cache = get_stats_cache()
+        cache.snapshot()
+    assert cache._thread.is_alive()
+
+    close_app(app)
+    assert not cache._thread.is_alive()
+
+
+def test_flight_changes_reach_the_edge_statistics(make_app):
+    app = make_app(15, 90, seed=6)
+    client = app.test_client()
+    before = client.get('/routes/network-stats').get_json()
+
+    with app.app_context():
+        flight = Flight.query.first()
+        db.session.add(Flight(flight_number='ZZ1', source_id=flight.source_id, destination_id=flight.destination_id,
+                              duration=1.0, price=1.0, delay_prob=1.0))
+        db.session.commit()
+    stats = client.get('/routes/network-stats').get_json()
+    assert stats['total_flights'] == before['total_flights'] + 1
+    assert stats['avg_delay_probability'] > before['avg_delay_probability']
+
+    # Writes the data versions don't see are picked up once the build is a reconcile interval old
+    with app.app_context():
+        get_stats_cache().reconcile_interval = 0.0
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("DELETE FROM flight WHERE flight_number = 'ZZ1'")
+            connection.commit()
+    assert client.get('/routes/network-stats').get_json()['total_flights'] == before['total_flights']
+
+
+def test_edge_aggregates_match_a_full_recount_after_incremental_changes():
+    generator = SyntheticNetworkGenerator(30, 300, 'hub_spoke', seed=9)
+    network = generator.load_into_network(FlightNetwork())
+    flights = [f['flight_number'] for f in generator.iter_flights()]
+
+    for flight_number in flights[:20]:
+        network.handle_flight_delay(flight_number, 45)
+    for flight_number in flights[10:30]:
+        network.handle_flight_cancellation(flight_number)
+    network.handle_flight_delay(flights[0], 90)
+
+    edges = [edge for edges in network.graph.values() for edge in edges]
+    stats = network.get_network_statistics()
+    assert stats['total_flights'] == len(edges) == 280
+    assert abs(stats['avg_delay_probability'] - round(sum(e.delay_prob for e in edges) / len(edges), 3)) < 1e-9
+
+    # A rebuild from the same records lands on the same network
+    rebuilt = FlightNetwork()
+    rebuilt.delayed_flights = set(network.delayed_flights)
+    rebuilt.cancelled_flights = set(network.cancelled_flights)
+    generator.load_into_network(rebuilt)
+    assert rebuilt.get_network_statistics() == stats
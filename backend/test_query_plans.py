@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Query plan checks for the hot queries.
+
+Each test drives a real endpoint, captures the SQL it issues and runs
+EXPLAIN QUERY PLAN on it, so a refactor that stops using an index (or a
+dropped index) fails here instead of silently turning into a table scan.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event, text
+
+from db import upgrade_schema
+from models import db, Booking, Flight, Route, RouteSegment
+from route_writer import route_content_hash
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(20, 100, seed=4)
+    with app.app_context():
+        flight = Flight.query.first()
+        db.session.add(Booking(user_name='alice', flight_id=flight.id))
+        db.session.commit()
+    return app
+
+
+def plans_for(app, request, marker):
+    """EXPLAIN QUERY PLAN details of every statement issued by request() that contains marker"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if marker in statement:
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        request(app.test_client())
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    assert captured, f"no statement containing {marker!r} was executed"
+    with app.app_context():
+        connection = db.session.connection()
+        return [
+            ' | '.join(row[-1] for row in
+                       connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+            for statement, parameters in captured
+        ]
+
+
+def first_flight_number(app):
+    with app.app_context():
+        return Flight.query.first().flight_number
+
+
+def test_latest_flight_status_uses_flight_id_updated_at_index(app):
+    flight_number = first_flight_number(app)
+    plans = plans_for(app, lambda c: c.get(f'/flights/status/{flight_number}'),
+                      'ORDER BY flight_status.updated_at DESC')
+    assert all('ix_flight_status_flight_id_updated_at' in plan for plan in plans), plans
+    assert all('TEMP B-TREE' not in plan for plan in plans), plans
+
+
+def test_flight_listing_uses_status_index_and_reads_no_bookings(app):
+    plans = plans_for(app, lambda c: c.get('/flights/'), 'ORDER BY flight.id')
+    assert 'ix_flight_status_flight_id_updated_at' in plans[0], plans
+    assert 'booking' not in plans[0], plans
+
+
+def test_flight_search_resolves_airport_codes_through_indexes(app):
+    with app.app_context():
+        flight = Flight.query.first()
+        source, destination = flight.source.code, flight.destination.code
+    plans = plans_for(app, lambda c: c.get(f'/flights/search?source={source}&max_price=9000'),
+                      'source_airport.code =')
+    assert 'SEARCH flight USING INDEX ix_flight_source_destination' in plans[0], plans
+    plans = plans_for(app, lambda c: c.get(f'/flights/search?destination={destination}'),
+                      'destination_airport.code =')
+    assert 'SEARCH flight USING INDEX ix_flight_destination_id' in plans[0], plans
+
+
+def test_saved_routes_uses_created_at_index(app):
+    plans = plans_for(app, lambda c: c.get('/routes/saved-routes'), 'ORDER BY route.created_at DESC')
+    assert all('ix_route_created_at' in plan for plan in plans), plans
+    assert all('TEMP B-TREE' not in plan for plan in plans), plans
+
+
+def test_disruptions_today_uses_updated_at_index(app):
+    plans = plans_for(app, lambda c: c.get('/routes/network-stats'), 'flight_status.updated_at >=')
+    assert all('SEARCH flight_status USING COVERING INDEX ix_flight_status_updated_at' in plan
+               for plan in plans), plans
+
+
+def test_affected_bookings_use_flight_id_index(app):
+    flight_number = first_flight_number(app)
+    plans = plans_for(app, lambda c: c.post('/routes/handle-disruption', json={
+        "flight_number": flight_number, "type": "delay", "delay_minutes": 20
+    }), 'FROM booking')
+    assert all('ix_booking_flight_id' in plan for plan in plans), plans
+    # Bookings on saved itineraries are found through route_segment, not by scanning routes
+    assert all('ix_booking_route_id' in plan and 'ix_route_segment_flight_id' in plan for plan in plans), plans
+
+
+def test_affected_itineraries_use_route_segment_index(app):
+    flight_number = first_flight_number(app)
+    plans = plans_for(app, lambda c: c.get(f'/routes/affected-itineraries/{flight_number}'),
+                      'JOIN route_segment')
+    assert 'SEARCH route_segment USING INDEX ix_route_segment_flight_id' in plans[0], plans
+
+
+def test_upgrade_schema_adds_missing_indexes(app):
+    with app.app_context():
+        db.session.execute(text('DROP INDEX ix_route_created_at'))
+        db.session.execute(text('DROP INDEX ix_booking_flight_id'))
+        db.session.commit()
+
+        assert sorted(upgrade_schema()) == ['ix_booking_flight_id', 'ix_route_created_at']
+        assert upgrade_schema() == []
+
+
+def test_upgrade_schema_adds_route_content_hash_and_backfills_it(app):
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO route (source_airport_code, destination_airport_code, route_type, total_cost,"
+            " total_duration, airports_sequence, flights_sequence)"
+            " VALUES ('AAA', 'BBB', 'cost', 10, 1, '[\"AAA\", \"BBB\"]', '[\"X1\"]')"))
+        db.session.execute(text('DROP INDEX ix_route_content_hash'))
+        db.session.execute(text('ALTER TABLE route DROP COLUMN content_hash'))
+        db.session.commit()
+
+        assert upgrade_schema() == ['route.content_hash', 'ix_route_content_hash']
+        assert db.session.execute(text('SELECT content_hash FROM route')).scalar() == \
+            route_content_hash(['AAA', 'BBB'], ['X1'])
+
+
+def test_upgrade_schema_backfills_route_segments(app):
+    with app.app_context():
+        first, second = Flight.query.order_by(Flight.id).limit(2).all()
+        db.session.add(Route(
+            source_airport_code='AAA', destination_airport_code='CCC', route_type='cost',
+            total_cost=10, total_duration=1,
+            airports_sequence='["AAA", "BBB", "CCC"]',
+            flights_sequence=json.dumps([first.flight_number, second.flight_number])))
+        db.session.commit()
+
+        upgrade_schema()
+        upgrade_schema()
+        segments = RouteSegment.query.order_by(RouteSegment.leg_index).all()
+        assert [(s.leg_index, s.flight_id, s.from_airport_code, s.to_airport_code) for s in segments] == [
+            (0, first.id, 'AAA', 'BBB'), (1, second.id, 'BBB', 'CCC')]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for write-behind route persistence
+"""
+
+import json
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from models import db, Booking, Route
+import route_writer
+from route_writer import RouteWriter, get_writer
+
+
+def route_count(app):
+    with app.app_context():
+        return Route.query.count()
+
+
+def test_find_queues_routes_and_flush_deduplicates(make_app, airport_codes):
+    app = make_app(20, 150, seed=5)
+    codes = airport_codes(app)
+    with app.app_context():
+        writer = get_writer()
+    writer.batch_size = 10_000
+    writer.flush_interval = 60
+    client = app.test_client()
+    request = {"source": codes[1], "destination": codes[-1], "algorithm": "multiple"}
+
+    routes = client.post('/routes/find', json=request).get_json()['routes']
+    client.post('/routes/find', json=request)
+    unique_paths = {tuple(route['flights']) for route in routes}
+
+    assert route_count(app) == 0
+    assert writer.pending() == 2 * len(routes)
+    assert writer.flush() == len(unique_paths)
+    assert writer.duplicates == 2 * len(routes) - len(unique_paths)
+
+    # Already stored routes are not written again by later batches
+    client.post('/routes/find', json=request)
+    assert writer.flush() == 0
+
+    saved = client.get('/routes/saved-routes').get_json()['routes']
+    assert {tuple(route['flights']) for route in saved} == unique_paths
+
+
+def test_background_thread_flushes_by_size_and_on_close(make_app, airport_codes, temp_database_uri):
+    app = make_app(20, 150, seed=5, database_uri=temp_database_uri)
+    codes = airport_codes(app)
+    writer = RouteWriter(app, batch_size=3, flush_interval=60)
+    app.extensions['route_writer'] = writer
+    client = app.test_client()
+
+    for destination in codes[2:6]:
+        client.post('/routes/find', json={"source": codes[1], "destination": destination,
+                                          "algorithm": "dijkstra"})
+
+    deadline = time.time() + 5
+    while writer.written < 3 and time.time() < deadline:
+        time.sleep(0.02)
+    assert writer.written >= 3
+
+    client.post('/routes/find', json={"source": codes[0], "destination": codes[-1],
+                                      "algorithm": "a_star"})
+    writer.close()
+    assert writer.pending() == 0
+    assert route_count(app) == writer.written == 5
+
+
+def test_failed_batches_are_retried_and_late_submits_written(make_app, airport_codes):
+    app = make_app(20, 150, seed=5)
+    codes = airport_codes(app)
+    writer = RouteWriter(app, batch_size=10_000, flush_interval=60, max_retries=2)
+    app.extensions['route_writer'] = writer
+    client = app.test_client()
+    client.post('/routes/find', json={"source": codes[1], "destination": codes[-1], "algorithm": "dijkstra"})
+
+    insert_routes = writer._insert_routes
+    def locked(rows):
+        raise OperationalError('INSERT INTO route', {}, Exception('database is locked'))
+    writer._insert_routes = locked
+    assert writer.flush() == 0 and writer.pending() == 1
+    assert writer.flush() == 0 and writer.pending() == 1
+
+    writer._insert_routes = insert_routes
+    assert writer.flush() == 1 and writer.pending() == 0 and writer.dropped == 0
+
+    # Past max_retries the batch is given up on
+    writer._insert_routes = locked
+    client.post('/routes/find', json={"source": codes[2], "destination": codes[-1], "algorithm": "dijkstra"})
+    for _ in range(3):
+        writer.flush()
+    assert writer.pending() == 0 and writer.dropped == 1
+
+    # Nothing flushes after close(), so submit writes immediately
+    writer._insert_routes = insert_routes
+    writer.close()
+    client.post('/routes/find', json={"source": codes[3], "destination": codes[-1], "algorithm": "dijkstra"})
+    assert writer.pending() == 0 and route_count(app) == 2
+
+
+def test_close_retries_a_failing_final_flush(make_app, airport_codes, monkeypatch):
+    monkeypatch.setattr(route_writer, 'CLOSE_RETRY_DELAY', 0.001)
+    app = make_app(20, 150, seed=5)
+    codes = airport_codes(app)
+    writer = RouteWriter(app, batch_size=10_000, flush_interval=60, max_retries=3)
+    app.extensions['route_writer'] = writer
+    client = app.test_client()
+    client.post('/routes/find', json={"source": codes[1], "destination": codes[-1], "algorithm": "dijkstra"})
+
+    # Locked for the shutdown flush and two retries, then free again
+    insert_routes, attempts = writer._insert_routes, []
+    def locked(rows):
+        raise OperationalError('INSERT INTO route', {}, Exception('database is locked'))
+    def locked_at_first(rows):
+        attempts.append(len(rows))
+        return locked(rows) if len(attempts) <= 3 else insert_routes(rows)
+    writer._insert_routes = locked_at_first
+    writer.close()
+    assert len(attempts) == 4 and writer.pending() == 0 and writer.dropped == 0
+    assert route_count(app) == 1
+
+    # A database that stays locked is given up on after max_retries, and counted
+    writer = RouteWriter(app, batch_size=10_000, flush_interval=60, max_retries=3)
+    app.extensions['route_writer'] = writer
+    client.post('/routes/find', json={"source": codes[2], "destination": codes[-1], "algorithm": "dijkstra"})
+    writer._insert_routes = locked
+    writer.close()
+    assert writer.pending() == 0 and writer.dropped == 1
+
+
+def test_saved_routes_are_indexed_by_flight_for_disruptions(make_app, airport_codes):
+    app = make_app(20, 150, seed=5)
+    codes = airport_codes(app)
+    with app.app_context():
+        writer = get_writer()
+    writer.flush_interval = 60
+    client = app.test_client()
+
+    multi_leg = None
+    for destination in codes[2:]:
+        routes = client.post('/routes/find', json={"source": codes[1], "destination": destination,
+                                                   "algorithm": "dijkstra"}).get_json().get('routes', [])
+        if routes and len(routes[0]['flights']) > 1:
+            multi_leg = routes[0]
+            break
+    assert multi_leg, "expected a connecting route in the synthetic network"
+    writer.flush()
+
+    last_leg = multi_leg['flights'][-1]
+    with app.app_context():
+        route = Route.query.filter_by(flights_sequence=json.dumps(multi_leg['flights'])).one()
+        assert [segment.flight.flight_number for segment in route.segments] == multi_leg['flights']
+        db.session.add(Booking(user_name='dana', flight_id=route.segments[0].flight_id, route_id=route.id))
+        db.session.commit()
+        route_id = route.id
+
+    affected = client.get(f'/routes/affected-itineraries/{last_leg}').get_json()
+    assert route_id in [itinerary['id'] for itinerary in affected['itineraries']]
+    assert next(i for i in affected['itineraries'] if i['id'] == route_id)['leg_index'] == len(multi_leg['flights']) - 1
+
+    # The booking is on the first leg but its itinerary also flies the disrupted last leg
+    disruption = client.post('/routes/handle-disruption', json={
+        "flight_number": last_leg, "type": "cancellation"
+    }).get_json()
+    assert disruption['affected_passengers'] == 1
+    assert disruption['affected_itineraries'] >= 1
+    assert all(a['route_id'] == route_id for a in disruption['alternatives'])
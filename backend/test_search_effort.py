@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the search-effort counters reported by /routes/compare-algorithms
+"""
+
+import pytest
+
+from flight_network import FlightNetwork, SearchStats
+from synthetic_network import SyntheticNetworkGenerator
+
+
+def test_counters_are_consistent_for_both_algorithms():
+    generator = SyntheticNetworkGenerator(40, 400, 'hub_spoke', seed=13)
+    network = generator.load_into_network(FlightNetwork())
+    codes = [a['code'] for a in generator.airports()]
+
+    dijkstra, a_star = SearchStats(), SearchStats()
+    assert network.dijkstra_shortest_path(codes[1], codes[-1], 'cost', dijkstra)
+    assert network.a_star_shortest_path(codes[1], codes[-1], 'cost', a_star)
+
+    # Dijkstra pushes once per relaxation; A* only when the relaxation improves g
+    assert dijkstra.heap_pushes == dijkstra.relaxations + 1
+    assert a_star.heap_pushes <= a_star.relaxations + 1
+    for stats in (dijkstra, a_star):
+        assert 0 < stats.settled_nodes <= stats.heap_pops <= stats.heap_pushes
+        assert stats.relaxations > 0 and stats.wall_time_ms > 0
+
+    # Counters accumulate over searches sharing one SearchStats
+    first = dijkstra.to_dict()
+    network.dijkstra_shortest_path(codes[1], codes[-1], 'cost', dijkstra)
+    for counter in ('heap_pushes', 'heap_pops', 'settled_nodes', 'relaxations'):
+        assert getattr(dijkstra, counter) == 2 * first[counter]
+
+
+def test_compare_algorithms_reports_effort_per_algorithm(make_app, airport_codes):
+    app = make_app(20, 120, seed=2)
+    codes = airport_codes(app)
+    response = app.test_client().post('/routes/compare-algorithms', json={
+        "source": codes[1], "destination": codes[-1], "repeat": 5
+    })
+    assert response.status_code == 200
+    comparison = response.get_json()['comparison']
+    assert comparison['repeat'] == 5
+
+    for effort in comparison['search_effort'].values():
+        assert 0 < effort['settled_nodes'] <= effort['heap_pops'] <= effort['heap_pushes']
+        assert effort['relaxations'] > 0
+        wall_time = effort['wall_time_ms']
+        assert 0 < wall_time['min'] <= wall_time['median'] <= wall_time['max']
+        assert wall_time['min'] <= wall_time['mean'] <= wall_time['max']
+
+
+@pytest.mark.parametrize('repeat', [0, 101, True, 2.5, '3', None])
+def test_repeat_must_be_an_integer_in_range(make_app, airport_codes, repeat):
+    app = make_app(10, 40, seed=2)
+    codes = airport_codes(app)
+    response = app.test_client().post('/routes/compare-algorithms', json={
+        "source": codes[1], "destination": codes[-1], "repeat": repeat
+    })
+    assert response.status_code == 400
+    assert 'repeat' in response.get_json()['error']
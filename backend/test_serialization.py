@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the JSON provider and compiled row serializers
+"""
+
+from datetime import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+import serialization
+from benchmark_serialization import flight_dict_by_hand
+from models import Flight
+from serialization import OrjsonProvider, compile_serializer, serialize_flight
+
+
+def test_orjson_provider_matches_stdlib_output(make_app):
+    app = make_app(10, 40, seed=4)
+    assert isinstance(app.json, OrjsonProvider)
+    payload = {"b": [1, 2.5, None, "é"], "a": {"when": datetime(2024, 5, 1, 12, 30), "3": True}}
+    with app.test_request_context():
+        fast = app.json.response(payload).get_data()
+        stdlib = DefaultJSONProvider(app).response(payload).get_data()
+    assert fast == stdlib.replace(b'\\u00e9', 'é'.encode())
+    assert app.json.loads(app.json.dumps({3: True})) == {'3': True}
+
+    client = app.test_client()
+    listing = client.get('/flights/')
+    app.json = DefaultJSONProvider(app)
+    assert client.get('/flights/?limit=1000').get_json() == listing.get_json()
+
+
+def test_falls_back_to_stdlib_without_orjson(make_app, monkeypatch):
+    app = make_app(10, 40, seed=4)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert serialization.init_app(app) == 'stdlib'
+    assert type(app.json) is DefaultJSONProvider
+    assert len(app.test_client().get('/flights/airports').get_json()) == 10
+
+    app.config['JSON_BACKEND'] = 'orjson'
+    assert serialization.init_app(app) == 'stdlib'
+
+
+def test_compiled_serializers_match_hand_written_dicts(make_app):
+    app = make_app(10, 40, seed=4)
+    with app.app_context():
+        for flight in Flight.query.all():
+            assert serialize_flight(flight) == flight_dict_by_hand(flight)
+
+    serialize = compile_serializer({'n': 'name', 'twice': ('value', lambda v: v * 2), 'nested': {'v': 'value'}})
+
+    class Row:
+        name, value = 'x', 21
+    assert serialize(Row()) == {'n': 'x', 'twice': 42, 'nested': {'v': 21}}
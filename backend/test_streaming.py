@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed (NDJSON / chunked JSON) collection responses
+"""
+
+import json
+import tracemalloc
+
+from flight_network import flight_network
+from models import db, Booking, Flight
+
+NDJSON = {'Accept': 'application/x-ndjson'}
+JSON_STREAM = {'Accept': 'application/stream+json'}
+
+
+def with_bookings(app):
+    """app with 25 bookings spread over its first three flights"""
+    with app.app_context():
+        flight_ids = [f.id for f in Flight.query.limit(3)]
+        db.session.add_all([Booking(user_name=f'user{i}', flight_id=flight_ids[i % 3]) for i in range(25)])
+        db.session.commit()
+    return app
+
+
+def test_flights_stream_matches_buffered_listing(make_app):
+    app = with_bookings(make_app(30, 300, seed=12))
+    client = app.test_client()
+    buffered = client.get('/flights/').get_json()
+
+    ndjson = client.get('/flights/', headers=NDJSON)
+    assert ndjson.mimetype == 'application/x-ndjson'
+    assert [json.loads(line) for line in ndjson.get_data(as_text=True).splitlines()] == buffered
+
+    chunked = client.get('/flights/', headers=JSON_STREAM)
+    assert chunked.mimetype == 'application/stream+json'
+    assert json.loads(chunked.get_data()) == buffered
+
+    # Browsers and plain clients keep getting the buffered JSON array
+    assert client.get('/flights/', headers={'Accept': '*/*'}).mimetype == 'application/json'
+
+
+def test_bookings_and_delay_predictions_stream(make_app):
+    app = with_bookings(make_app(30, 300, seed=12))
+    client = app.test_client()
+
+    assert json.loads(client.get('/bookings/', headers=JSON_STREAM).get_data()) == \
+        client.get('/bookings/').get_json()
+
+    lines = client.get('/routes/delay-prediction', headers=NDJSON).get_data(as_text=True).splitlines()
+    predictions = [json.loads(line) for line in lines]
+    # One per edge; the shared network may hold flights cancelled by other tests
+    assert len(predictions) == sum(len(edges) for edges in flight_network.graph.values()) > 250
+    assert {'flight_number', 'source', 'destination', 'risk_level'} <= set(predictions[0])
+
+    document = json.loads(client.get('/routes/delay-prediction', headers=JSON_STREAM).get_data())
+    assert set(document) == {'predictions', 'generated_at'}
+    assert sorted(p['flight_number'] for p in document['predictions']) == \
+        sorted(p['flight_number'] for p in predictions)
+
+
+def peak_memory(client, headers):
+    tracemalloc.start()
+    try:
+        response = client.get('/flights/', headers=headers)
+        chunks = 0
+        for chunk in response.response:
+            chunks += 1
+        return tracemalloc.get_traced_memory()[1], chunks
+    finally:
+        tracemalloc.stop()
+
+
+def test_streaming_keeps_peak_memory_flat(make_app):
+    app = with_bookings(make_app(30, 6000, seed=12))
+    client = app.test_client()
+    # Warm up imports with a streamed request; a buffered one would fill the
+    # response cache and the buffered measurement would not build anything
+    client.get('/flights/', headers=NDJSON).get_data()
+
+    buffered_peak, _ = peak_memory(client, {})
+    streamed_peak, chunks = peak_memory(client, NDJSON)
+
+    assert chunks > 10
+    assert streamed_peak * 3 < buffered_peak, (streamed_peak, buffered_peak)
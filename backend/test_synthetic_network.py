@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic network generator used for scale testing
+"""
+
+from flask import Flask
+
+from models import db, Airport, Flight
+from synthetic_network import SyntheticNetworkGenerator
+
+
+def reachable_from(network, source):
+    """Airports reachable from source following flight edges"""
+    seen = {source}
+    stack = [source]
+    while stack:
+        for edge in network.graph[stack.pop()]:
+            if edge.destination not in seen:
+                seen.add(edge.destination)
+                stack.append(edge.destination)
+    return seen
+
+
+def test_generator_is_deterministic():
+    first = SyntheticNetworkGenerator(200, 3000, 'geometric', seed=7)
+    second = SyntheticNetworkGenerator(200, 3000, 'geometric', seed=7)
+    other = SyntheticNetworkGenerator(200, 3000, 'geometric', seed=8)
+
+    assert first.airports() == second.airports()
+    assert list(first.iter_flights()) == list(second.iter_flights())
+    assert list(first.iter_flights()) == list(first.iter_flights())
+    assert first.airports() != other.airports()
+
+
+def test_flight_counts_and_realistic_values():
+    generator = SyntheticNetworkGenerator(300, 5000, 'hub_spoke', seed=1)
+    flights = list(generator.iter_flights())
+    codes = [a['code'] for a in generator.airports()]
+
+    assert len(flights) == 5000
+    assert len(set(codes)) == 300
+    assert len({f['flight_number'] for f in flights}) == 5000
+    for f in flights:
+        assert f['source_id'] != f['destination_id']
+        assert 0.5 <= f['duration'] < 10
+        assert f['price'] >= 1500
+        assert 0 < f['delay_prob'] <= 0.6
+
+
+def test_backbone_keeps_network_connected():
+    for topology in ('hub_spoke', 'geometric'):
+        generator = SyntheticNetworkGenerator(500, 4000, topology, seed=3)
+        network = generator.load_into_network()
+
+        assert len(network.airports) == 500
+        assert sum(len(edges) for edges in network.graph.values()) == 4000
+        source = generator.airports()[0]['code']
+        assert len(reachable_from(network, source)) == 500
+        assert network.dijkstra_shortest_path(source, generator.airports()[-1]['code'])
+
+
+def test_write_to_db():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    generator = SyntheticNetworkGenerator(50, 600, 'geometric', seed=5)
+    with app.app_context():
+        counts = generator.write_to_db()
+
+        assert counts == {"airports": 50, "flights": 600}
+        assert Airport.query.count() == 50
+        assert Flight.query.count() == 600
+        flight = Flight.query.first()
+        assert flight.source.code in {a['code'] for a in generator.airports()}
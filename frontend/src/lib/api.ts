@@ -33,6 +33,7 @@ export interface Flight {
   aircraft_type: string;
   max_capacity: number;
   current_bookings: number;
+  availability?: number;
   latest_status?: {
     status: string;
     delay_minutes: number;
@@ -80,20 +81,71 @@ export interface NetworkStats {
   disruptions_today?: number;
 }
 
+export interface SearchEffort {
+  heap_pushes: number;
+  heap_pops: number;
+  settled_nodes: number;
+  relaxations: number;
+  wall_time_ms: {
+    min: number;
+    mean: number;
+    median: number;
+    max: number;
+    stdev: number;
+  };
+}
+
 export interface DisruptionResponse {
   message: string;
   flight_number: string;
   disruption_type: string;
   delay_minutes?: number;
   affected_passengers: number;
+  affected_itineraries: number;
   alternative_routes_found: number;
   alternatives: Array<{
     booking_id: number;
     passenger: string;
+    route_id: number | null;
     alternative_routes: Route[];
   }>;
 }
 
+// GeoJSON returned by /routes/geojson/*; coordinates are [longitude, latitude]
+export interface GeoJSONFeature {
+  type: 'Feature';
+  geometry:
+    | { type: 'Point'; coordinates: [number, number] }
+    | { type: 'LineString'; coordinates: Array<[number, number]> };
+  properties: {
+    code?: string;
+    name?: string;
+    city?: string;
+    role?: 'origin' | 'layover' | 'destination';
+    flight_number?: string | null;
+    source?: string;
+    destination?: string;
+    cost?: number;
+    duration?: number;
+    delay_prob?: number;
+    distance_km?: number;
+    delayed?: boolean;
+    leg?: number;
+    route_type?: string;
+    route_index?: number;
+  };
+}
+
+export interface GeoJSONFeatureCollection {
+  type: 'FeatureCollection';
+  features: GeoJSONFeature[];
+  properties?: {
+    graph_version: number;
+    route_type?: string;
+    routes?: number;
+  };
+}
+
 class FlightNetworkAPI {
   private async request<T>(endpoint: string, options?: RequestInit): Promise<T> {
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
@@ -128,8 +180,14 @@ class FlightNetworkAPI {
   async searchFlights(params: {
     source?: string;
     destination?: string;
+    min_price?: number;
     max_price?: number;
+    min_duration?: number;
     max_duration?: number;
+    departure_after?: string;
+    departure_before?: string;
+    aircraft_type?: string;
+    max_delay_prob?: number;
     status?: string;
   }): Promise<{ flights: Flight[]; count: number; search_criteria: any }> {
     const searchParams = new URLSearchParams();
@@ -162,6 +220,7 @@ class FlightNetworkAPI {
     algorithm?: 'dijkstra' | 'a_star' | 'multiple';
     optimization?: 'cost' | 'time' | 'reliability';
     num_routes?: number;
+    min_seats?: number;
   }): Promise<RouteResponse> {
     return this.request<RouteResponse>('/routes/find', {
       method: 'POST',
@@ -173,6 +232,7 @@ class FlightNetworkAPI {
     source: string;
     destination: string;
     optimization?: 'cost' | 'time' | 'reliability';
+    repeat?: number;
   }): Promise<{
     source: string;
     destination: string;
@@ -183,6 +243,11 @@ class FlightNetworkAPI {
       same_route: boolean;
       cost_difference: number;
       time_difference: number;
+      repeat: number;
+      search_effort: {
+        dijkstra: SearchEffort;
+        a_star: SearchEffort;
+      };
     } | null;
   }> {
     return this.request('/routes/compare-algorithms', {
@@ -229,7 +294,7 @@ class FlightNetworkAPI {
   }
 
   // Route History
-  async getSavedRoutes(): Promise<{
+  async getSavedRoutes(cursor?: string): Promise<{
     routes: Array<{
       id: number;
       source: string;
@@ -243,8 +308,10 @@ class FlightNetworkAPI {
       created_at: string;
     }>;
     total_count: number;
+    next_cursor: string | null;
   }> {
-    return this.request('/routes/saved-routes');
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    return this.request(`/routes/saved-routes${query}`);
   }
 
   // Health Check
@@ -322,6 +389,29 @@ class FlightNetworkAPI {
     console.log('[API] Received comparison HTML content length:', htmlContent.length);
     return htmlContent;
   }
+
+  // GeoJSON for client-side map rendering
+  async getRouteGeoJSON(params: {
+    airports: string[];
+    flights?: string[];
+    route_type?: string;
+  }): Promise<GeoJSONFeatureCollection> {
+    return this.request('/routes/geojson/route', {
+      method: 'POST',
+      body: JSON.stringify(params),
+    });
+  }
+
+  async getNetworkGeoJSON(): Promise<GeoJSONFeatureCollection> {
+    return this.request('/routes/geojson/network');
+  }
+
+  async getRoutesComparisonGeoJSON(routes: Route[]): Promise<GeoJSONFeatureCollection> {
+    return this.request('/routes/geojson/comparison', {
+      method: 'POST',
+      body: JSON.stringify({ routes }),
+    });
+  }
 }
 
 export const flightAPI = new FlightNetworkAPI();
\ No newline at end of file